@@ -1,6 +1,15 @@
 # BOUNDARY: WSGI entrypoint
+import os
+
 from app import create_app
-app = create_app()
+
+DEBUG = True
+# The web process dispatches background jobs; tools and tests leave it off. Under
+# the debug reloader `python app.py` runs twice: a watcher that only restarts the
+# server and the serving child (WERKZEUG_RUN_MAIN=true). Only the child dispatches,
+# so one process claims jobs and it always runs the current code.
+serving = __name__ != '__main__' or not DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+app = create_app({'JOBS_AUTOSTART': serving})
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=DEBUG)
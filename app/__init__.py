@@ -1,6 +1,15 @@
 # BOUNDARY: Flask app factory and blueprint registration
 from flask import Flask, request, redirect, url_for, flash, session
 from .entity.models import db, seed_database
+from .entity.migrations import migrate
+from .entity.view_counter import ViewCounterBuffer
+from .entity.sqlite_profile import SQLiteProfile
+from .entity.ref_cache import ReferenceCache
+from .entity.sql_timing import SQLTiming
+from .entity.jobs import JobRunner
+from .entity.count_cache import CountCache
+from .entity.analytics import Analytics
+from .entity.seen_requests import SeenRequests
 import os
 from .boundary.routes import boundary_bp
 
@@ -19,9 +28,35 @@ def create_app(test_config=None):
             pass
         app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # demo accounts and sample data on an empty database; turn off in production
+    app.config.setdefault('SEED_DEMO_DATA', True)
+    # ETag / 304 on read-heavy pages (see boundary.conditional)
+    app.config.setdefault('CONDITIONAL_GET', True)
+    # history / completed requests older than this move to the archive tables (see models.archive_before)
+    app.config.setdefault('ARCHIVE_AFTER_DAYS', 365)
+    app.config.setdefault('ARCHIVE_BATCH_SIZE', 500)
 
+    # ENTITY: SQLite engine profile (pool options must be set before the engine is built)
+    sqlite_profile = SQLiteProfile(app)
+    # ENTITY: per-request SQL timing (off unless SQL_TIMING is set)
+    sql_timing = SQLTiming(app)
     # ENTITY: bind SQLAlchemy
     db.init_app(app)
+    with app.app_context():
+        sqlite_profile.attach(db.engine)
+        sql_timing.attach(db.engine)
+    # ENTITY: write-behind buffer for request view counters
+    ViewCounterBuffer(app)
+    # ENTITY: per-CSR viewed-requests bitmap (first-view check for the counter above)
+    SeenRequests(app)
+    # ENTITY: cache for categories / active profiles
+    ReferenceCache(app)
+    # ENTITY: listing totals (exact / cached by table version / skipped)
+    CountCache(app)
+    # ENTITY: NumPy copies of report timestamps for the hourly / rolling / latency scopes
+    Analytics(app)
+    # ENTITY: persisted background jobs (PM reports, exports, maintenance)
+    jobs = JobRunner(app)
 
     # BOUNDARY: register routes
     app.register_blueprint(boundary_bp)
@@ -47,9 +82,12 @@ def create_app(test_config=None):
             flash('Please log in to access that page.')
             return redirect(url_for('boundary.home'))
 
-    # Create tables + seed on first run
+    # Migrate the schema (one ledger read when current) + seed on first run
     with app.app_context():
-        db.create_all()
-        seed_database()
+        migrate(db.engine)
+        if app.config['SEED_DEMO_DATA']:
+            seed_database()
+    # resume queued / interrupted jobs
+    jobs.autostart()
 
     return app
\ No newline at end of file
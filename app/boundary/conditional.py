@@ -0,0 +1,76 @@
+# BOUNDARY: conditional GET (ETag / Last-Modified) for read-heavy pages
+import hashlib
+import os
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+from ..control.auth_controller import AuthController
+from ..control.version_controller import VersionController
+
+# session values the page templates render (header, role-specific links)
+SESSION_KEYS = ('user_id', 'role', 'username')
+
+
+def _deploy_salt(app):
+    """Digest of the app's code and templates (path, size, mtime), so a deploy changes every ETag."""
+    salt = app.extensions.get('conditional_get_salt')
+    if salt is None:
+        h = hashlib.sha1(app.config.get('CONDITIONAL_GET_SALT', '').encode())
+        for root, dirs, files in os.walk(app.root_path):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for name in sorted(files):
+                if name.endswith(('.py', '.html')):
+                    st = os.stat(os.path.join(root, name))
+                    h.update(f'{os.path.relpath(os.path.join(root, name), app.root_path)}:{st.st_size}:{st.st_mtime_ns};'.encode())
+        salt = app.extensions['conditional_get_salt'] = h.hexdigest()
+    return salt
+
+
+def page_etag(versions):
+    """Validator for the current request: URL + session fragments + data versions + deploy salt."""
+    h = hashlib.sha1(_deploy_salt(current_app).encode())
+    h.update(request.full_path.encode())
+    for key in SESSION_KEYS:
+        h.update(f'|{key}={session.get(key)!r}'.encode())
+    for table in sorted(versions):
+        h.update(f'|{table}:{versions[table][0]}'.encode())
+    return h.hexdigest()[:32]
+
+
+def conditional(role, tables):
+    """Serve 304 Not Modified when none of `tables` changed since the client's copy.
+
+    The role check runs first, then one read of the table_version counters.
+    A matching If-None-Match returns 304 before the view (and its entity
+    queries) runs; otherwise the view renders and the response carries the
+    ETag, a Last-Modified from the newest counter and `private, no-cache` so
+    browsers and proxies revalidate every time. Pages with pending flash
+    messages are always rendered: they consume the flash.
+    Last-Modified is informational only (one-second resolution cannot tell
+    two writes in the same second apart); revalidation is by ETag.
+    Disabled with CONDITIONAL_GET = False.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('CONDITIONAL_GET', True) or '_flashes' in session:
+                return view(*args, **kwargs)
+            AuthController.require_role(role)
+            versions = VersionController.versions(tables)
+            etag = page_etag(versions)
+            if request.if_none_match.contains(etag):
+                resp = current_app.response_class(status=304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag)
+            changed = [at for _, at in versions.values() if at is not None]
+            if changed:
+                resp.last_modified = max(changed)
+            resp.headers['Cache-Control'] = 'private, no-cache'
+            resp.vary.add('Cookie')
+            return resp
+        return wrapper
+    return decorator
@@ -1,5 +1,5 @@
 # BOUNDARY: All HTTP routes and request handling
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, abort, Response, stream_with_context, jsonify, send_file
 from types import SimpleNamespace
 
 from ..control.auth_controller import AuthController
@@ -7,6 +7,8 @@ from ..control.user_admin_controller import UserAdminController
 from ..control.csr_controller import CSRController
 from ..control.pin_controller import PINController
 from ..control.pm_controller import PMController  # <-- use Control, not Entity
+from ..control.export_format import EXPORT_FORMATS, export_chunks
+from .conditional import conditional
 
 boundary_bp = Blueprint('boundary', __name__)
 
@@ -75,6 +77,7 @@ def admin_users():
         per_page=pag['per_page'],
         total=pag['total'],
         pages=pag['pages'],
+        has_next=pag.get('has_next'),
         type=view_type,
         body_class='bg'
     )
@@ -247,6 +250,7 @@ def admin_activate_profile(profile_id):
 
 # ---------- CSR ----------
 @boundary_bp.route('/csr')
+@conditional('CSR Representative', ('category', 'request', 'shortlist', 'service_history'))
 def csr_dashboard():
     AuthController.require_role('CSR Representative')
     categories = CSRController.get_categories()
@@ -254,32 +258,32 @@ def csr_dashboard():
     qtext = (request.args.get('q','') or '').strip()
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 12, type=int)
+    # presence of ?cursor= (even empty) switches to keyset paging
+    cursor = request.args.get('cursor')
     if qtext:
-        pag = CSRController.search_requests(category_id=qcat, q=qtext, page=page, per_page=per_page)
+        pag = CSRController.search_requests(category_id=qcat, q=qtext, page=page, per_page=per_page, cursor=cursor)
     else:
-        pag = CSRController.get_open_requests(category_id=qcat, page=page, per_page=per_page)
+        pag = CSRController.get_open_requests(category_id=qcat, page=page, per_page=per_page, cursor=cursor)
     requests_list = pag['items']
-    full_shortlist = CSRController.get_shortlist()
-    history_pag = CSRController.history()
-    if isinstance(history_pag, dict):
-        history_items = history_pag.get('items', [])
-    else:
-        history_items = history_pag or []
-    saved_ids = {s.request_id for s in (full_shortlist or [])}
+    summary = CSRController.dashboard_summary([r.id for r in requests_list])
     return render_template(
         'csr_rep.html',
         view='dashboard',
         categories=categories,
         requests=requests_list,
-        saved_ids=saved_ids,
+        saved_ids=summary['saved_ids'],
         category_id=qcat,
         q=qtext,
         page=pag['page'],
         per_page=pag['per_page'],
         total=pag['total'],
         pages=pag['pages'],
-        shortlist=(full_shortlist or [])[:5],
-        history_preview=(history_items or [])[:5]
+        has_next=pag.get('has_next'),
+        cursor_mode=cursor is not None,
+        next_cursor=pag.get('next_cursor'),
+        prev_cursor=pag.get('prev_cursor'),
+        shortlist=summary['shortlist'],
+        history_preview=summary['history']
     )
 
 
@@ -322,6 +326,7 @@ def csr_history():
         per_page=pag['per_page'],
         total=pag['total'],
         pages=pag['pages'],
+        has_next=pag.get('has_next'),
         category_id=category_id,
         start=start,
         end=end,
@@ -373,8 +378,8 @@ def pin_dashboard():
     per_page = request.args.get('per_page', 12, type=int)
     pag = PINController.list_my_requests(q, page=page, per_page=per_page)
     reqs = pag['items']
-    history_preview = PINController.history() or []
-    return render_template('pin.html', view='dashboard', categories=categories, reqs=reqs, q=q, page=pag['page'], per_page=pag['per_page'], total=pag['total'], pages=pag['pages'], history_preview=(history_preview or [])[:5])
+    history_preview = PINController.history_preview()
+    return render_template('pin.html', view='dashboard', categories=categories, reqs=reqs, q=q, page=pag['page'], per_page=pag['per_page'], total=pag['total'], pages=pag['pages'], has_next=pag.get('has_next'), history_preview=history_preview)
 
 
 @boundary_bp.route('/pin/request/new', methods=['GET'])
@@ -474,11 +479,28 @@ def pin_history():
     start = request.args.get('start')
     end = request.args.get('end')
     q = request.args.get('q','').strip()
-    items = PINController.history(category_id=category_id, start=start, end=end, q=q)
-    return render_template('pin.html', view='history', categories=categories, items=items, category_id=category_id, start=start, end=end, q=q)
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 12, type=int)
+    pag = PINController.history(category_id=category_id, start=start, end=end, q=q, page=page, per_page=per_page)
+    return render_template(
+        'pin.html',
+        view='history',
+        categories=categories,
+        items=pag['items'],
+        page=pag['page'],
+        per_page=pag['per_page'],
+        total=pag['total'],
+        pages=pag['pages'],
+        has_next=pag.get('has_next'),
+        category_id=category_id,
+        start=start,
+        end=end,
+        q=q,
+    )
 
 # ---------- Platform Manager ----------
 @boundary_bp.route('/pm')
+@conditional('Platform Manager', ('category',))
 def pm_dashboard():
     AuthController.require_role('Platform Manager')
     q = request.args.get('q','').strip()
@@ -495,6 +517,7 @@ def pm_dashboard():
         per_page=pag['per_page'],
         total=pag['total'],
         pages=pag['pages'],
+        has_next=pag.get('has_next'),
     )
 
 @boundary_bp.route('/pm/category/create', methods=['POST'])
@@ -515,23 +538,162 @@ def pm_update_cat(cat_id):
 @boundary_bp.route('/pm/category/<int:cat_id>/delete', methods=['POST'])
 def pm_delete_cat(cat_id):
     AuthController.require_role('Platform Manager')
-    PMController.delete_category(cat_id)
-    flash('Category deleted.')
+    ok, msg = PMController.delete_category(cat_id)
+    flash(msg)
     return redirect(url_for('boundary.pm_dashboard', q=request.args.get('q'), page=request.args.get('page'), per_page=request.args.get('per_page')))
 
 @boundary_bp.route('/pm/reports')
+@conditional('Platform Manager', ('category', 'report_daily_rollup'))
 def pm_reports():
     AuthController.require_role('Platform Manager')
+    scopes = PMController.report_scopes()
     scope = request.args.get('scope', 'daily')
+    if scope not in scopes:
+        scope = 'daily'
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
-    data = PMController.generate_report(scope, page=page, per_page=per_page, order='asc')
+    category_id = request.args.get('category_id', type=int)
+    data = PMController.generate_report(scope, page=page, per_page=per_page, order='asc', category_id=category_id)
     return render_template(
         'pm.html',
         view='reports',
         scope=scope,
+        scopes=scopes,
+        category_id=category_id,
+        categories=PMController.get_categories(),
         data=data,
         page=data['page'],
         pages=data['pages'],
         per_page=data['per_page']
     )
+
+
+@boundary_bp.route('/pm/export/<dataset>')
+def pm_export(dataset):
+    """Stream service history or requests as CSV/JSONL, filtered like the history pages."""
+    AuthController.require_role('Platform Manager')
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+    category_id = request.args.get('category_id', type=int)
+    start = request.args.get('start') or None
+    end = request.args.get('end') or None
+    try:
+        if dataset == 'history':
+            columns, rows = PMController.export_history(category_id=category_id, start=start, end=end)
+        elif dataset == 'requests':
+            columns, rows = PMController.export_requests(category_id=category_id, start=start, end=end,
+                                                         status=request.args.get('status'))
+        else:
+            abort(404)
+    except ValueError:
+        flash('Invalid date.')
+        return redirect(url_for('boundary.pm_reports'))
+    filename = f"{'service_history' if dataset == 'history' else 'requests'}.{fmt}"
+    return Response(
+        stream_with_context(export_chunks(columns, rows, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
+    )
+
+
+# ---------- Platform Manager: background jobs ----------
+@boundary_bp.route('/pm/diagnostics')
+def pm_diagnostics():
+    """JSON buffer/cache metrics of the worker that answers (view flush latency, coalescing, hit rates)."""
+    AuthController.require_role('Platform Manager')
+    return jsonify(PMController.diagnostics())
+
+
+@boundary_bp.route('/pm/jobs')
+def pm_jobs():
+    AuthController.require_role('Platform Manager')
+    return render_template(
+        'pm.html',
+        view='jobs',
+        jobs=PMController.recent_jobs(),
+        categories=PMController.get_categories(),
+    )
+
+
+@boundary_bp.route('/pm/jobs/submit', methods=['POST'])
+def pm_job_submit():
+    """Queue a report, export or maintenance job and go to the jobs list."""
+    AuthController.require_role('Platform Manager')
+    kind = request.form.get('kind')
+    category_id = request.form.get('category_id', type=int)
+    try:
+        if kind == 'report':
+            job_id = PMController.enqueue_report(
+                scope=request.form.get('scope', 'daily'),
+                page=request.form.get('page', 1, type=int),
+                per_page=request.form.get('per_page', 20, type=int),
+                category_id=category_id,
+            )
+        elif kind == 'export':
+            fmt = request.form.get('format', 'csv')
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError('Unknown format.')
+            job_id = PMController.enqueue_export(
+                request.form.get('dataset', 'history'), fmt=fmt, category_id=category_id,
+                start=request.form.get('start') or None, end=request.form.get('end') or None,
+                status=request.form.get('status') or None,
+            )
+        else:
+            job_id = PMController.enqueue_maintenance(kind)
+    except ValueError as exc:
+        flash(str(exc) if str(exc).endswith('.') else 'Invalid job parameters.')
+        return redirect(url_for('boundary.pm_jobs'))
+    flash(f'Job #{job_id} queued.')
+    return redirect(url_for('boundary.pm_jobs'))
+
+
+@boundary_bp.route('/pm/jobs/<int:job_id>')
+def pm_job_status(job_id):
+    """JSON status for polling."""
+    AuthController.require_role('Platform Manager')
+    job = PMController.job_status(job_id)
+    if job is None:
+        abort(404)
+    data = job.to_dict()
+    data['result_url'] = url_for('boundary.pm_job_result', job_id=job_id) if job.status == 'succeeded' else None
+    return jsonify(data)
+
+
+@boundary_bp.route('/pm/jobs/<int:job_id>/result')
+def pm_job_result(job_id):
+    AuthController.require_role('Platform Manager')
+    job = PMController.job_status(job_id)
+    result = PMController.job_result(job_id)
+    if job is None or result is None:
+        abort(404)
+    if job.kind == 'export':
+        return send_file(result['path'], mimetype=EXPORT_FORMATS[result['format']], as_attachment=True,
+                         download_name=f"{'service_history' if result['dataset'] == 'history' else 'requests'}.{result['format']}")
+    if job.kind == 'report':
+        params = job.params_dict()
+        return render_template(
+            'pm.html',
+            view='reports',
+            scope=params.get('scope'),
+            scopes=PMController.report_scopes(),
+            category_id=params.get('category_id'),
+            categories=PMController.get_categories(),
+            data=result,
+            page=result['page'],
+            pages=result['pages'],
+            per_page=result['per_page'],
+            job=job,
+        )
+    return jsonify(result)
+
+
+@boundary_bp.route('/pm/jobs/<int:job_id>/cancel', methods=['POST'])
+def pm_job_cancel(job_id):
+    AuthController.require_role('Platform Manager')
+    status = PMController.cancel_job(job_id)
+    if status is None:
+        abort(404)
+    flash(f'Job #{job_id}: {"cancelled" if status == "cancelled" else "cancel requested"}.'
+          if status in ('cancelled', 'running') else f'Job #{job_id} already {status}.')
+    return redirect(url_for('boundary.pm_jobs'))
@@ -2,7 +2,7 @@
 # CONTROL: CSR Rep use cases (browse/search PIN requests, shortlist, history)
 from datetime import datetime, timezone
 from ..entity.models import Category, Request, Shortlist, ServiceHistory, db
-from flask import session
+from flask import current_app, session
 
 class CSRController:
     @staticmethod
@@ -10,13 +10,19 @@ class CSRController:
         return Category.get_all()
 
     @staticmethod
-    def search_requests(category_id=None, q: str = '', page=1, per_page=12):
+    def search_requests(category_id=None, q: str = '', page=1, per_page=12, cursor=None):
         # return paginated open requests without changing view counts.
-        # supports optional category filter and text search q
-        return Request.paginate_open_no_increment(category_id=category_id, q=(q or '').strip() or None, page=page, per_page=per_page)
+        # supports optional category filter and text search q.
+        # cursor=None keeps numbered pages; any string (even '') opts into keyset paging
+        q = (q or '').strip() or None
+        if cursor is not None:
+            return Request.seek_open(category_id=category_id, q=q, cursor=cursor, per_page=per_page)
+        return Request.paginate_open_no_increment(category_id=category_id, q=q, page=page, per_page=per_page)
 
     @staticmethod
-    def get_open_requests(category_id=None, page=1, per_page=12):
+    def get_open_requests(category_id=None, page=1, per_page=12, cursor=None):
+        if cursor is not None:
+            return Request.seek_open(category_id=category_id, q=None, cursor=cursor, per_page=per_page)
         return Request.paginate_open_no_increment(category_id=category_id, q=None, page=page, per_page=per_page)
 
     @staticmethod
@@ -30,6 +36,16 @@ class CSRController:
         csr_id = session.get('user_id')
         return Shortlist.for_csr(csr_id)
 
+    @staticmethod
+    def dashboard_summary(request_ids, preview=5):
+        # saved flags for the requests on the current page plus short shortlist/history previews
+        csr_id = session.get('user_id')
+        return {
+            'saved_ids': Shortlist.saved_request_ids(csr_id, request_ids),
+            'shortlist': Shortlist.recent_for_csr(csr_id, limit=preview),
+            'history': ServiceHistory.recent_for_csr(csr_id, limit=preview),
+        }
+
     @staticmethod
     def search_shortlist(q: str = None, category_id: int = None):
         # return shortlist items for current CSR optionally filtered by query and/or category
@@ -72,18 +88,15 @@ class CSRController:
 
     @staticmethod
     def get_request(req_id):
-        # return the open request and increment views only once per CSR session
+        # return the open request and increment views only on the CSR's first view of it
         r = Request.get_if_open(req_id)
         if not r:
             return None
-        viewed = session.get('viewed_requests') or set()
-        if isinstance(viewed, list):
-            viewed = set(viewed)
-        if r.id not in viewed:
-            # increment the counter and mark as viewed in this session
+        # cookies from before the server-side bitmap still carry the old list
+        session.pop('viewed_requests', None)
+        if current_app.extensions['seen_requests'].first_view(session.get('user_id'), r.id):
+            db.session.commit()  # the new request_seen bit
             Request.increment_views(r.id)
-            viewed.add(r.id)
-            session['viewed_requests'] = list(viewed)
         return r
 
     @staticmethod
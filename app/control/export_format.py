@@ -0,0 +1,28 @@
+# CONTROL: CSV / JSON Lines rendering for exports (streamed responses and export jobs)
+import csv
+import io
+import json
+from datetime import datetime
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+def export_chunks(columns, rows, fmt, flush_bytes=64 * 1024):
+    """Render rows as CSV (with a header line) or JSON Lines, yielding ~flush_bytes chunks."""
+    buf = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        write = writer.writerow
+    else:
+        def write(row):
+            record = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in zip(columns, row)}
+            buf.write(json.dumps(record) + '\n')
+    for row in rows:
+        write(row)
+        if buf.tell() >= flush_bytes:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
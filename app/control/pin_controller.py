@@ -86,9 +86,15 @@ class PINController:
         return True
 
     @staticmethod
-    def history(category_id=None, start=None, end=None, q=None):
-        # return completed matches relevant to the current PIN user, with optional search q
+    def history(category_id=None, start=None, end=None, q=None, page=1, per_page=12):
+        # return paginated completed matches relevant to the current PIN user, with optional search q
         pin_id = session.get('user_id')
         sd = datetime.fromisoformat(start) if start else None
         ed = datetime.fromisoformat(end) if end else None
-        return ServiceHistory.filter_for_pin(pin_id=pin_id, category_id=category_id, start=sd, end=ed, q=q)
+        return ServiceHistory.paginate_for_pin(pin_id=pin_id, category_id=category_id, start=sd, end=ed, q=q,
+                                               page=page, per_page=per_page)
+
+    @staticmethod
+    def history_preview(limit=5):
+        # the latest few completed matches for the dashboard
+        return ServiceHistory.filter_for_pin(pin_id=session.get('user_id'), limit=limit)
@@ -1,5 +1,10 @@
-# CONTROL: Platform Manager use cases (Category CRUD + search + Reports)
-from ..entity.models import Category, ServiceHistory
+# CONTROL: Platform Manager use cases (Category CRUD + search + Reports + Exports)
+import os
+from datetime import datetime
+from flask import current_app, session
+from ..entity.models import Category, Request, ServiceHistory, Job
+from ..entity.analytics import ANALYTICS_SCOPES
+from . import pm_jobs  # registers the PM job handlers
 
 class PMController:
     @staticmethod
@@ -27,7 +32,96 @@ class PMController:
     def delete_category(cat_id):
         return Category.delete(cat_id)
 
+    # Report scopes: calendar buckets from the daily rollup, the rest from the NumPy analytics copy
+    REPORT_SCOPES = {'daily': 'Daily', 'weekly': 'Weekly', 'monthly': 'Monthly'}
+
+    @staticmethod
+    def report_scopes():
+        """scope -> label for every report scope this process can serve."""
+        scopes = dict(PMController.REPORT_SCOPES)
+        if current_app.extensions['analytics'].available:
+            scopes.update(ANALYTICS_SCOPES)
+        return scopes
+
+    @staticmethod
+    def generate_report(scope='daily', page: int = 1, per_page: int = 20, order: str = 'asc', category_id=None):
+        if scope in ANALYTICS_SCOPES and current_app.extensions['analytics'].available:
+            return current_app.extensions['analytics'].report(scope, page=page, per_page=per_page, order=order,
+                                                              category_id=category_id)
+        return ServiceHistory.generate_report(scope=scope, page=page, per_page=per_page, order=order,
+                                              category_id=category_id)
+
+    # Exports: (columns, row iterator); rows are streamed, never loaded as a whole
+    @staticmethod
+    def export_history(category_id=None, start=None, end=None):
+        sd = datetime.fromisoformat(start) if start else None
+        ed = datetime.fromisoformat(end) if end else None
+        return ServiceHistory.EXPORT_COLUMNS, ServiceHistory.iter_export(category_id=category_id, start=sd, end=ed)
+
+    @staticmethod
+    def export_requests(category_id=None, start=None, end=None, status=None):
+        sd = datetime.fromisoformat(start) if start else None
+        ed = datetime.fromisoformat(end) if end else None
+        return Request.EXPORT_COLUMNS, Request.iter_export(category_id=category_id, start=sd, end=ed,
+                                                           status=status or None)
+
+    # Background jobs (see entity.jobs): enqueue, poll, fetch result, cancel
+    @staticmethod
+    def _jobs():
+        return current_app.extensions['jobs']
+
+    @staticmethod
+    def enqueue_report(scope='daily', page: int = 1, per_page: int = 20, category_id=None):
+        if scope not in PMController.report_scopes():
+            raise ValueError('Unknown report scope.')
+        return PMController._jobs().submit('report', {
+            'scope': scope, 'page': page, 'per_page': per_page, 'order': 'asc', 'category_id': category_id,
+        }, created_by=session.get('user_id'))
+
     @staticmethod
-    def generate_report(scope='daily', page: int = 1, per_page: int = 20, order: str = 'asc'):
-        return ServiceHistory.generate_report(scope=scope, page=page, per_page=per_page, order=order)
+    def enqueue_export(dataset, fmt='csv', category_id=None, start=None, end=None, status=None):
+        if dataset not in pm_jobs.EXPORT_DATASETS:
+            raise ValueError('Unknown dataset.')
+        # validate dates now rather than failing in the worker
+        for value in (start, end):
+            if value:
+                datetime.fromisoformat(value)
+        return PMController._jobs().submit('export', {
+            'dataset': dataset, 'fmt': fmt, 'category_id': category_id, 'start': start, 'end': end,
+            'status': status,
+        }, created_by=session.get('user_id'))
 
+    @staticmethod
+    def enqueue_maintenance(kind):
+        if kind not in pm_jobs.MAINTENANCE_TASKS:
+            raise ValueError('Unknown maintenance task.')
+        return PMController._jobs().submit(kind, created_by=session.get('user_id'))
+
+    @staticmethod
+    def job_status(job_id):
+        return PMController._jobs().status(job_id)
+
+    @staticmethod
+    def job_result(job_id):
+        result = PMController._jobs().result(job_id)
+        # export files are deleted after JOBS_EXPORT_RETENTION_DAYS
+        if isinstance(result, dict) and 'path' in result and not os.path.exists(result['path']):
+            return None
+        return result
+
+    @staticmethod
+    def cancel_job(job_id):
+        return PMController._jobs().cancel(job_id)
+
+    @staticmethod
+    def recent_jobs(limit=20):
+        return Job.recent(limit)
+
+    # Diagnostics: this worker process's buffer and cache figures
+    DIAGNOSTIC_EXTENSIONS = ('view_counter', 'seen_requests', 'count_cache', 'ref_cache')
+
+    @staticmethod
+    def diagnostics():
+        """{extension: metrics()} for the in-process buffers/caches that report them."""
+        return {name: current_app.extensions[name].metrics()
+                for name in PMController.DIAGNOSTIC_EXTENSIONS if name in current_app.extensions}
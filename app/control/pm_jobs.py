@@ -0,0 +1,110 @@
+# CONTROL: background job handlers for Platform Manager work (reports, exports, maintenance)
+import contextlib
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from ..entity.jobs import task
+from ..entity.models import (
+    db, Request, ServiceHistory, rebuild_report_rollups, ensure_request_fts, ensure_history_fts, archive_before,
+)
+from .export_format import export_chunks
+
+EXPORT_DATASETS = {'history': ServiceHistory, 'requests': Request}
+MAINTENANCE_TASKS = ('rebuild_rollups', 'rebuild_search', 'archive', 'purge_exports')
+
+
+def export_dir():
+    path = current_app.config.get('JOBS_EXPORT_DIR') or os.path.join(current_app.instance_path, 'exports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def purge_exports(days=None):
+    """Delete export files older than JOBS_EXPORT_RETENTION_DAYS; returns how many were removed.
+
+    Their jobs stay listed, but the result link answers 404 once the file is gone.
+    """
+    days = current_app.config['JOBS_EXPORT_RETENTION_DAYS'] if days is None else days
+    if not days:
+        return 0
+    cutoff = time.time() - float(days) * 86400
+    removed = 0
+    for entry in os.scandir(export_dir()):
+        if entry.name.startswith('job-') and entry.is_file() and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:  # another worker got there first
+                pass
+    return removed
+
+
+@task('report')
+def run_report(ctx, scope='daily', page=1, per_page=20, order='asc', category_id=None):
+    from .pm_controller import PMController  # imports this module to register the handlers
+    return PMController.generate_report(scope=scope, page=page, per_page=per_page, order=order,
+                                        category_id=category_id)
+
+
+@task('export')
+def run_export(ctx, dataset='history', fmt='csv', category_id=None, start=None, end=None, status=None):
+    # every new export clears out expired ones, so the directory stays bounded without a scheduler
+    purge_exports()
+    model = EXPORT_DATASETS[dataset]
+    filters = {'category_id': category_id,
+               'start': datetime.fromisoformat(start) if start else None,
+               'end': datetime.fromisoformat(end) if end else None}
+    if model is Request:
+        filters['status'] = status or None
+    count = 0
+
+    def rows():
+        nonlocal count
+        for row in model.iter_export(**filters):
+            count += 1
+            if count % 1000 == 0:
+                ctx.checkpoint(progress=count)
+            yield row
+
+    path = os.path.join(export_dir(), f'job-{ctx.job_id}-{dataset}.{fmt}')
+    try:
+        with open(path, 'w', newline='', encoding='utf-8') as fh:
+            for chunk in export_chunks(model.EXPORT_COLUMNS, rows(), fmt):
+                fh.write(chunk)
+    except Exception:  # JobCancelled included
+        # no half-written files; open() itself may have failed before creating it
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        raise
+    return {'path': path, 'rows': count, 'dataset': dataset, 'format': fmt}
+
+
+@task('rebuild_rollups')
+def run_rebuild_rollups(ctx):
+    with db.engine.begin() as conn:
+        return {'rows': rebuild_report_rollups(conn)}
+
+
+@task('rebuild_search')
+def run_rebuild_search(ctx):
+    with db.engine.begin() as conn:
+        ensure_request_fts(conn, rebuild=True)
+        ensure_history_fts(conn, rebuild=True)
+    return {'rebuilt': ['request_fts', 'service_history_fts']}
+
+
+@task('purge_exports')
+def run_purge_exports(ctx):
+    return {'removed': purge_exports()}
+
+
+@task('archive')
+def run_archive(ctx, days=None):
+    days = days or current_app.config['ARCHIVE_AFTER_DAYS']
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    history, requests = archive_before(db.engine, cutoff, batch_size=current_app.config['ARCHIVE_BATCH_SIZE'],
+                                       progress=lambda h, r: ctx.checkpoint(progress=h + r))
+    return {'cutoff': cutoff.isoformat(timespec='seconds'), 'history_rows': history, 'request_rows': requests}
@@ -0,0 +1,9 @@
+# CONTROL: data versions behind conditional GETs
+from ..entity.models import TableVersion
+
+
+class VersionController:
+    @staticmethod
+    def versions(tables):
+        """{table: (version, changed_at)} for the tables a page reads."""
+        return TableVersion.current(tables)
@@ -0,0 +1,247 @@
+# ENTITY: in-memory columnar copies of request / service history timestamps for ad-hoc report buckets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, cast, Integer
+from sqlalchemy.sql import func
+
+from .models import db, Category, Request, TableVersion, history_source, request_source, request_archive
+
+try:
+    import numpy as np
+except ImportError:  # optional: the analytics scopes are hidden without it
+    np = None
+
+EPOCH = datetime(1970, 1, 1)
+
+# scope -> label; bucketed scopes count per fixed-width bucket, rolling ones average daily counts
+ANALYTICS_SCOPES = {
+    'hourly': 'Hourly',
+    '15min': '15-minute',
+    'rolling7': 'Rolling 7-day average',
+    'rolling28': 'Rolling 28-day average',
+    'latency': 'Completion latency by category',
+}
+BUCKET_SECONDS = {'hourly': 3600, '15min': 900}
+BUCKET_LABELS = {'hourly': '%Y-%m-%d %H:00', '15min': '%Y-%m-%d %H:%M'}
+ROLLING_DAYS = {'rolling7': 7, 'rolling28': 28}
+DAY = 86400
+# table_version counters that move once per inserted row and on any change the arrays mirror
+REQUEST_STAMP, HISTORY_STAMP = 'request.rows', 'service_history'
+
+
+def _seconds(col):
+    """Whole seconds since the epoch, computed by SQLite so rows arrive as plain ints."""
+    return cast(func.strftime('%s', col), Integer)
+
+
+def _label(seconds, fmt):
+    return (EPOCH + timedelta(seconds=int(seconds))).strftime(fmt)
+
+
+class Columns:
+    """A table's rows as parallel NumPy arrays, appended to by id watermark."""
+
+    def __init__(self, names, dtypes):
+        self.names = names
+        self.dtypes = dtypes
+        self.clear()
+
+    def clear(self):
+        self.watermark = 0
+        self.arrays = {n: np.empty(0, dtype=t) for n, t in zip(self.names, self.dtypes)}
+
+    def append(self, rows):
+        """rows: list of tuples (id, *names); returns how many were added."""
+        if not rows:
+            return 0
+        cols = list(zip(*rows))
+        self.watermark = cols[0][-1]
+        self.arrays = {
+            n: np.concatenate([self.arrays[n], np.array(c, dtype=t)])
+            for n, t, c in zip(self.names, self.dtypes, cols[1:])
+        }
+        return len(rows)
+
+    def __len__(self):
+        return len(self.arrays[self.names[0]])
+
+
+class Analytics:
+    """
+    Report scopes the daily rollup cannot serve, computed with NumPy.
+
+    Keeps request creation times and service completion times, categories
+    and request-to-completion latency as compact arrays (int64 seconds,
+    int32 category ids, float64 latency). Each report first compares the
+    table_version stamps of request rows and service history with those
+    seen at the last load: unchanged, the arrays are current; moved by
+    exactly the number of rows whose id is above the last one loaded, those
+    rows are appended; moved by anything else (updates, deletes, archiving,
+    a rowid reused after deleting the newest row), everything is reloaded.
+    A full reload also happens once the copy is ANALYTICS_RELOAD_SECONDS
+    old, as a backstop for writes made with the triggers off. Bucketing is a
+    bincount over the arrays, rolling averages a cumulative-sum difference,
+    so a report over hundreds of thousands of rows takes milliseconds.
+
+    Without NumPy installed `available` is False and PMController offers
+    only the rollup scopes.
+
+    Config:
+        ANALYTICS_RELOAD_SECONDS    age after which the arrays are reloaded in full (default 300)
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.available = np is not None
+        self.loaded_at = None
+        self.stamps = None
+        if self.available:
+            self.requests = Columns(('created', 'category'), (np.int64, np.int32))
+            self.history = Columns(('completed', 'category', 'latency'), (np.int64, np.int32, np.float64))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ANALYTICS_RELOAD_SECONDS', 300)
+        self.reload_seconds = float(app.config['ANALYTICS_RELOAD_SECONDS'])
+        app.extensions['analytics'] = self
+
+    # ------- loading -------
+    def refresh(self, full=False):
+        """Bring the arrays up to date (see the class docstring); returns (request arrays, history arrays)."""
+        with self._lock:
+            versions = TableVersion.current((REQUEST_STAMP, HISTORY_STAMP))
+            stamps = (versions[REQUEST_STAMP][0], versions[HISTORY_STAMP][0])
+            reload = (full or self.loaded_at is None
+                      or time.monotonic() - self.loaded_at > self.reload_seconds)
+            if not reload and stamps == self.stamps:
+                return self.requests.arrays, self.history.arrays
+            if not reload:
+                rows, hist = self._fetch()
+                if (stamps[0] - self.stamps[0], stamps[1] - self.stamps[1]) == (len(rows), len(hist)):
+                    self._append(rows, hist)
+                    self.stamps = stamps
+                    return self.requests.arrays, self.history.arrays
+            self.requests.clear()
+            self.history.clear()
+            self.loaded_at = time.monotonic()
+            self._append(*self._fetch())
+            self.stamps = stamps
+            return self.requests.arrays, self.history.arrays
+
+    def _fetch(self):
+        """Rows above the current watermarks, as (request rows, history rows)."""
+        # archived rows keep their ids, so one watermark covers hot + archive
+        req = request_source()
+        rows = db.session.execute(
+            select(req.id, _seconds(req.created_at), func.coalesce(req.category_id, -1))
+            .where(req.id > self.requests.watermark, req.created_at.isnot(None))
+            .order_by(req.id)
+        ).all()
+        sh, _ = history_source()
+        created = func.coalesce(Request.created_at, request_archive.c.created_at)
+        hist = db.session.execute(
+            select(sh.id, _seconds(sh.date_completed), func.coalesce(sh.category_id, -1),
+                   _seconds(sh.date_completed) - _seconds(created))
+            .select_from(sh)
+            .outerjoin(Request, Request.id == sh.request_id)
+            .outerjoin(request_archive, request_archive.c.id == sh.request_id)
+            .where(sh.id > self.history.watermark, sh.date_completed.isnot(None))
+            .order_by(sh.id)
+        ).all()
+        return rows, hist
+
+    def _append(self, rows, hist):
+        self.requests.append(rows)
+        self.history.append([(i, c, cat, float('nan') if lat is None else lat) for i, c, cat, lat in hist])
+
+    # ------- reports -------
+    def report(self, scope, page=1, per_page=20, order='asc', category_id=None):
+        """Same dict shape as ServiceHistory.generate_report (latency adds 'latency' rows)."""
+        if scope not in ANALYTICS_SCOPES:
+            raise ValueError(f'unknown analytics scope: {scope}')
+        if not self.available:
+            raise RuntimeError('the analytics report scopes need NumPy')
+        req, hist = self.refresh()
+        created, done = req['created'], hist['completed']
+        if category_id:
+            created = created[req['category'] == category_id]
+            done = done[hist['category'] == category_id]
+        base = {'total_requests': int(len(created)), 'total_completed': int(len(done)), 'scope': scope}
+
+        if scope == 'latency':
+            rows = self._latency(hist, category_id)
+            data = _page(rows[::-1] if order == 'desc' else rows, page, per_page)
+            data['latency'] = data['rows']
+            return {**base, **data, 'bucket_count_requests': 0, 'bucket_count_completed': len(rows)}
+
+        if scope in ROLLING_DAYS:
+            width, fmt = DAY, '%Y-%m-%d'
+        else:
+            width, fmt = BUCKET_SECONDS[scope], BUCKET_LABELS[scope]
+        if not len(created) and not len(done):
+            return {**base, **_page([], page, per_page), 'bucket_count_requests': 0, 'bucket_count_completed': 0}
+
+        lo = min(a.min() for a in (created, done) if len(a)) // width * width
+        hi = max(a.max() for a in (created, done) if len(a))
+        n = int((hi - lo) // width) + 1
+        created_counts = np.bincount((created - lo) // width, minlength=n)
+        done_counts = np.bincount((done - lo) // width, minlength=n)
+        buckets = {'bucket_count_requests': int(np.count_nonzero(created_counts)),
+                   'bucket_count_completed': int(np.count_nonzero(done_counts))}
+        if scope in ROLLING_DAYS:
+            created_counts = _rolling_mean(created_counts, ROLLING_DAYS[scope])
+            done_counts = _rolling_mean(done_counts, ROLLING_DAYS[scope])
+
+        index = np.arange(n)
+        if order == 'desc':
+            index = index[::-1]
+        data = _page(index, page, per_page)
+        window = data['rows']
+        data['rows'] = [(_label(lo + i * width, fmt), created_counts[i].item(), done_counts[i].item())
+                        for i in window]
+        data['requests'] = [(b, c) for b, c, _ in data['rows']]
+        data['completed'] = [(b, c) for b, _, c in data['rows']]
+        return {**base, **buckets, **data}
+
+    def _latency(self, hist, category_id):
+        """[(category name, completions, mean h, median h, p90 h)] from the history arrays."""
+        ok = ~np.isnan(hist['latency'])
+        cats, lat = hist['category'][ok], hist['latency'][ok] / 3600.0
+        if category_id:
+            keep = cats == category_id
+            cats, lat = cats[keep], lat[keep]
+        if not len(lat):
+            return []
+        order = np.argsort(cats, kind='stable')
+        cats, lat = cats[order], lat[order]
+        ids, starts = np.unique(cats, return_index=True)
+        names = dict(db.session.execute(select(Category.id, Category.name)).all())
+        rows = []
+        for cat, group in zip(ids.tolist(), np.split(lat, starts[1:])):
+            p50, p90 = np.percentile(group, [50, 90])
+            rows.append((names.get(cat, 'Uncategorised'), len(group), round(float(group.mean()), 2),
+                         round(float(p50), 2), round(float(p90), 2)))
+        rows.sort(key=lambda r: r[0].lower())
+        return rows
+
+
+def _rolling_mean(counts, days):
+    """Trailing mean over `days` buckets; the first days average what is available."""
+    csum = np.cumsum(counts, dtype=np.float64)
+    sums = csum.copy()
+    sums[days:] -= csum[:-days]
+    span = np.minimum(np.arange(1, len(counts) + 1), days)
+    return np.round(sums / span, 2)
+
+
+def _page(rows, page, per_page):
+    total = len(rows)
+    pages = max(1, (total + per_page - 1) // per_page)
+    page = max(1, min(int(page or 1), pages))
+    offset = (page - 1) * per_page
+    return {'rows': rows[offset:offset + per_page], 'requests': [], 'completed': [],
+            'total': total, 'pages': pages, 'page': page, 'per_page': per_page}
+
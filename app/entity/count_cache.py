@@ -0,0 +1,66 @@
+# ENTITY: cached COUNT(*) totals for paginated listings
+import threading
+from collections import OrderedDict
+
+COUNT_MODES = ('exact', 'cached', 'none')
+
+
+class CountCache:
+    """
+    Remembers listing totals per filter key, stamped with table versions.
+
+    A cached total is only returned while every table it was counted from
+    still has the same table_version counter, so any committed write (from
+    any process) invalidates it; reading the counters is one primary-key
+    lookup instead of a COUNT(*) over the filtered set. Entries are kept in
+    a small LRU.
+
+    PAGINATION_COUNT picks how paginate_query() gets totals:
+        'exact'   COUNT(*) on every page view (Flask-SQLAlchemy behaviour)
+        'cached'  COUNT(*) only when the tables changed since the last count
+        'none'    no total at all: fetch per_page + 1 rows to know if there is a next page
+
+    Config:
+        PAGINATION_COUNT    default count mode (default 'cached')
+        COUNT_CACHE_SIZE    filter keys remembered per process (default 2048)
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PAGINATION_COUNT', 'cached')
+        app.config.setdefault('COUNT_CACHE_SIZE', 2048)
+        if app.config['PAGINATION_COUNT'] not in COUNT_MODES:
+            raise ValueError(f"PAGINATION_COUNT must be one of {COUNT_MODES}")
+        self.mode = app.config['PAGINATION_COUNT']
+        self.size = max(1, int(app.config['COUNT_CACHE_SIZE']))
+        app.extensions['count_cache'] = self
+
+    def get(self, key, stamp):
+        """The total stored for key if it was counted at this stamp, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, stamp, total):
+        with self._lock:
+            self._entries[key] = (stamp, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'mode': self.mode, 'hits': self.hits, 'misses': self.misses, 'keys': len(self._entries),
+                    'hit_ratio': self.hits / lookups if lookups else 0.0}
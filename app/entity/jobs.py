@@ -0,0 +1,287 @@
+# ENTITY: persisted background jobs run on a bounded pool of worker threads
+import atexit
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import update
+
+from .models import db, Job
+
+logger = logging.getLogger(__name__)
+
+# kind -> callable(ctx, **params) returning a JSON-serialisable result
+TASKS = {}
+
+
+def task(kind):
+    """Register a function as the handler for jobs of this kind."""
+    def decorator(fn):
+        TASKS[kind] = fn
+        return fn
+    return decorator
+
+
+class JobCancelled(Exception):
+    """Raised from JobContext.checkpoint() once a running job has been asked to stop."""
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobContext:
+    """Handed to a task: the job row's id/params plus cooperative progress + cancellation."""
+
+    def __init__(self, runner, job_id, params):
+        self.runner = runner
+        self.job_id = job_id
+        self.params = params
+        self._last = time.monotonic()
+
+    def checkpoint(self, progress=None):
+        """Record progress and raise JobCancelled if cancel was requested.
+
+        Cheap to call often: the row is touched at most every poll interval,
+        through its own connection, so a task may call this while iterating
+        a server-side cursor.
+        """
+        if self.runner.inline or time.monotonic() - self._last < self.runner.poll_interval:
+            return
+        self._last = time.monotonic()
+        values = {'heartbeat_at': _now()}
+        if progress is not None:
+            values['progress'] = progress
+        with db.engine.begin() as conn:
+            conn.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            cancel = conn.execute(db.select(Job.cancel_requested).where(Job.id == self.job_id)).scalar()
+        if cancel:
+            raise JobCancelled()
+
+
+class JobRunner:
+    """
+    Runs registered tasks in the background; the `job` table is the queue.
+
+    submit() inserts a queued row and wakes the dispatcher thread, which
+    claims queued rows (an UPDATE ... WHERE status='queued', so several
+    processes can share one database) while fewer than JOBS_WORKERS jobs run
+    in this process, each on its own daemon thread. Running jobs hold a
+    lease that the dispatcher renews; a job whose lease lapses (its process
+    died) is queued again, up to JOBS_MAX_ATTEMPTS runs. On a clean shutdown
+    the running jobs are put back in the queue straight away, so work
+    submitted before a restart resumes after it.
+
+    Cancelling a queued job is immediate; a running job is flagged and stops
+    at its next JobContext.checkpoint().
+
+    With JOBS_WORKERS = 0 (the default for in-memory databases, whose single
+    connection cannot be shared between threads) submit() runs the job
+    inline before returning.
+
+    Config:
+        JOBS_WORKERS          jobs running at once in this process (default 2; 0 = inline)
+        JOBS_AUTOSTART        start the dispatcher at app start-up (default False; app.py, the
+                              web entry point, turns it on so tools and tests stay thread-free)
+        JOBS_POLL_INTERVAL    seconds between dispatcher passes / lease renewals (default 1.0)
+        JOBS_LEASE_SECONDS    a running job not renewed for this long is requeued (default 60)
+        JOBS_MAX_ATTEMPTS     runs before a repeatedly interrupted job is failed (default 3)
+        JOBS_EXPORT_DIR       where export jobs write files (default <instance>/exports)
+        JOBS_EXPORT_RETENTION_DAYS  export files older than this are deleted (default 7; 0 keeps them)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._running = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        in_memory = ':memory:' in uri or uri.rstrip('/') in ('sqlite:', 'sqlite://')
+        app.config.setdefault('JOBS_WORKERS', 0 if in_memory else 2)
+        app.config.setdefault('JOBS_AUTOSTART', False)
+        app.config.setdefault('JOBS_POLL_INTERVAL', 1.0)
+        app.config.setdefault('JOBS_LEASE_SECONDS', 60)
+        app.config.setdefault('JOBS_MAX_ATTEMPTS', 3)
+        app.config.setdefault('JOBS_EXPORT_DIR', None)
+        app.config.setdefault('JOBS_EXPORT_RETENTION_DAYS', 7)
+        self.app = app
+        self.workers = max(0, int(app.config['JOBS_WORKERS']))
+        self.inline = self.workers == 0
+        self.poll_interval = float(app.config['JOBS_POLL_INTERVAL'])
+        self.lease = timedelta(seconds=float(app.config['JOBS_LEASE_SECONDS']))
+        self.max_attempts = max(1, int(app.config['JOBS_MAX_ATTEMPTS']))
+        app.extensions['jobs'] = self
+
+    def autostart(self):
+        """Start the dispatcher if JOBS_AUTOSTART is set (call once the schema is migrated)."""
+        if self.app.config['JOBS_AUTOSTART'] and not self.inline:
+            self.start()
+
+    # ------- API -------
+    def submit(self, kind, params=None, created_by=None):
+        """Queue a job; returns its id. Inline mode runs it before returning."""
+        if kind not in TASKS:
+            raise ValueError(f'unknown job kind: {kind}')
+        job = Job(kind=kind, params=json.dumps(params or {}), status='queued', created_by=created_by)
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+        if self.inline:
+            if self._claim(job_id):
+                # a fresh app context scopes a fresh session: the task's cleanup
+                # below never rolls back or expires the caller's objects
+                with self.app.app_context():
+                    self._execute(job_id)
+                db.session.expire(job)  # the caller's copy still says 'queued'
+        else:
+            self._wake.set()
+        return job_id
+
+    def status(self, job_id):
+        job = Job.get_by_id(job_id)
+        if job is not None:
+            db.session.refresh(job)
+        return job
+
+    def result(self, job_id):
+        """The stored result of a succeeded job, else None."""
+        job = self.status(job_id)
+        return job.result_value() if job is not None and job.status == 'succeeded' else None
+
+    def cancel(self, job_id):
+        """Cancel a queued job now or ask a running one to stop. Returns the job's new status."""
+        with db.engine.begin() as conn:
+            done = conn.execute(update(Job).where(Job.id == job_id, Job.status == 'queued')
+                                .values(status='cancelled', finished_at=_now())).rowcount
+            if not done:
+                conn.execute(update(Job).where(Job.id == job_id, Job.status == 'running')
+                             .values(cancel_requested=True))
+            status = conn.execute(db.select(Job.status).where(Job.id == job_id)).scalar()
+        db.session.expire_all()
+        return status
+
+    def wait(self, job_id, timeout=30.0):
+        """Block until the job has finished (tests, tools). Returns the Job or None on timeout."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.app.app_context():
+                job = db.session.get(Job, job_id)
+                if job is not None and job.finished:
+                    db.session.expunge(job)
+                    return job
+            time.sleep(min(0.05, self.poll_interval))
+        return None
+
+    # ------- dispatcher -------
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='job-dispatcher', daemon=True)
+            self._thread.start()
+        # only a dispatching runner can hold running jobs that need requeueing at exit
+        atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """Stop dispatching and hand this process's running jobs back to the queue."""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            running = list(self._running)
+        if not running or self.app is None:
+            return
+        try:
+            with self.app.app_context(), db.engine.begin() as conn:
+                conn.execute(update(Job).where(Job.id.in_(running), Job.status == 'running')
+                             .values(status='queued', started_at=None, heartbeat_at=None))
+        except Exception:
+            logger.exception('could not requeue running jobs at shutdown')
+
+    def _run(self):
+        # first pass after one interval keeps start-up itself free of queries
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                with self.app.app_context():
+                    self.dispatch()
+            except Exception:
+                logger.exception('job dispatcher pass failed')
+
+    def dispatch(self):
+        """One pass: renew leases, recover lapsed jobs, start queued jobs while slots are free."""
+        now = _now()
+        with self._lock:
+            running = list(self._running)
+        with db.engine.begin() as conn:
+            if running:
+                conn.execute(update(Job).where(Job.id.in_(running)).values(heartbeat_at=now))
+            expired = Job.status == 'running', Job.heartbeat_at < now - self.lease
+            conn.execute(update(Job).where(*expired, Job.attempts >= self.max_attempts)
+                         .values(status='failed', finished_at=now, error='interrupted too many times'))
+            conn.execute(update(Job).where(*expired).values(status='queued', started_at=None, heartbeat_at=None))
+        started = 0
+        while len(self._running) < self.workers and not self._stop.is_set():
+            job_id = db.session.execute(
+                db.select(Job.id).where(Job.status == 'queued').order_by(Job.id).limit(1)
+            ).scalar()
+            db.session.remove()
+            if job_id is None or not self._claim(job_id):
+                break
+            with self._lock:
+                self._running.add(job_id)
+            threading.Thread(target=self._thread_main, args=(job_id,), name=f'job-{job_id}', daemon=True).start()
+            started += 1
+        return started
+
+    def _claim(self, job_id):
+        now = _now()
+        with db.engine.begin() as conn:
+            return conn.execute(
+                update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', started_at=now, heartbeat_at=now, attempts=Job.attempts + 1)
+            ).rowcount == 1
+
+    def _thread_main(self, job_id):
+        try:
+            with self.app.app_context():
+                self._execute(job_id)
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+            self._wake.set()
+
+    def _execute(self, job_id):
+        job = db.session.get(Job, job_id)
+        kind, params = job.kind, job.params_dict()
+        ctx = JobContext(self, job_id, params)
+        t0 = time.perf_counter()
+        values = {'finished_at': None}
+        try:
+            result = TASKS[kind](ctx, **params)
+            values.update(status='succeeded', result=json.dumps(result, default=str))
+        except JobCancelled:
+            values.update(status='cancelled')
+        except Exception as exc:
+            logger.exception('job %d (%s) failed', job_id, kind)
+            values.update(status='failed', error=f'{type(exc).__name__}: {exc}')
+        finally:
+            # the session belongs to this job (worker thread or inline app context)
+            db.session.rollback()
+            db.session.remove()
+        values['finished_at'] = _now()
+        with db.engine.begin() as conn:
+            # a shutdown may have requeued it meanwhile; only finish what we still own
+            conn.execute(update(Job).where(Job.id == job_id, Job.status == 'running').values(**values))
+        logger.info('job %d (%s) %s in %.1fms', job_id, kind, values['status'], (time.perf_counter() - t0) * 1000)
@@ -0,0 +1,169 @@
+# ENTITY: versioned schema migrations tracked in a schema_version ledger
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from .models import (
+    db, ensure_request_fts, ensure_history_fts, ensure_shortlist_unique,
+    ensure_report_rollups, ensure_indexes, ensure_table_versions,
+)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_DDL = """CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(120) NOT NULL,
+    applied_at DATETIME NOT NULL
+)"""
+
+
+def _table_columns(conn, table_name):
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info('{table_name}')")}
+
+
+def _add_columns(conn, table_name, columns):
+    """ALTER TABLE ADD COLUMN for each (name, type) the table does not have yet."""
+    existing = _table_columns(conn, table_name)
+    for name, coltype in columns:
+        if name not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {name} {coltype}")
+
+
+# ------- steps (each must also be safe on a database that already has the change) -------
+def create_tables(conn):
+    """Create any declared table that is missing (with its FTS/trigger DDL)."""
+    db.metadata.create_all(bind=conn)
+
+
+def profile_columns(conn):
+    cols = _table_columns(conn, 'user_profiles')
+    if 'name' not in cols:
+        conn.exec_driver_sql("ALTER TABLE user_profiles ADD COLUMN name VARCHAR(80)")
+        if 'full_name' in cols:
+            conn.exec_driver_sql("UPDATE user_profiles SET name = full_name WHERE name IS NULL OR name = ''")
+    _add_columns(conn, 'user_profiles', [('description', 'TEXT')])
+
+
+def account_columns(conn):
+    _add_columns(conn, 'user_accounts', [
+        ('first_name', 'VARCHAR(80)'), ('last_name', 'VARCHAR(80)'), ('email', 'VARCHAR(120)'),
+        ('phone', 'VARCHAR(30)'), ('profile_id', 'INTEGER'),
+    ])
+
+
+def account_roles_to_profiles(conn):
+    """Map the legacy user_accounts.role text onto user_profiles and drop the column."""
+    if 'role' not in _table_columns(conn, 'user_accounts'):
+        return
+    roles = [r[0] for r in conn.exec_driver_sql(
+        "SELECT DISTINCT role FROM user_accounts WHERE role IS NOT NULL AND role <> ''")]
+    for role in roles:
+        conn.execute(text(
+            "INSERT INTO user_profiles (name, is_active) SELECT :n, 1 "
+            "WHERE NOT EXISTS (SELECT 1 FROM user_profiles WHERE name = :n)"
+        ), {'n': role})
+    # rebuild without the role column; FK checks run at commit, once the new table has the old name
+    conn.exec_driver_sql("PRAGMA defer_foreign_keys=ON")
+    conn.exec_driver_sql("""
+        CREATE TABLE user_accounts_new (
+            id INTEGER PRIMARY KEY,
+            profile_id INTEGER,
+            first_name VARCHAR(80),
+            last_name VARCHAR(80),
+            email VARCHAR(120),
+            phone VARCHAR(30),
+            username VARCHAR(80) UNIQUE NOT NULL,
+            password_hash VARCHAR(128) NOT NULL,
+            is_active BOOLEAN DEFAULT 1
+        )
+    """)
+    conn.exec_driver_sql("""
+        INSERT INTO user_accounts_new (id, profile_id, first_name, last_name, email, phone, username, password_hash, is_active)
+        SELECT ua.id,
+               COALESCE(ua.profile_id, (SELECT id FROM user_profiles WHERE name = ua.role LIMIT 1)),
+               ua.first_name, ua.last_name, ua.email, ua.phone, ua.username, ua.password_hash, ua.is_active
+        FROM user_accounts ua
+    """)
+    conn.exec_driver_sql("DROP TABLE user_accounts")
+    # triggers elsewhere name user_accounts; don't re-validate them while it is briefly missing
+    conn.exec_driver_sql("PRAGMA legacy_alter_table=ON")
+    try:
+        conn.exec_driver_sql("ALTER TABLE user_accounts_new RENAME TO user_accounts")
+    finally:
+        conn.exec_driver_sql("PRAGMA legacy_alter_table=OFF")
+
+
+def request_acceptance_columns(conn):
+    _add_columns(conn, 'request', [('accepted_csr_id', 'INTEGER'), ('accepted_at', 'DATETIME')])
+
+
+def request_row_stamp(conn):
+    ensure_table_versions(conn, replace=('request',))
+
+
+# Ordered, append-only. Never renumber or edit an applied step; add a new one.
+MIGRATIONS = (
+    (1, 'create tables', create_tables),
+    (2, 'user_profiles name and description', profile_columns),
+    (3, 'user_accounts personal and profile columns', account_columns),
+    (4, 'user_accounts.role to user_profiles', account_roles_to_profiles),
+    (5, 'request acceptance columns', request_acceptance_columns),
+    (6, 'request_fts full-text index', ensure_request_fts),
+    (7, 'unique shortlist entries', ensure_shortlist_unique),
+    (8, 'service_history_fts full-text index', ensure_history_fts),
+    (9, 'report_daily_rollup', ensure_report_rollups),
+    (10, 'declared indexes', ensure_indexes),
+    (11, 'table_version change counters', ensure_table_versions),
+    (12, 'job queue table', create_tables),
+    (13, 'archive tables', create_tables),
+    (14, 'request_seen bitmap', create_tables),
+    (15, 'request row-set stamp', request_row_stamp),
+    (16, 'shortlist archive table', create_tables),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    """Highest applied migration, 0 for a database without a ledger."""
+    try:
+        return conn.exec_driver_sql("SELECT MAX(version) FROM schema_version").scalar() or 0
+    except OperationalError:
+        return 0
+
+
+def migrate(engine):
+    """Bring the database up to SCHEMA_VERSION. Returns the versions applied.
+
+    A current schema costs one read of the ledger. Otherwise pending steps run
+    in one BEGIN EXCLUSIVE transaction, so concurrent workers starting at once
+    wait for the first one and then find nothing left to do; a failing step
+    rolls the whole batch back.
+    """
+    with engine.connect() as conn:
+        if current_version(conn) >= SCHEMA_VERSION:
+            return []
+
+    applied = []
+    with engine.connect() as conn:
+        conn.exec_driver_sql("BEGIN EXCLUSIVE")
+        try:
+            conn.exec_driver_sql(SCHEMA_VERSION_DDL)
+            version = current_version(conn)
+            for number, name, step in MIGRATIONS:
+                if number <= version:
+                    continue
+                t0 = time.perf_counter()
+                step(conn)
+                conn.execute(text(
+                    "INSERT INTO schema_version (version, name, applied_at) VALUES (:v, :n, :at)"
+                ), {'v': number, 'n': name, 'at': datetime.now(timezone.utc).replace(tzinfo=None)})
+                applied.append(number)
+                logger.info('migration %d (%s) applied in %.1fms', number, name, (time.perf_counter() - t0) * 1000)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
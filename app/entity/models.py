@@ -1,14 +1,94 @@
 # ENTITY + Use-case coordination in one place (per your lecture guidance)
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timezone, timedelta
-from sqlalchemy import or_, text
+from datetime import date, datetime, timezone, timedelta
+from flask import current_app
+from sqlalchemy import or_, text, event, DDL, select, update, bindparam, literal_column, tuple_, union_all
+from sqlalchemy import table as sa_table, column as sa_column
 from sqlalchemy.sql import func  # <-- added for PM reports
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import hashlib
-from sqlalchemy.orm import joinedload
+from .ref_cache import cached, CategoryRef, ProfileRef
+from sqlalchemy.orm import joinedload, selectinload, contains_eager, aliased
 import random
+import re
+import json
+import base64
 
 db = SQLAlchemy()
 
+
+# =========================
+# Keyset pagination cursors
+# =========================
+def encode_cursor(direction, *key):
+    """Pack a seek position into an opaque URL-safe token.
+
+    direction is 'next' or 'prev'; key holds the sort-key values of the row
+    to seek from (datetimes are stored as ISO strings).
+    """
+    vals = [v.isoformat() if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps([direction, vals], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (direction, key_values) for a token, or None if it is empty or malformed."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, vals = json.loads(raw)
+        if direction not in ('next', 'prev') or not isinstance(vals, list):
+            return None
+        return direction, vals
+    except (ValueError, TypeError):
+        return None
+
+# =========================
+# Numbered pagination with a count strategy
+# =========================
+def paginate_query(query, page=1, per_page=12, count_key=None, tables=(), count=None):
+    """Page an ordered query; returns the items/total/page/per_page/pages dict plus has_prev/has_next.
+
+    count overrides the app's PAGINATION_COUNT mode (see entity.count_cache):
+    'exact' runs COUNT(*), 'cached' reuses the total stored for count_key
+    while the table_version counters of `tables` (table names or ROW_STAMPS
+    stamps) are unchanged, and 'none'
+    skips the total (total/pages are None) by fetching one extra row.
+    A short first page is its own total in every mode.
+    """
+    counts = current_app.extensions.get('count_cache')
+    mode = count or (counts.mode if counts is not None else 'exact')
+    if mode == 'cached' and (counts is None or count_key is None or not tables):
+        mode = 'exact'
+    page = max(1, int(page or 1))
+    per_page = max(1, int(per_page or 12))
+    offset = (page - 1) * per_page
+
+    if mode == 'none':
+        rows = query.limit(per_page + 1).offset(offset).all()
+        return {'items': rows[:per_page], 'total': None, 'page': page, 'per_page': per_page, 'pages': None,
+                'has_prev': page > 1, 'has_next': len(rows) > per_page}
+
+    total = stamp = None
+    if mode == 'cached':
+        versions = TableVersion.current(tables)
+        stamp = tuple(versions[t][0] for t in tables)
+        total = counts.get(count_key, stamp)
+    items = query.limit(per_page).offset(offset).all()
+    if total is None:
+        if len(items) < per_page and (items or page == 1):
+            total = offset + len(items)
+        else:
+            total = query.order_by(None).count()
+        if mode == 'cached':
+            counts.put(count_key, stamp, total)
+    pages = -(-total // per_page)
+    return {'items': items, 'total': total, 'page': page, 'per_page': per_page, 'pages': pages,
+            'has_prev': page > 1, 'has_next': page < pages}
+
+
 # =========================
 # Entity: UserAccount (logins)
 # =========================
@@ -17,6 +97,9 @@ class UserAccount(db.Model):
     Maps to 'user_accounts' table. Real authentication happens here.
     """
     __tablename__ = 'user_accounts'
+    __table_args__ = (
+        db.Index('ix_user_accounts_profile_id', 'profile_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     # link to the canonical profile/role (nullable until an admin assigns one)
@@ -43,14 +126,20 @@ class UserAccount(db.Model):
     def login(cls, role, username, password):
         # role is the profile name selected on the login form. Users without
         # an assigned profile cannot log in to a role until an admin assigns one.
-        prof = UserProfile.query.filter_by(name=role).first()
-        if not prof:
+        # One statement: the unique username index finds the account, the
+        # profile (and its active flag) comes back through the join.
+        u = (
+            cls.query.join(cls.profile)
+            .options(contains_eager(cls.profile))
+            .filter(cls.username == username, UserProfile.name == role)
+            .first()
+        )
+        if not u:
             return None
         # if the profile itself is suspended, deny login regardless of user state
-        if not prof.is_active:
+        if not u.profile.is_active:
             return None
-        u = cls.query.filter_by(username=username, profile_id=prof.id).first()
-        if u and u.is_active and u.check_password(password):
+        if u.is_active and u.check_password(password):
             return u
         return None
 
@@ -130,14 +219,8 @@ class UserAccount(db.Model):
             query = query.filter((cls.username.like(like)) | (UserProfile.name.like(like)) )
 
         query = query.order_by(cls.id.asc())
-        pag = query.paginate(page=page, per_page=per_page, error_out=False)
-        return {
-            "items": pag.items,
-            "total": pag.total,
-            "page": pag.page,
-            "per_page": per_page,
-            "pages": pag.pages,
-        }
+        return paginate_query(query, page=page, per_page=per_page, count_key=('user_accounts', q),
+                              tables=('user_accounts', 'user_profiles'))
 
 
 # =========================
@@ -201,14 +284,8 @@ class UserProfile(db.Model):
             like = f"%{q}%"
             query = query.filter(cls.name.like(like))
         query = query.order_by(cls.id.asc())
-        pag = query.paginate(page=page, per_page=per_page, error_out=False)
-        return {
-            "items": pag.items,
-            "total": pag.total,
-            "page": pag.page,
-            "per_page": per_page,
-            "pages": pag.pages,
-        }
+        return paginate_query(query, page=page, per_page=per_page, count_key=('user_profiles', q),
+                              tables=('user_profiles',))
 
     @classmethod
     def get_by_id(cls, profile_id: int):
@@ -219,8 +296,11 @@ class UserProfile(db.Model):
 
     @classmethod
     def get_active_profiles(cls):
-        """Return all active profiles ordered by name."""
-        return cls.query.filter_by(is_active=True).order_by(cls.name).all()
+        """Return all active profiles ordered by name (cached immutable snapshots)."""
+        return cached('active_profiles', lambda: tuple(
+            ProfileRef(p.id, p.name, p.description, bool(p.is_active))
+            for p in cls.query.filter_by(is_active=True).order_by(cls.name)
+        ))
 
 
 # =========================
@@ -232,7 +312,10 @@ class Category(db.Model):
 
     @classmethod
     def get_all(cls):
-        return cls.query.order_by(cls.name).all()
+        """All categories ordered by name (cached immutable snapshots)."""
+        return cached('categories', lambda: tuple(
+            CategoryRef(c.id, c.name) for c in cls.query.order_by(cls.name)
+        ))
 
     @classmethod
     def search(cls, q):
@@ -282,7 +365,12 @@ class Category(db.Model):
         if not c:
             return False, "Category not found."
         db.session.delete(c)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # foreign_keys=ON: requests or service history still point at it
+            db.session.rollback()
+            return False, "Category is in use by requests or service history."
         return True, "Category deleted."
     
     @classmethod
@@ -293,19 +381,24 @@ class Category(db.Model):
             query = query.filter(cls.name.like(like))
         # OLD: query = query.order_by(cls.name.desc() if order == "desc" else cls.name.asc())
         query = query.order_by(cls.id.desc() if order == "desc" else cls.id.asc())
-        pag = query.paginate(page=page, per_page=per_page, error_out=False)
-        return {
-            "items": pag.items,
-            "total": pag.total,
-            "page": pag.page,
-            "per_page": pag.per_page,
-            "pages": pag.pages,
-        }
+        return paginate_query(query, page=page, per_page=per_page, count_key=('category', q),
+                              tables=('category',))
 
 # =========================
 # Entity: Request (+ helpers)
 # =========================
 class Request(db.Model):
+    __table_args__ = (
+        # CSR browse: open requests newest first, optionally per category.
+        # Partial indexes keep completed rows out of the hot b-trees.
+        db.Index('ix_request_open_created', 'created_at', 'id', sqlite_where=text("status = 'open'")),
+        db.Index('ix_request_open_category_created', 'category_id', 'created_at', 'id', sqlite_where=text("status = 'open'")),
+        # PIN dashboard: own requests by status, newest first
+        db.Index('ix_request_pin_status_created', 'pin_id', 'status', 'created_at'),
+        # PM reports bucket on created_at
+        db.Index('ix_request_created_at', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     # PIN owner (optional for demo rows)
     pin_id = db.Column(db.Integer, db.ForeignKey('user_accounts.id'), nullable=True)
@@ -341,23 +434,74 @@ class Request(db.Model):
         """Return paginated open requests without incrementing views.
 
         Supports optional filtering by category_id and text search q against
-        title and description.
+        title and description. Text search goes through the request_fts index
+        and orders hits by bm25 relevance, newest first on ties.
         """
-        query = cls.query.filter_by(status='open')
+        # the browse table reads r.category.name for every row
+        query = cls.query.options(joinedload(cls.category)).filter_by(status='open')
         if category_id:
             query = query.filter_by(category_id=category_id)
-        # support optional text search against title/description
-        if q:
-            like = f"%{q}%"
-            query = query.filter((cls.title.like(like)) | (cls.description.like(like)))
-        query = query.order_by(cls.created_at.desc())
-        pag = query.paginate(page=page, per_page=per_page, error_out=False)
+        # support optional text search against title/description (FTS5, bm25-ranked)
+        query = cls._apply_text_search(query, q, cls.created_at.desc())
+        return paginate_query(query, page=page, per_page=per_page, count_key=('request.open', category_id, q),
+                              tables=('request.rows',))
+
+    @classmethod
+    def seek_open(cls, category_id=None, q: str = None, cursor: str = None, per_page=12):
+        """Keyset-paginated open requests, newest first.
+
+        Seeks on (created_at, id) instead of OFFSET and skips the COUNT(*), so
+        every page costs the same as the first. cursor is a token previously
+        returned as next_cursor/prev_cursor; empty or invalid tokens start at
+        the first page. Text matches are filtered through request_fts but keep
+        the date order (bm25 ranking does not fit a stable seek key).
+
+        Returns the numbered-page dict keys (page/total/pages are None) plus
+        next_cursor and prev_cursor.
+        """
+        matches = cls.query.filter_by(status='open')
+        if category_id:
+            matches = matches.filter_by(category_id=category_id)
+        matches = cls._text_filter(matches, q)
+        query = matches.options(joinedload(cls.category))
+
+        pos = decode_cursor(cursor)
+        key = None
+        if pos:
+            try:
+                key = (datetime.fromisoformat(pos[1][0]), int(pos[1][1]))
+            except (IndexError, TypeError, ValueError):
+                key = None
+        backwards = key is not None and pos[0] == 'prev'
+        sort_key = tuple_(cls.created_at, cls.id)
+        if key is None:
+            query = query.order_by(cls.created_at.desc(), cls.id.desc())
+        elif backwards:
+            query = query.filter(sort_key > tuple_(*key)).order_by(cls.created_at.asc(), cls.id.asc())
+        else:
+            query = query.filter(sort_key < tuple_(*key)).order_by(cls.created_at.desc(), cls.id.desc())
+
+        # one extra row tells us whether another page exists in that direction
+        rows = query.limit(per_page + 1).all()
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+            # the cursor's own row may have gone (closed, deleted), so look past the page
+            has_prev = more
+            has_next = bool(rows) and matches.filter(
+                sort_key < tuple_(rows[-1].created_at, rows[-1].id)).with_entities(cls.id).first() is not None
+        else:
+            has_prev, has_next = key is not None, more
+
         return {
-            'items': pag.items,
-            'total': pag.total,
-            'page': pag.page,
-            'per_page': pag.per_page,
-            'pages': pag.pages,
+            'items': rows,
+            'total': None,
+            'page': None,
+            'per_page': per_page,
+            'pages': None,
+            'next_cursor': encode_cursor('next', rows[-1].created_at, rows[-1].id) if rows and has_next else None,
+            'prev_cursor': encode_cursor('prev', rows[0].created_at, rows[0].id) if rows and has_prev else None,
         }
 
     @classmethod
@@ -369,20 +513,40 @@ class Request(db.Model):
 
     @classmethod
     def increment_views(cls, req_id):
-        r = cls.query.get(req_id)
-        if not r:
+        # buffered when the app has a view counter; otherwise written right away
+        buf = current_app.extensions.get('view_counter')
+        if buf is not None and buf.enabled:
+            buf.add(req_id)
             return
-        r.views_count = (r.views_count or 0) + 1
-        db.session.commit()
+        cls.add_views({req_id: 1})
 
     @classmethod
     def increment_views_bulk(cls, req_ids):
         if not req_ids:
             return
-        rows = cls.query.filter(cls.id.in_(req_ids)).all()
-        for r in rows:
-            r.views_count = (r.views_count or 0) + 1
-        db.session.commit()
+        buf = current_app.extensions.get('view_counter')
+        if buf is not None and buf.enabled:
+            for req_id in req_ids:
+                buf.add(req_id)
+            return
+        cls.add_views({req_id: 1 for req_id in req_ids})
+
+    @classmethod
+    def add_views(cls, counts):
+        """Apply {req_id: n} view increments in one transaction.
+
+        The addition runs in SQL (views_count = views_count + n), so concurrent
+        writers never lose each other's increments.
+        """
+        if not counts:
+            return
+        stmt = (
+            update(cls)
+            .where(cls.id == bindparam('rid'))
+            .values(views_count=func.coalesce(cls.views_count, 0) + bindparam('n'))
+        )
+        with db.engine.begin() as conn:
+            conn.execute(stmt, [{'rid': rid, 'n': n} for rid, n in counts.items()])
 
     @classmethod
     def create_for_pin(cls, pin_id, title, description, category_id):
@@ -427,32 +591,53 @@ class Request(db.Model):
                 Shortlist.query.filter_by(request_id=req_id).delete()
             except Exception:
                 pass
+            # keep completed-service records, detached from the deleted request
+            ServiceHistory.query.filter_by(request_id=req_id).update(
+                {ServiceHistory.request_id: None}, synchronize_session=False)
             db.session.delete(r)
             db.session.commit()
 
     @classmethod
     def search_by_pin(cls, pin_id, q=None):
-        query = cls.query.filter_by(pin_id=pin_id)
-        if q:
-            like = f"%{q}%"
-            query = query.filter((cls.title.like(like)) | (cls.description.like(like)))
-        return query.order_by(cls.created_at.desc()).all()
+        query = cls.query.options(joinedload(cls.category), joinedload(cls.accepted_csr)).filter_by(pin_id=pin_id)
+        query = cls._apply_text_search(query, q, cls.created_at.desc())
+        return query.all()
 
     @classmethod
     def paginate_for_pin(cls, pin_id, q=None, page=1, per_page=12):
-        query = cls.query.filter_by(pin_id=pin_id)
+        # the PIN table reads r.category.name and r.accepted_csr.* for every row
+        query = cls.query.options(joinedload(cls.category), joinedload(cls.accepted_csr)).filter_by(pin_id=pin_id)
         query = query.filter(cls.status != 'completed')
-        if q:
-            like = f"%{q}%"
-            query = query.filter((cls.title.like(like)) | (cls.description.like(like)))
-        pag = query.order_by(cls.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
-        return {
-            'items': pag.items,
-            'total': pag.total,
-            'page': pag.page,
-            'per_page': pag.per_page,
-            'pages': pag.pages,
-        }
+        query = cls._apply_text_search(query, q, cls.created_at.desc())
+        return paginate_query(query, page=page, per_page=per_page, count_key=('request.pin', pin_id, q),
+                              tables=('request.rows',))
+
+    EXPORT_COLUMNS = ('id', 'created_at', 'updated_at', 'status', 'category_id', 'category', 'pin_id',
+                      'pin_username', 'title', 'description', 'accepted_csr_id', 'accepted_at',
+                      'views_count', 'shortlist_count')
+
+    @classmethod
+    def iter_export(cls, category_id=None, start=None, end=None, status=None, batch_size=1000):
+        """Yield every matching request as a tuple in EXPORT_COLUMNS order, oldest first (server-side cursor)."""
+        pin = aliased(UserAccount)
+        req = request_source(start)
+        stmt = (select(req.id, req.created_at, req.updated_at, req.status, req.category_id, Category.name,
+                       req.pin_id, pin.username, req.title, req.description, req.accepted_csr_id, req.accepted_at,
+                       req.views_count, req.shortlist_count)
+                .select_from(req)
+                .outerjoin(Category, Category.id == req.category_id)
+                .outerjoin(pin, pin.id == req.pin_id))
+        if category_id:
+            stmt = stmt.where(req.category_id == category_id)
+        if status:
+            stmt = stmt.where(req.status == status)
+        if start:
+            stmt = stmt.where(req.created_at >= start)
+        if end:
+            stmt = stmt.where(req.created_at <= end)
+        stmt = stmt.order_by(req.created_at, req.id)
+        for row in db.session.execute(stmt, execution_options={'yield_per': batch_size}):
+            yield tuple(row)
 
     @classmethod
     def get_for_pin(cls, req_id, pin_id):
@@ -463,11 +648,125 @@ class Request(db.Model):
             return None
         return r
 
+    @classmethod
+    def _text_filter(cls, query, q):
+        """Restrict query to requests matching q without changing its order."""
+        if not q:
+            return query
+        hits = request_fts_hits(q)
+        if hits is None:
+            like = f"%{q}%"
+            return query.filter((cls.title.like(like)) | (cls.description.like(like)))
+        return query.filter(cls.id.in_(select(hits.c.rowid)))
+
+    @classmethod
+    def _apply_text_search(cls, query, q, *order_by):
+        """Filter query by free text q and apply ordering.
+
+        Matches go through the request_fts index and are ranked by bm25 ahead
+        of the given order_by columns. Input with no indexable words (e.g. only
+        punctuation) falls back to the old LIKE scan so results never vanish.
+
+        Unlike the LIKE '%q%' search this replaced, each word in q matches the
+        start of a word and all of them must appear: 'food bank' needs both
+        words, 'ood' no longer finds 'food'.
+        """
+        if not q:
+            return query.order_by(*order_by)
+        hits = request_fts_hits(q)
+        if hits is None:
+            like = f"%{q}%"
+            query = query.filter((cls.title.like(like)) | (cls.description.like(like)))
+            return query.order_by(*order_by)
+        query = query.join(hits, hits.c.rowid == cls.id)
+        return query.order_by(hits.c.rank, *order_by)
+
+
+# =========================
+# Full-text search: request_fts (FTS5 over request.title/description)
+# =========================
+# External-content FTS5 table: the index stores only tokens, the text stays in
+# `request`. Triggers keep it in sync for every write path (ORM or raw SQL);
+# the update trigger only fires when title/description change, so view and
+# shortlist counter bumps never touch the index.
+REQUEST_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS request_fts USING fts5(
+        title, description, content='request', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS request_fts_ai AFTER INSERT ON request BEGIN
+        INSERT INTO request_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS request_fts_ad AFTER DELETE ON request BEGIN
+        INSERT INTO request_fts(request_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS request_fts_au AFTER UPDATE OF title, description ON request BEGIN
+        INSERT INTO request_fts(request_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO request_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+)
+
+for _stmt in REQUEST_FTS_DDL:
+    event.listen(Request.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+event.listen(Request.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS request_fts').execute_if(dialect='sqlite'))
+
+_request_fts = sa_table('request_fts', sa_column('rowid', db.Integer))
+_FTS_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_match_expr(q):
+    """Turn user text into a safe FTS5 query: every word must match as a prefix.
+
+    Returns None when q holds no indexable words.
+    """
+    tokens = _FTS_TOKEN.findall(q or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{t}"*' for t in tokens)
+
+
+def request_fts_hits(q):
+    """Subquery of (rowid, rank) for requests matching q, or None if q has no words."""
+    expr = fts_match_expr(q)
+    if expr is None:
+        return None
+    fts_col = literal_column('request_fts')
+    return (
+        select(_request_fts.c.rowid.label('rowid'), func.bm25(fts_col).label('rank'))
+        .select_from(_request_fts)
+        .where(fts_col.op('MATCH')(expr))
+        .subquery('fts_hits')
+    )
+
+
+def ensure_request_fts(conn, rebuild=False):
+    """Create request_fts and its triggers on databases that predate them.
+
+    The index is rebuilt from `request` when it was just created or when
+    rebuild=True. Returns True if a rebuild ran.
+    """
+    existed = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='request_fts'"
+    )).first() is not None
+    for stmt in REQUEST_FTS_DDL:
+        conn.execute(text(stmt))
+    if rebuild or not existed:
+        conn.execute(text("INSERT INTO request_fts(request_fts) VALUES ('rebuild')"))
+        return True
+    return False
+
 
 # =========================
 # Entity: Shortlist
 # =========================
 class Shortlist(db.Model):
+    __table_args__ = (
+        # one row per (CSR, request); also the conflict target for atomic saves
+        db.Index('uq_shortlist_csr_request', 'csr_id', 'request_id', unique=True),
+        db.Index('ix_shortlist_csr_created', 'csr_id', 'created_at'),
+        db.Index('ix_shortlist_request_created', 'request_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     csr_id = db.Column(db.Integer, db.ForeignKey('user_accounts.id'))
     request_id = db.Column(db.Integer, db.ForeignKey('request.id'))
@@ -478,13 +777,30 @@ class Shortlist(db.Model):
 
     @classmethod
     def add_if_not_exists(cls, csr_id, request_id):
-        exists = cls.query.filter_by(csr_id=csr_id, request_id=request_id).first()
-        if not exists:
-            db.session.add(cls(csr_id=csr_id, request_id=request_id))
-            r = Request.query.get(request_id)
-            if r:
-                r.shortlist_count = (r.shortlist_count or 0) + 1
+        """Save a request to the CSR's shortlist; returns True if it was not saved yet.
+
+        INSERT ... ON CONFLICT DO NOTHING against the (csr_id, request_id) unique
+        index decides atomically, and the counter moves by changes() in SQL, so
+        concurrent clicks can neither duplicate the row nor drift the count.
+        """
+        ins = (
+            sqlite_insert(cls.__table__)
+            .values(csr_id=csr_id, request_id=request_id, created_at=datetime.now(timezone.utc))
+            .on_conflict_do_nothing(index_elements=['csr_id', 'request_id'])
+        )
+        try:
+            added = db.session.execute(ins).rowcount > 0
+            if added:
+                db.session.execute(
+                    update(Request)
+                    .where(Request.id == request_id)
+                    .values(shortlist_count=func.coalesce(Request.shortlist_count, 0) + func.changes())
+                )
             db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return added
 
     @classmethod
     def exists(cls, csr_id, request_id):
@@ -492,36 +808,112 @@ class Shortlist(db.Model):
 
     @classmethod
     def for_csr(cls, csr_id):
-        return cls.query.filter_by(csr_id=csr_id).order_by(cls.created_at.desc()).all()
+        # the shortlist table reads s.request.title/shortlist_count for every row
+        return cls.query.options(joinedload(cls.request)).filter_by(csr_id=csr_id).order_by(cls.created_at.desc()).all()
+
+    @classmethod
+    def recent_for_csr(cls, csr_id, limit=5):
+        """The CSR's most recently saved items (newest first), at most `limit` rows."""
+        return (cls.query.options(joinedload(cls.request)).filter_by(csr_id=csr_id)
+                .order_by(cls.created_at.desc()).limit(limit).all())
+
+    @classmethod
+    def saved_request_ids(cls, csr_id, request_ids):
+        """Subset of request_ids the CSR has shortlisted, in one IN query on the unique index."""
+        request_ids = list(request_ids)
+        if not csr_id or not request_ids:
+            return set()
+        stmt = select(cls.request_id).where(cls.csr_id == csr_id, cls.request_id.in_(request_ids))
+        return set(db.session.execute(stmt).scalars())
 
     @classmethod
     def search_for_csr(cls, csr_id, q=None, category_id=None):
         """Search shortlist items for a CSR, optionally filtering by text q and category_id."""
-        query = cls.query.filter_by(csr_id=csr_id).join(Request)
+        query = cls.query.filter_by(csr_id=csr_id).join(Request).options(contains_eager(cls.request))
         if category_id:
             query = query.filter(Request.category_id == category_id)
-        if q:
-            like = f"%{q}%"
-            query = query.filter((Request.title.like(like)) | (Request.description.like(like)))
-        return query.order_by(cls.created_at.desc()).all()
+        query = Request._apply_text_search(query, q, cls.created_at.desc())
+        return query.all()
 
     @classmethod
     def remove_if_exists(cls, csr_id, request_id):
-        rec = cls.query.filter_by(csr_id=csr_id, request_id=request_id).first()
-        if rec:
-            r = Request.query.get(request_id)
-            if r and (r.shortlist_count or 0) > 0:
-                r.shortlist_count = (r.shortlist_count or 0) - 1
-            db.session.delete(rec)
+        """Mirror of add_if_not_exists: one DELETE, counter moves by changes() in SQL."""
+        delete_stmt = cls.__table__.delete().where(cls.csr_id == csr_id, cls.request_id == request_id)
+        try:
+            removed = db.session.execute(delete_stmt).rowcount > 0
+            if removed:
+                db.session.execute(
+                    update(Request)
+                    .where(Request.id == request_id)
+                    .values(shortlist_count=func.max(func.coalesce(Request.shortlist_count, 0) - func.changes(), 0))
+                )
             db.session.commit()
-            return True
-        return False
+        except Exception:
+            db.session.rollback()
+            raise
+        return removed
+
+
+# =========================
+# Entity: RequestSeen (per-CSR viewed-requests bitmap)
+# =========================
+SEEN_WORD_BITS = 64
+
+
+class RequestSeen(db.Model):
+    """Which requests a CSR has opened, as a bitmap: bit (id % 64) of word (id // 64).
+
+    One row covers 64 consecutive request ids, so a CSR who opened thousands
+    of requests costs a few dozen rows instead of a growing list in the
+    session cookie. Bits are only ever set.
+    """
+    __tablename__ = 'request_seen'
+
+    csr_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    word = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    bits = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def locate(req_id):
+        """(word, mask) for a request id; the mask is a signed 64-bit integer, as SQLite stores it."""
+        word, bit = divmod(req_id, SEEN_WORD_BITS)
+        mask = 1 << bit
+        return word, mask - (1 << 64) if bit == 63 else mask
+
+    @classmethod
+    def mark(cls, csr_id, req_id):
+        """Set the bit; returns True if it was not set yet (the CSR's first view).
+
+        One UPSERT decides atomically: the update only runs while the bit is
+        clear, so of two concurrent first views exactly one sees a changed row.
+        It runs in the caller's session and transaction; the caller commits.
+        """
+        word, mask = cls.locate(req_id)
+        ins = sqlite_insert(cls.__table__).values(csr_id=csr_id, word=word, bits=mask)
+        ins = ins.on_conflict_do_update(
+            index_elements=['csr_id', 'word'],
+            set_={'bits': cls.bits.op('|')(ins.excluded.bits)},
+            where=cls.bits.op('&')(ins.excluded.bits) == 0,
+        )
+        return db.session.execute(ins).rowcount > 0
+
+    @classmethod
+    def words(cls, csr_id):
+        """{word: bits} for everything the CSR has seen."""
+        return dict(db.session.execute(select(cls.word, cls.bits).where(cls.csr_id == csr_id)).all())
 
 
 # =========================
 # Entity: ServiceHistory
 # =========================
 class ServiceHistory(db.Model):
+    __table_args__ = (
+        db.Index('ix_service_history_csr_completed', 'csr_id', 'date_completed'),
+        db.Index('ix_service_history_pin_completed', 'pin_id', 'date_completed'),
+        db.Index('ix_service_history_completed', 'date_completed'),
+        db.Index('ix_service_history_request', 'request_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     csr_id = db.Column(db.Integer, db.ForeignKey('user_accounts.id'))
     pin_id = db.Column(db.Integer, db.ForeignKey('user_accounts.id'))
@@ -534,114 +926,776 @@ class ServiceHistory(db.Model):
     request = db.relationship('Request')
     category = db.relationship('Category')
 
-    @classmethod
-    def filter_history(cls, category_id=None, start=None, end=None):
-        q = cls.query
+    @staticmethod
+    def _with_request(qry, hist, req):
+        """Load h.request from req: the request table, or hot + archived requests together.
+
+        The union is read with a second SELECT ... WHERE id IN (page ids):
+        SQLite pushes that filter into both halves, whereas a join against
+        the union subquery would scan it for every history row.
+        """
+        if req is Request:
+            return qry.options(joinedload(hist.request))
+        return qry.options(selectinload(hist.request.of_type(req)))
+
+    @staticmethod
+    def _date_range(qry, hist, category_id=None, start=None, end=None):
         if category_id:
-            q = q.filter_by(category_id=category_id)
+            qry = qry.filter(hist.category_id == category_id)
         if start:
-            q = q.filter(cls.date_completed >= start)
+            qry = qry.filter(hist.date_completed >= start)
         if end:
-            q = q.filter(cls.date_completed <= end)
-        return q.order_by(cls.date_completed.desc()).all()
+            qry = qry.filter(hist.date_completed <= end)
+        return qry
 
     @classmethod
-    def filter_for_pin(cls, pin_id, category_id=None, start=None, end=None, q=None):
-        qry = cls.query.filter_by(pin_id=pin_id)
-        if category_id:
-            qry = qry.filter_by(category_id=category_id)
-        if start:
-            qry = qry.filter(cls.date_completed >= start)
-        if end:
-            qry = qry.filter(cls.date_completed <= end)
-        if q:
+    def filter_history(cls, category_id=None, start=None, end=None):
+        hist, req = history_source(start)
+        q = cls._with_request(db.session.query(hist), hist, req)
+        q = q.options(joinedload(hist.category), joinedload(hist.csr))
+        q = cls._date_range(q, hist, category_id, start, end)
+        return q.order_by(hist.date_completed.desc()).all()
+
+    @classmethod
+    def _pin_history_query(cls, pin_id, category_id=None, start=None, end=None, q=None):
+        """(query, history entity): the PIN history table reads h.request, h.category and h.csr.* for every row"""
+        hist, req = history_source(start)
+        qry = cls._date_range(db.session.query(hist).filter(hist.pin_id == pin_id), hist, category_id, start, end)
+        hits = history_fts_hits(q) if q else None
+        if q and hits is None:
+            # no indexable words: substring match over explicitly joined rows
             like = f"%{q}%"
-            qry = qry.join(cls.request, isouter=True).join(cls.category, isouter=True)
-            qry = qry.filter(or_(
-                UserAccount.username.like(like),
-                Request.title.like(like),
-                Category.name.like(like),
-            ))
-        return qry.order_by(cls.date_completed.desc()).all()
+            csr = aliased(UserAccount)
+            qry = (qry.outerjoin(hist.category).outerjoin(hist.csr.of_type(csr))
+                   .options(contains_eager(hist.category), contains_eager(hist.csr.of_type(csr))))
+            titles = hist.request_id.in_(select(req.id).where(req.title.like(like)))
+            qry = qry.filter(or_(csr.username.like(like), titles, Category.name.like(like)))
+            return cls._with_request(qry, hist, req), hist
+        if hits is not None:
+            qry = qry.filter(hist.id.in_(select(hits.c.rowid)))
+        return cls._with_request(qry, hist, req).options(joinedload(hist.category), joinedload(hist.csr)), hist
+
+    @classmethod
+    def filter_for_pin(cls, pin_id, category_id=None, start=None, end=None, q=None, cursor=None, limit=None):
+        """PIN history, newest first.
+
+        limit caps the rows returned. cursor is a token from cursor_after(row):
+        rows continue after that row by seeking on (date_completed, id), so a
+        later page costs the same as the first.
+        """
+        qry, hist = cls._pin_history_query(pin_id, category_id=category_id, start=start, end=end, q=q)
+        pos = decode_cursor(cursor)
+        if pos and pos[0] == 'next':
+            try:
+                key = (datetime.fromisoformat(pos[1][0]), int(pos[1][1]))
+            except (IndexError, TypeError, ValueError):
+                key = None
+            if key is not None:
+                qry = qry.filter(tuple_(hist.date_completed, hist.id) < tuple_(*key))
+        qry = qry.order_by(hist.date_completed.desc(), hist.id.desc())
+        if limit:
+            qry = qry.limit(limit)
+        return qry.all()
+
+    @staticmethod
+    def cursor_after(row):
+        """Token for filter_for_pin(cursor=...) that continues after row."""
+        return encode_cursor('next', row.date_completed, row.id)
+
+    @classmethod
+    def paginate_for_pin(cls, pin_id, category_id=None, start=None, end=None, q=None, page=1, per_page=12):
+        qry, hist = cls._pin_history_query(pin_id, category_id=category_id, start=start, end=end, q=q)
+        # a text search also matches request titles, category names and CSR names
+        tables = ('service_history', 'request', 'category', 'user_accounts') if q else ('service_history',)
+        return paginate_query(qry.order_by(hist.date_completed.desc(), hist.id.desc()), page=page, per_page=per_page,
+                              count_key=('service_history.pin', pin_id, category_id, start, end, q), tables=tables)
+
+    @classmethod
+    def _csr_history_query(cls, csr_id, category_id=None, start=None, end=None):
+        # the CSR history table reads h.request.title and h.category.name for every row
+        hist, req = history_source(start)
+        q = cls._with_request(db.session.query(hist), hist, req).options(joinedload(hist.category))
+        return cls._date_range(q.filter(hist.csr_id == csr_id), hist, category_id, start, end), hist
 
     @classmethod
     def filter_for_csr(cls, csr_id, category_id=None, start=None, end=None):
-        q = cls.query.filter_by(csr_id=csr_id)
-        if category_id:
-            q = q.filter_by(category_id=category_id)
-        if start:
-            q = q.filter(cls.date_completed >= start)
-        if end:
-            q = q.filter(cls.date_completed <= end)
-        return q.order_by(cls.date_completed.desc()).all()
+        q, hist = cls._csr_history_query(csr_id, category_id, start, end)
+        return q.order_by(hist.date_completed.desc()).all()
+
+    @classmethod
+    def recent_for_csr(cls, csr_id, limit=5):
+        """The CSR's latest completed services (newest first), at most `limit` rows.
+
+        Read from the hot table; the archive is consulted only when that has
+        fewer than `limit` rows for the CSR.
+        """
+        rows = (cls.query.options(joinedload(cls.request), joinedload(cls.category)).filter_by(csr_id=csr_id)
+                .order_by(cls.date_completed.desc()).limit(limit).all())
+        if len(rows) < limit:
+            q, hist = cls._csr_history_query(csr_id)
+            if hist is not cls:
+                rows = q.order_by(hist.date_completed.desc()).limit(limit).all()
+        return rows
 
     @classmethod
     def paginate_for_csr(cls, csr_id, category_id=None, start=None, end=None, page=1, per_page=12):
-        q = cls.query.filter_by(csr_id=csr_id)
+        q, hist = cls._csr_history_query(csr_id, category_id, start, end)
+        return paginate_query(q.order_by(hist.date_completed.desc()), page=page, per_page=per_page,
+                              count_key=('service_history.csr', csr_id, category_id, start, end),
+                              tables=('service_history',))
+
+    # ------- Export -------
+    EXPORT_COLUMNS = ('id', 'date_completed', 'category_id', 'category', 'request_id', 'request_title',
+                      'csr_id', 'csr_username', 'pin_id', 'pin_username')
+
+    @classmethod
+    def iter_export(cls, category_id=None, start=None, end=None, batch_size=1000):
+        """Yield every matching row as a tuple in EXPORT_COLUMNS order, oldest first.
+
+        One flat SELECT read through a server-side cursor (yield_per), so memory
+        stays at one batch however many rows match and nothing is built as ORM
+        objects.
+        """
+        csr, pin, archived = aliased(UserAccount), aliased(UserAccount), request_archive
+        hist, _ = history_source(start)
+        # the request is in the hot table or, for archived history, usually in the archive
+        stmt = (select(hist.id, hist.date_completed, hist.category_id, Category.name, hist.request_id,
+                       func.coalesce(Request.title, archived.c.title),
+                       hist.csr_id, csr.username, hist.pin_id, pin.username)
+                .select_from(hist)
+                .outerjoin(Category, Category.id == hist.category_id)
+                .outerjoin(Request, Request.id == hist.request_id)
+                .outerjoin(archived, archived.c.id == hist.request_id)
+                .outerjoin(csr, csr.id == hist.csr_id)
+                .outerjoin(pin, pin.id == hist.pin_id))
         if category_id:
-            q = q.filter_by(category_id=category_id)
+            stmt = stmt.where(hist.category_id == category_id)
         if start:
-            q = q.filter(cls.date_completed >= start)
+            stmt = stmt.where(hist.date_completed >= start)
         if end:
-            q = q.filter(cls.date_completed <= end)
-        pag = q.order_by(cls.date_completed.desc()).paginate(page=page, per_page=per_page, error_out=False)
-        return {
-            'items': pag.items,
-            'total': pag.total,
-            'page': pag.page,
-            'per_page': pag.per_page,
-            'pages': pag.pages,
-        }
+            stmt = stmt.where(hist.date_completed <= end)
+        stmt = stmt.order_by(hist.date_completed, hist.id)
+        for row in db.session.execute(stmt, execution_options={'yield_per': batch_size}):
+            yield tuple(row)
 
     # ------- Reports -------
     @staticmethod
-    def generate_report(scope='daily', page: int = 1, per_page: int = 20, order: str = 'asc'):
-        """Return paginated buckets for requests-created and services-completed."""
-        if scope == 'weekly':
-            fmt = '%Y-W%W'
-        elif scope == 'monthly':
-            fmt = '%Y-%m'
-        else:
-            fmt = '%Y-%m-%d'
-
-        # Aggregate
-        reqs = (
-            db.session.query(func.strftime(fmt, Request.created_at), func.count(Request.id))
-            .group_by(func.strftime(fmt, Request.created_at))
-            .order_by(func.strftime(fmt, Request.created_at).desc() if order == 'desc'
-                      else func.strftime(fmt, Request.created_at))
-            .all()
-        )
-        done = (
-            db.session.query(func.strftime(fmt, ServiceHistory.date_completed), func.count(ServiceHistory.id))
-            .group_by(func.strftime(fmt, ServiceHistory.date_completed))
-            .order_by(func.strftime(fmt, ServiceHistory.date_completed).desc() if order == 'desc'
-                      else func.strftime(fmt, ServiceHistory.date_completed))
-            .all()
-        )
-
-        # Unified pagination window (same page applied to both tables)
-        total_buckets = max(len(reqs), len(done))
+    def generate_report(scope='daily', page: int = 1, per_page: int = 20, order: str = 'asc', category_id=None):
+        """Return one page of calendar buckets with requests-created and services-completed counts.
+
+        Reads report_daily_rollup rather than the raw tables. The bucket axis
+        is a recursive-CTE calendar, so both series share the same buckets and
+        empty ones show as 0. The page's first bucket is computed up front and
+        the CTE is seeded there and stops after per_page buckets, so a page
+        costs the same wherever it falls in the range; it is LEFT JOINed to
+        the rollup and reads only its own days. Grand totals come from one
+        aggregate. category_id narrows the report to one category.
+        """
+        if scope not in REPORT_AXIS:
+            scope = 'daily'
+        fmt, _, step = REPORT_AXIS[scope]
+        cat = category_id or 0
+
+        total_created, total_completed, created_buckets, completed_buckets, lo, hi = db.session.execute(text(
+            f"SELECT coalesce(sum(requests_created), 0), coalesce(sum(services_completed), 0), "
+            f"count(DISTINCT CASE WHEN requests_created > 0 THEN strftime('{fmt}', day) END), "
+            f"count(DISTINCT CASE WHEN services_completed > 0 THEN strftime('{fmt}', day) END), "
+            f"min(day), max(day) "
+            f"FROM report_daily_rollup "
+            f"WHERE category_id = :cat AND (requests_created <> 0 OR services_completed <> 0)"
+        ), {'cat': cat}).one()
+
+        total_buckets = _report_bucket_count(scope, lo, hi)
         pages = max(1, (total_buckets + per_page - 1) // per_page)
         page = max(1, min(page, pages))
-        start, end = (page - 1) * per_page, (page - 1) * per_page + per_page
+        offset = (page - 1) * per_page
+
+        rows = []
+        if total_buckets:
+            # the window as ascending bucket indexes [index, index + limit) counted from lo's bucket
+            if order == 'desc':
+                index = max(0, total_buckets - offset - per_page)
+                limit, direction = total_buckets - offset - index, 'DESC'
+            else:
+                index = offset
+                limit, direction = min(per_page, total_buckets - offset), 'ASC'
+            rows = [tuple(r) for r in db.session.execute(text(
+                f"WITH RECURSIVE window(n, start, stop) AS ("
+                f"  SELECT 1, :start, {step.format(d=':start')} "
+                f"  UNION ALL "
+                f"  SELECT n + 1, stop, {step.format(d='stop')} FROM window WHERE n < :limit"
+                f") "
+                f"SELECT strftime('{fmt}', w.start) AS bucket, "
+                f"       coalesce(sum(r.requests_created), 0), coalesce(sum(r.services_completed), 0) "
+                f"FROM window w "
+                f"LEFT JOIN report_daily_rollup r ON r.category_id = :cat AND r.day >= w.start AND r.day < w.stop "
+                f"GROUP BY w.start ORDER BY w.start {direction}"
+            ), {'start': _report_bucket_start(scope, lo, index), 'cat': cat, 'limit': limit})]
 
         return {
-            "requests": reqs[start:end],
-            "completed": done[start:end],
+            "rows": rows,
+            "requests": [(b, created) for b, created, _ in rows],
+            "completed": [(b, completed) for b, _, completed in rows],
             "total": total_buckets,
             "pages": pages,
             "page": page,
             "per_page": per_page,
             # totals across all buckets (records)
-            "total_requests": sum(c for _, c in reqs),
-            "total_completed": sum(c for _, c in done),
+            "total_requests": total_created,
+            "total_completed": total_completed,
             # NEW: bucket counts for the selected scope
-            "bucket_count_requests": len(reqs),
-            "bucket_count_completed": len(done),
+            "bucket_count_requests": created_buckets,
+            "bucket_count_completed": completed_buckets,
             }
 
 
+# Report calendar axis per scope: (bucket label format, bucket start holding day {d},
+# start of the bucket after the one starting at {d}). Weekly buckets follow
+# strftime('%W'): they start on Mondays and on 1 January, so a week that
+# spans New Year is two buckets, as in a GROUP BY over the raw rows.
+REPORT_AXIS = {
+    'daily': ('%Y-%m-%d', "date({d})", "date({d}, '+1 day')"),
+    'weekly': ('%Y-W%W', "max(date({d}, '-6 days', 'weekday 1'), date({d}, 'start of year'))",
+               "min(date({d}, '+1 day', 'weekday 1'), date({d}, 'start of year', '+1 year'))"),
+    'monthly': ('%Y-%m', "date({d}, 'start of month')", "date({d}, 'start of month', '+1 month')"),
+}
+
+
+def _report_bucket_count(scope, lo, hi):
+    """Number of REPORT_AXIS buckets from the one holding day lo to the one holding day hi."""
+    if lo is None:
+        return 0
+    lo, hi = date.fromisoformat(lo), date.fromisoformat(hi)
+    if scope == 'monthly':
+        return (hi.year - lo.year) * 12 + hi.month - lo.month + 1
+    if scope == 'weekly':
+        # Mondays in (lo, hi] (ordinal 1 is a Monday) plus the New Years in between that are not
+        mondays = (hi.toordinal() - 1) // 7 - (lo.toordinal() - 1) // 7
+        new_years = sum(1 for y in range(lo.year + 1, hi.year + 1) if date(y, 1, 1).weekday() != 0)
+        return 1 + mondays + new_years
+    return (hi - lo).days + 1
+
+
+def _report_bucket_start(scope, lo, index):
+    """ISO start day of the REPORT_AXIS bucket index places after the one holding day lo."""
+    lo = date.fromisoformat(lo)
+    if scope == 'monthly':
+        months = lo.year * 12 + lo.month - 1 + index
+        return date(months // 12, months % 12 + 1, 1).isoformat()
+    if scope == 'weekly':
+        # count from the start of lo's year, then skip whole years; a year's
+        # buckets are 1 January plus every later Monday
+        def first_monday(year):
+            new_year = date(year, 1, 1)
+            return new_year + timedelta(days=7 - new_year.weekday())
+
+        def buckets(year):
+            return 1 + (date(year, 12, 31) - first_monday(year)).days // 7 + 1
+
+        year = lo.year
+        if lo >= first_monday(year):
+            index += 1 + (lo - first_monday(year)).days // 7
+        while index >= buckets(year):
+            index -= buckets(year)
+            year += 1
+        start = date(year, 1, 1) if index == 0 else first_monday(year) + timedelta(weeks=index - 1)
+        return start.isoformat()
+    return (lo + timedelta(days=index)).isoformat()
+
+
+# =========================
+# Full-text search: service_history_fts (request title, category name, CSR name)
+# =========================
+# A regular FTS5 table keyed by service_history.id: its text comes from three
+# other tables, so it stores its own copy. Triggers on service_history insert
+# or relink rows, and renames of a request title, category or CSR account
+# rewrite the rows that show them.
+_HISTORY_FTS_ROW = """
+    (SELECT title FROM request WHERE id = {sh}.request_id),
+    (SELECT name FROM category WHERE id = {sh}.category_id),
+    (SELECT trim(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || username)
+       FROM user_accounts WHERE id = {sh}.csr_id)
+"""
+_HISTORY_FTS_INSERT = (
+    "INSERT INTO service_history_fts(rowid, request_title, category_name, csr_name) "
+    "VALUES (new.id, " + _HISTORY_FTS_ROW.format(sh='new') + ");"
+)
+
+HISTORY_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS service_history_fts USING fts5(
+        request_title, category_name, csr_name,
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS service_history_fts_ai AFTER INSERT ON service_history BEGIN
+        {_HISTORY_FTS_INSERT}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS service_history_fts_ad AFTER DELETE ON service_history BEGIN
+        DELETE FROM service_history_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS service_history_fts_au
+        AFTER UPDATE OF request_id, category_id, csr_id ON service_history BEGIN
+        DELETE FROM service_history_fts WHERE rowid = old.id;
+        {_HISTORY_FTS_INSERT}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS service_history_fts_request_au AFTER UPDATE OF title ON request BEGIN
+        UPDATE service_history_fts SET request_title = new.title
+         WHERE rowid IN (SELECT id FROM service_history WHERE request_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS service_history_fts_category_au AFTER UPDATE OF name ON category BEGIN
+        UPDATE service_history_fts SET category_name = new.name
+         WHERE rowid IN (SELECT id FROM service_history WHERE category_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS service_history_fts_csr_au
+        AFTER UPDATE OF username, first_name, last_name ON user_accounts BEGIN
+        UPDATE service_history_fts
+           SET csr_name = trim(coalesce(new.first_name, '') || ' ' || coalesce(new.last_name, '') || ' ' || new.username)
+         WHERE rowid IN (SELECT id FROM service_history WHERE csr_id = new.id);
+    END""",
+)
+
+# service_history is created after request, category and user_accounts (it references all three)
+for _stmt in HISTORY_FTS_DDL:
+    event.listen(ServiceHistory.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+event.listen(ServiceHistory.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS service_history_fts').execute_if(dialect='sqlite'))
+
+_history_fts = sa_table('service_history_fts', sa_column('rowid', db.Integer))
+
+
+def history_fts_hits(q):
+    """Subquery of rowid (= service_history.id) for history rows matching q, or None if q has no words."""
+    expr = fts_match_expr(q)
+    if expr is None:
+        return None
+    return (
+        select(_history_fts.c.rowid.label('rowid'))
+        .select_from(_history_fts)
+        .where(literal_column('service_history_fts').op('MATCH')(expr))
+        .subquery('history_hits')
+    )
+
+
+def ensure_history_fts(conn, rebuild=False):
+    """Create service_history_fts and its triggers on databases that predate them.
+
+    The index is refilled from service_history when it was just created or
+    when rebuild=True. Returns True if a rebuild ran.
+    """
+    existed = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='service_history_fts'"
+    )).first() is not None
+    for stmt in HISTORY_FTS_DDL:
+        conn.execute(text(stmt))
+    if rebuild or not existed:
+        conn.execute(text("DELETE FROM service_history_fts"))
+        conn.execute(text(
+            "INSERT INTO service_history_fts(rowid, request_title, category_name, csr_name) "
+            "SELECT sh.id, " + _HISTORY_FTS_ROW.format(sh='sh') + " FROM service_history sh"
+        ))
+        if has_archive(conn):
+            # archived history keeps its search rows; its request may be archived too
+            conn.execute(text(
+                "INSERT INTO service_history_fts(rowid, request_title, category_name, csr_name) "
+                "SELECT sh.id, " + _HISTORY_FTS_ROW.format(sh='sh').replace(
+                    "(SELECT title FROM request WHERE id = sh.request_id)",
+                    "coalesce((SELECT title FROM request WHERE id = sh.request_id),"
+                    " (SELECT title FROM request_archive WHERE id = sh.request_id))")
+                + " FROM service_history_archive sh"
+            ))
+        return True
+    return False
+
+
+# =========================
+# Entity: ReportDailyRollup
+# =========================
+class ReportDailyRollup(db.Model):
+    """Per-day counts behind the Platform Manager reports.
+
+    One row per (category_id, day); category_id 0 holds the all-categories
+    total. Rows are maintained by triggers on `request` and `service_history`
+    (see REPORT_ROLLUP_DDL) and can be rebuilt with rebuild_report_rollups().
+    """
+    __tablename__ = 'report_daily_rollup'
+
+    category_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 0 = all categories
+    day = db.Column(db.String(10), primary_key=True)  # YYYY-MM-DD
+    requests_created = db.Column(db.Integer, nullable=False, default=0)
+    services_completed = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _rollup_bump(counter, day, category, delta):
+    """Trigger statement adding delta to counter for (category, day); skipped when either is NULL."""
+    return (
+        f"INSERT INTO report_daily_rollup (category_id, day, requests_created, services_completed) "
+        f"SELECT {category}, {day}, {delta if counter == 'requests_created' else 0}, "
+        f"{delta if counter == 'services_completed' else 0} "
+        f"WHERE {day} IS NOT NULL AND {category} IS NOT NULL "
+        f"ON CONFLICT(category_id, day) DO UPDATE SET {counter} = {counter} + ({delta});"
+    )
+
+
+def _rollup_triggers(prefix, source, stamp, counter):
+    new_day, old_day = f"date(new.{stamp})", f"date(old.{stamp})"
+    add_new = _rollup_bump(counter, new_day, '0', 1) + _rollup_bump(counter, new_day, 'new.category_id', 1)
+    sub_old = _rollup_bump(counter, old_day, '0', -1) + _rollup_bump(counter, old_day, 'old.category_id', -1)
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_ai AFTER INSERT ON {source} BEGIN {add_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_ad AFTER DELETE ON {source} BEGIN {sub_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {prefix}_au AFTER UPDATE OF {stamp}, category_id ON {source} "
+        f"WHEN {old_day} IS NOT {new_day} OR old.category_id IS NOT new.category_id "
+        f"BEGIN {sub_old} {add_new} END",
+    )
+
+
+REPORT_ROLLUP_DDL = {
+    'request': _rollup_triggers('report_rollup_request', 'request', 'created_at', 'requests_created'),
+    'service_history': _rollup_triggers('report_rollup_service', 'service_history', 'date_completed', 'services_completed'),
+}
+
+for _stmt in REPORT_ROLLUP_DDL['request']:
+    event.listen(Request.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+for _stmt in REPORT_ROLLUP_DDL['service_history']:
+    event.listen(ServiceHistory.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+
+# {request} / {history} name the tables (or UNION ALL subqueries) to count
+REPORT_ROLLUP_BACKFILL = """
+    INSERT INTO report_daily_rollup (category_id, day, requests_created, services_completed)
+    SELECT category_id, day, SUM(created), SUM(completed) FROM (
+        SELECT 0 AS category_id, date(created_at) AS day, COUNT(*) AS created, 0 AS completed
+          FROM {request} WHERE created_at IS NOT NULL GROUP BY day
+        UNION ALL
+        SELECT category_id, date(created_at), COUNT(*), 0
+          FROM {request} WHERE created_at IS NOT NULL AND category_id IS NOT NULL GROUP BY category_id, date(created_at)
+        UNION ALL
+        SELECT 0, date(date_completed), 0, COUNT(*)
+          FROM {history} WHERE date_completed IS NOT NULL GROUP BY date(date_completed)
+        UNION ALL
+        SELECT category_id, date(date_completed), 0, COUNT(*)
+          FROM {history} WHERE date_completed IS NOT NULL AND category_id IS NOT NULL
+          GROUP BY category_id, date(date_completed)
+    ) WHERE day IS NOT NULL
+    GROUP BY category_id, day
+"""
+
+
+def rebuild_report_rollups(conn):
+    """Recompute report_daily_rollup from `request` and `service_history` (and their archives). Returns the row count."""
+    conn.execute(text("DELETE FROM report_daily_rollup"))
+    sources = {'request': 'request', 'history': 'service_history'}
+    if has_archive(conn):
+        sources = {
+            'request': '(SELECT created_at, category_id FROM request '
+                       'UNION ALL SELECT created_at, category_id FROM request_archive)',
+            'history': '(SELECT date_completed, category_id FROM service_history '
+                       'UNION ALL SELECT date_completed, category_id FROM service_history_archive)',
+        }
+    conn.execute(text(REPORT_ROLLUP_BACKFILL.format(**sources)))
+    return conn.execute(text("SELECT COUNT(*) FROM report_daily_rollup")).scalar()
+
+
+def ensure_report_rollups(conn, rebuild=False):
+    """Install the rollup triggers on databases that predate them and backfill an empty rollup.
+
+    Returns True if a rebuild ran.
+    """
+    for stmts in REPORT_ROLLUP_DDL.values():
+        for stmt in stmts:
+            conn.execute(text(stmt))
+    empty = conn.execute(text("SELECT 1 FROM report_daily_rollup LIMIT 1")).first() is None
+    if rebuild or empty:
+        rebuild_report_rollups(conn)
+        return True
+    return False
+
+
+# =========================
+# Entity: TableVersion (data-version counters)
+# =========================
+# tables whose changes page validators (ETags) depend on
+VERSIONED_TABLES = ('category', 'request', 'shortlist', 'service_history', 'report_daily_rollup',
+                    'user_accounts', 'user_profiles')
+
+
+class TableVersion(db.Model):
+    """A change counter per table, bumped by triggers on every row written.
+
+    The bump happens inside the writing transaction, so a new version becomes
+    visible exactly when the change commits. Pages derive their validators
+    from the versions of the tables they read (see app.boundary.conditional).
+    """
+    __tablename__ = 'table_version'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    changed_at = db.Column(db.DateTime)  # UTC, second resolution
+
+    @classmethod
+    def current(cls, tables):
+        """{table: (version, changed_at)} for the given tables in one query; unseen tables are (0, None)."""
+        rows = db.session.execute(
+            select(cls.table_name, cls.version, cls.changed_at).where(cls.table_name.in_(tables))
+        ).all()
+        found = {name: (version, changed_at) for name, version, changed_at in rows}
+        return {t: found.get(t, (0, None)) for t in tables}
+
+
+def _version_bump(table):
+    return (
+        f"INSERT INTO table_version (table_name, version, changed_at) VALUES ('{table}', 1, CURRENT_TIMESTAMP) "
+        f"ON CONFLICT(table_name) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;"
+    )
+
+
+# Row-set stamps: a second counter per table that only moves when a write can
+# change which rows a listing filter selects. Cached listing totals key on it,
+# so counter columns (views_count flushes, shortlist_count) keep the totals
+# valid while the table's own version still refreshes the page ETags.
+ROW_STAMPS = {
+    'request': ('request.rows', ('status', 'category_id', 'pin_id', 'title', 'description')),
+}
+
+
+def _version_triggers(table):
+    stamp, columns = ROW_STAMPS.get(table, (None, ()))
+    rows = _version_bump(stamp) if stamp else ''
+    stmts = (
+        f"CREATE TRIGGER IF NOT EXISTS table_version_{table}_ai AFTER INSERT ON {table} BEGIN {_version_bump(table)} {rows} END",
+        f"CREATE TRIGGER IF NOT EXISTS table_version_{table}_au AFTER UPDATE ON {table} BEGIN {_version_bump(table)} END",
+        f"CREATE TRIGGER IF NOT EXISTS table_version_{table}_ad AFTER DELETE ON {table} BEGIN {_version_bump(table)} {rows} END",
+    )
+    if stamp:
+        stmts += (f"CREATE TRIGGER IF NOT EXISTS table_version_{table}_rows_au "
+                  f"AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN {rows} END",)
+    return stmts
+
+
+TABLE_VERSION_DDL = {t: _version_triggers(t) for t in VERSIONED_TABLES}
+
+for _name, _stmts in TABLE_VERSION_DDL.items():
+    for _stmt in _stmts:
+        event.listen(db.metadata.tables[_name], 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+
+
+def bump_table_versions(conn, tables=VERSIONED_TABLES):
+    """Bump versions by hand, e.g. after writing with the triggers dropped (row stamps included)."""
+    for t in tables:
+        conn.execute(text(_version_bump(t)))
+        if t in ROW_STAMPS:
+            conn.execute(text(_version_bump(ROW_STAMPS[t][0])))
+
+
+def ensure_table_versions(conn, replace=()):
+    """Create table_version and its triggers on databases that predate them.
+
+    Triggers of the tables in `replace` are dropped and recreated first, for
+    when their definition changed.
+    """
+    TableVersion.__table__.create(bind=conn, checkfirst=True)
+    for t in replace:
+        for suffix in ('ai', 'au', 'ad', 'rows_au'):
+            conn.execute(text(f'DROP TRIGGER IF EXISTS table_version_{t}_{suffix}'))
+    for stmts in TABLE_VERSION_DDL.values():
+        for stmt in stmts:
+            conn.execute(text(stmt))
+
+
+# =========================
+# Entity: Job (persisted background work, see app.entity.jobs)
+# =========================
+class Job(db.Model):
+    """A unit of background work. The row is the queue: workers claim queued
+    rows atomically, renew a lease while running and store the outcome."""
+    __tablename__ = 'job'
+    __table_args__ = (
+        db.Index('ix_job_status_id', 'status', 'id'),
+    )
+
+    STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+    FINISHED = ('succeeded', 'failed', 'cancelled')
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(12), nullable=False, default='queued')
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('user_accounts.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED
+
+    def params_dict(self):
+        return json.loads(self.params or '{}')
+
+    def result_value(self):
+        return json.loads(self.result) if self.result else None
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'kind': self.kind, 'status': self.status, 'progress': self.progress,
+            'attempts': self.attempts, 'error': self.error, 'params': self.params_dict(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    @classmethod
+    def get_by_id(cls, job_id):
+        return db.session.get(cls, job_id)
+
+    @classmethod
+    def recent(cls, limit=20):
+        return cls.query.order_by(cls.id.desc()).limit(limit).all()
+
+
+# =========================
+# Archive: old service history and completed requests
+# =========================
+# Rows past the archive horizon move (same ids, same columns) into trigger-free
+# copies of their tables, keeping the hot tables and their indexes small. Reads
+# whose date range reaches the archive go through history_source() /
+# request_source(), which swap in an alias over hot UNION ALL archive.
+def _archive_table(model, name, *indexes):
+    """A copy of model's table without foreign keys, defaults or triggers."""
+    table = db.Table(name, *[db.Column(c.name, c.type, primary_key=c.primary_key, autoincrement=False)
+                             for c in model.__table__.c])
+    for cols in indexes:
+        db.Index(f"ix_{name}_{'_'.join(cols)}", *[table.c[c] for c in cols])
+    return table
+
+
+service_history_archive = _archive_table(ServiceHistory, 'service_history_archive',
+                                         ('csr_id', 'date_completed'), ('pin_id', 'date_completed'),
+                                         ('date_completed',), ('request_id',))
+request_archive = _archive_table(Request, 'request_archive', ('pin_id', 'created_at'), ('created_at',))
+# kept for the record only; no page reads shortlists of archived requests
+shortlist_archive = _archive_table(Shortlist, 'shortlist_archive', ('request_id',))
+
+
+def _with_archive(model, archive, start, stamp):
+    """model, or an alias of it over model UNION ALL archive if archived rows reach back to start."""
+    horizon = db.session.execute(select(func.max(archive.c[stamp]))).scalar()
+    if start is not None and start.tzinfo is not None:
+        # stored timestamps are naive UTC
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if horizon is None or (start is not None and start > horizon):
+        return model
+    names = [c.name for c in archive.c]
+    rows = union_all(select(*[model.__table__.c[n] for n in names]), select(*archive.c))
+    return aliased(model, rows.subquery(f'{model.__tablename__}_all'), adapt_on_names=True)
+
+
+def history_source(start=None):
+    """(history entity, request entity) for a history read covering start onwards.
+
+    While nothing archived is that old both are the plain models, so hot
+    reads never touch the archive; otherwise they are aliases over the hot
+    and archive tables together (rows come back as ServiceHistory / Request
+    objects; treat them as read-only).
+    """
+    hist = _with_archive(ServiceHistory, service_history_archive, start, 'date_completed')
+    if hist is ServiceHistory:
+        return ServiceHistory, Request
+    # archived history mostly points at archived requests
+    return hist, _with_archive(Request, request_archive, None, 'created_at')
+
+
+def request_source(start=None):
+    """Request, or an alias over request + request_archive if archived requests reach back to start."""
+    return _with_archive(Request, request_archive, start, 'created_at')
+
+
+def _rollup_readd(source, stamp, counter):
+    """Add the rollup counts of `source` rows with id IN :ids back (their delete triggers subtract them)."""
+    return text(
+        f"INSERT INTO report_daily_rollup (category_id, day, requests_created, services_completed) "
+        f"SELECT category_id, day, {'n' if counter == 'requests_created' else 0}, "
+        f"{'n' if counter == 'services_completed' else 0} FROM ("
+        f"  SELECT 0 AS category_id, date({stamp}) AS day, COUNT(*) AS n FROM {source} "
+        f"   WHERE id IN :ids GROUP BY day "
+        f"  UNION ALL "
+        f"  SELECT category_id, date({stamp}), COUNT(*) FROM {source} "
+        f"   WHERE id IN :ids AND category_id IS NOT NULL GROUP BY category_id, date({stamp})"
+        f") WHERE day IS NOT NULL "
+        f"ON CONFLICT(category_id, day) DO UPDATE SET {counter} = {counter} + excluded.{counter}"
+    ).bindparams(bindparam('ids', expanding=True))
+
+
+def _move_rows(conn, source, archive, ids, key='id'):
+    cols = ', '.join(c.name for c in archive.c)
+    conn.execute(text(f"INSERT INTO {archive.name} ({cols}) SELECT {cols} FROM {source} WHERE {key} IN :ids")
+                 .bindparams(bindparam('ids', expanding=True)), {'ids': ids})
+    conn.execute(text(f"DELETE FROM {source} WHERE {key} IN :ids")
+                 .bindparams(bindparam('ids', expanding=True)), {'ids': ids})
+
+
+def archive_before(engine, cutoff, batch_size=500, progress=None):
+    """Move service history completed before cutoff, then completed requests created before it, to the archive.
+
+    Requests move once none of their history is left in the hot table; their
+    shortlist entries move to shortlist_archive with them. Each batch is its own transaction, so
+    writers wait at most one batch, and an interrupted run resumes where it
+    stopped. The report rollup and the history search index keep the moved
+    rows. progress(history_rows, request_rows) is called after every batch.
+    Returns (history_rows, request_rows).
+    """
+    ids_param = bindparam('ids', expanding=True)
+    cutoff_param = bindparam('cutoff', type_=db.DateTime)
+    moved = [0, 0]
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(text(
+                "SELECT id FROM service_history WHERE date_completed < :cutoff ORDER BY id LIMIT :n"
+            ).bindparams(cutoff_param), {'cutoff': cutoff, 'n': batch_size}).scalars().all()
+            if not ids:
+                break
+            search = conn.execute(text(
+                "SELECT rowid, request_title, category_name, csr_name FROM service_history_fts WHERE rowid IN :ids"
+            ).bindparams(ids_param), {'ids': ids}).all()
+            conn.execute(_rollup_readd('service_history', 'date_completed', 'services_completed'), {'ids': ids})
+            _move_rows(conn, 'service_history', service_history_archive, ids)
+            if search:
+                conn.execute(text(
+                    "INSERT INTO service_history_fts(rowid, request_title, category_name, csr_name) "
+                    "VALUES (:rowid, :request_title, :category_name, :csr_name)"
+                ), [r._asdict() for r in search])
+        moved[0] += len(ids)
+        if progress:
+            progress(*moved)
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(text(
+                "SELECT id FROM request r WHERE status = 'completed' AND created_at < :cutoff "
+                "AND NOT EXISTS (SELECT 1 FROM service_history sh WHERE sh.request_id = r.id) "
+                "ORDER BY id LIMIT :n"
+            ).bindparams(cutoff_param), {'cutoff': cutoff, 'n': batch_size}).scalars().all()
+            if not ids:
+                break
+            _move_rows(conn, 'shortlist', shortlist_archive, ids, key='request_id')
+            conn.execute(_rollup_readd('request', 'created_at', 'requests_created'), {'ids': ids})
+            _move_rows(conn, 'request', request_archive, ids)
+        moved[1] += len(ids)
+        if progress:
+            progress(*moved)
+    return tuple(moved)
+
+
+def has_archive(conn):
+    """True once the archive tables exist (databases migrated past the archive step)."""
+    return conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='service_history_archive'"
+    )).first() is not None
+
+
 # =========================
 # Utilities: migration + seeding
 # =========================
@@ -660,147 +1714,51 @@ def reset_user_tables():
         raise
 
 
-def seed_database():
-    # Ensure core tables exist
-    db.create_all()
-    try:
-        conn = db.engine.connect()
-        def table_columns(table_name):
-            res = conn.execute(text(f"PRAGMA table_info('{table_name}')"))
-            return {row['name'] for row in res}
-
-        up_cols = set()
-        try:
-            up_cols = table_columns('user_profiles')
-        except Exception:
-            up_cols = set()
+def ensure_indexes(conn):
+    """Create any declared index missing from an existing database.
 
-        if 'name' not in up_cols:
-            try:
-                conn.execute(text("ALTER TABLE user_profiles ADD COLUMN name VARCHAR(80)"))
-            except Exception:
-                pass
-            if 'full_name' in up_cols:
-                try:
-                    conn.execute(text("UPDATE user_profiles SET name = full_name WHERE name IS NULL OR name = ''"))
-                except Exception:
-                    pass
-
-        ua_cols = set()
-        try:
-            ua_cols = table_columns('user_accounts')
-        except Exception:
-            ua_cols = set()
+    db.create_all() only emits indexes for tables it creates, so databases
+    that predate an index get it here. Idempotent and cheap once in place.
+    """
+    existing = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'")).scalars())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing:
+            continue  # created, with its indexes, by a later migration step
+        for idx in table.indexes:
+            idx.create(bind=conn, checkfirst=True)
 
-        added = False
-        if 'first_name' not in ua_cols:
-            try:
-                conn.execute(text("ALTER TABLE user_accounts ADD COLUMN first_name VARCHAR(80)"))
-                added = True
-            except Exception:
-                pass
-        if 'last_name' not in ua_cols:
-            try:
-                conn.execute(text("ALTER TABLE user_accounts ADD COLUMN last_name VARCHAR(80)"))
-                added = True
-            except Exception:
-                pass
-        if 'email' not in ua_cols:
-            try:
-                conn.execute(text("ALTER TABLE user_accounts ADD COLUMN email VARCHAR(120)"))
-                added = True
-            except Exception:
-                pass
-        if 'phone' not in ua_cols:
-            try:
-                conn.execute(text("ALTER TABLE user_accounts ADD COLUMN phone VARCHAR(30)"))
-                added = True
-            except Exception:
-                pass
-        if 'profile_id' not in ua_cols:
-            try:
-                conn.execute(text("ALTER TABLE user_accounts ADD COLUMN profile_id INTEGER"))
-                added = True
-            except Exception:
-                pass
 
-        try:
-            req_cols = table_columns('request')
-        except Exception:
-            req_cols = set()
-        if 'accepted_csr_id' not in req_cols:
-            try:
-                conn.execute(text("ALTER TABLE request ADD COLUMN accepted_csr_id INTEGER"))
-            except Exception:
-                pass
-        if 'accepted_at' not in req_cols:
-            try:
-                conn.execute(text("ALTER TABLE request ADD COLUMN accepted_at DATETIME"))
-            except Exception:
-                pass
+def ensure_shortlist_unique(conn):
+    """Collapse duplicate shortlist rows so the unique (csr_id, request_id) index can be built.
 
-        if 'role' in ua_cols:
-            # create missing roles first
-            existing_role_names = {p.name for p in UserProfile.query.all()} if 'name' in table_columns('user_profiles') else set()
-            try:
-                rows = conn.execute(text("SELECT DISTINCT role FROM user_accounts WHERE role IS NOT NULL"))
-                distinct_roles = [r[0] for r in rows.fetchall() if r[0]]
-            except Exception:
-                distinct_roles = []
-            for rn in distinct_roles:
-                if rn not in existing_role_names:
-                    try:
-                        conn.execute(text("INSERT INTO user_profiles (name, is_active) VALUES (:n, 1)"), {'n': rn})
-                    except Exception:
-                        pass
-            # map user_accounts.role -> user_profiles.id
-            try:
-                try:
-                    rows = conn.execute(text("SELECT DISTINCT role FROM user_accounts WHERE role IS NOT NULL"))
-                    distinct_roles = [r[0] for r in rows.fetchall() if r[0]]
-                except Exception:
-                    distinct_roles = []
-                for rn in distinct_roles:
-                    pid_row = conn.execute(text("SELECT id FROM user_profiles WHERE name = :n LIMIT 1"), {'n': rn}).fetchone()
-                    if pid_row:
-                        pid = pid_row['id'] if isinstance(pid_row, dict) or hasattr(pid_row, 'keys') else pid_row[0]
-                        conn.execute(text("UPDATE user_accounts SET profile_id = :pid WHERE role = :r"), {'pid': pid, 'r': rn})
-            except Exception:
-                pass
+    Requests that had duplicates get their shortlist_count recomputed. No-op
+    once the unique index exists.
+    """
+    has_unique = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name='uq_shortlist_csr_request'"
+    )).first() is not None
+    if has_unique:
+        return
+    dup_requests = [row[0] for row in conn.execute(text(
+        "SELECT DISTINCT request_id FROM shortlist GROUP BY csr_id, request_id HAVING COUNT(*) > 1"
+    ))]
+    conn.execute(text(
+        "DELETE FROM shortlist WHERE id NOT IN (SELECT MIN(id) FROM shortlist GROUP BY csr_id, request_id)"
+    ))
+    for rid in dup_requests:
+        conn.execute(text(
+            "UPDATE request SET shortlist_count = (SELECT COUNT(*) FROM shortlist WHERE request_id = :rid) WHERE id = :rid"
+        ), {'rid': rid})
+    # superseded by the unique index
+    conn.execute(text("DROP INDEX IF EXISTS ix_shortlist_csr_request"))
 
-            try:
-                if 'role' in ua_cols:
-                    conn.execute(text("PRAGMA foreign_keys=OFF"))
-                    conn.execute(text("""
-                        CREATE TABLE IF NOT EXISTS user_accounts_new (
-                            id INTEGER PRIMARY KEY,
-                            profile_id INTEGER,
-                            first_name VARCHAR(80),
-                            last_name VARCHAR(80),
-                            email VARCHAR(120),
-                            phone VARCHAR(30),
-                            username VARCHAR(80) UNIQUE NOT NULL,
-                            password_hash VARCHAR(128) NOT NULL,
-                            is_active BOOLEAN DEFAULT 1
-                        )
-                    """))
-                    conn.execute(text("""
-                        INSERT INTO user_accounts_new (id, profile_id, first_name, last_name, email, phone, username, password_hash, is_active)
-                        SELECT ua.id,
-                               (SELECT id FROM user_profiles WHERE name = ua.role LIMIT 1),
-                               ua.first_name, ua.last_name, ua.email, ua.phone, ua.username, ua.password_hash, ua.is_active
-                        FROM user_accounts ua
-                    """))
-                    conn.execute(text("DROP TABLE user_accounts"))
-                    conn.execute(text("ALTER TABLE user_accounts_new RENAME TO user_accounts"))
-                    conn.execute(text("PRAGMA foreign_keys=ON"))
-            except Exception:
-                pass
 
-        conn.close()
-    except Exception:
-        pass
+def seed_database():
+    """Fill an empty database with demo categories, profiles, users and sample requests.
 
+    Expects a migrated schema (see app.entity.migrations). Does nothing if
+    any account, profile or category already exists.
+    """
     try:
         if UserAccount.query.first() or UserProfile.query.first() or Category.query.first():
             return
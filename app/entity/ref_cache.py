@@ -0,0 +1,141 @@
+# ENTITY: read-through cache for reference data (categories, active profiles)
+import threading
+import time
+from dataclasses import dataclass
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# which cache keys are built from which table
+KEYS_BY_TABLE = {
+    'category': ('categories',),
+    'user_profiles': ('active_profiles',),
+}
+
+_DIRTY = 'ref_cache_dirty'  # session.info key: tables written since the last commit/rollback
+
+
+@dataclass(frozen=True)
+class CategoryRef:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class ProfileRef:
+    id: int
+    name: str
+    description: str
+    is_active: bool
+
+
+class ReferenceCache:
+    """
+    In-process read-through cache for small, rarely changing lookups.
+
+    Values are immutable snapshots (tuples of frozen dataclasses), so callers
+    and templates can share them across requests. A key is dropped when a
+    session that wrote its table commits (see the session listeners below);
+    REF_CACHE_TTL bounds staleness for writes made by other processes or raw SQL.
+
+    Config:
+        REF_CACHE        enable caching (default True)
+        REF_CACHE_TTL    seconds a snapshot may be served (default 60, 0 = no expiry)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._entries = {}      # key -> (generation, loaded_at, value)
+        self._generations = {}  # key -> bumped on every invalidation
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REF_CACHE', True)
+        app.config.setdefault('REF_CACHE_TTL', 60)
+        self.app = app
+        self.enabled = bool(app.config['REF_CACHE'])
+        self.ttl = float(app.config['REF_CACHE_TTL'] or 0)
+        app.extensions['ref_cache'] = self
+
+    def get(self, key, loader):
+        """Return the snapshot for key, calling loader() on a miss."""
+        if not self.enabled:
+            return loader()
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations.get(key, 0)
+            entry = self._entries.get(key)
+            if entry and entry[0] == generation and (not self.ttl or now - entry[1] < self.ttl):
+                self._stats['hits'] += 1
+                return entry[2]
+            self._stats['misses'] += 1
+        value = loader()
+        with self._lock:
+            # an invalidation that raced the load wins; the next call reloads
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = (generation, now, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys or tuple(self._entries):
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._entries.pop(key, None)
+                self._stats['invalidations'] += 1
+
+    def metrics(self):
+        with self._lock:
+            st = dict(self._stats)
+            st['keys'] = len(self._entries)
+        lookups = st['hits'] + st['misses']
+        st['hit_ratio'] = st['hits'] / lookups if lookups else 0.0
+        return st
+
+
+def cached(key, loader):
+    """Serve key from the current app's cache (or straight from loader without one)."""
+    cache = current_app.extensions.get('ref_cache') if has_app_context() else None
+    if cache is None:
+        return loader()
+    return cache.get(key, loader)
+
+
+# ------- commit-driven invalidation -------
+def _mark(session, tables):
+    keys = {k for t in tables for k in KEYS_BY_TABLE.get(t, ())}
+    if keys:
+        session.info.setdefault(_DIRTY, set()).update(keys)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    tables = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is not None:
+            tables.add(table.name)
+    _mark(session, tables)
+
+
+@event.listens_for(Session, 'after_bulk_update')
+@event.listens_for(Session, 'after_bulk_delete')
+def _after_bulk(context):
+    _mark(context.session, {context.mapper.local_table.name})
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    keys = session.info.pop(_DIRTY, None)
+    if keys and has_app_context():
+        cache = current_app.extensions.get('ref_cache')
+        if cache is not None:
+            cache.invalidate(*keys)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop(_DIRTY, None)
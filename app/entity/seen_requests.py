@@ -0,0 +1,64 @@
+# ENTITY: per-CSR "already viewed" checks backed by the request_seen bitmap
+import threading
+from collections import OrderedDict
+
+from .models import RequestSeen
+
+
+class SeenRequests:
+    """
+    Decides whether a CSR opening a request is their first view of it.
+
+    The request_seen bitmap in SQLite is the record; this keeps the words
+    already known to have bits set in a small LRU, so a repeat view is a
+    dict lookup and a bit test, with no query. Only set bits are cached, and
+    bits are never cleared, so a cached answer cannot go stale; an unknown
+    bit costs one UPSERT that also sets it. Nothing is kept in the session
+    cookie.
+
+    Config:
+        SEEN_CACHE_SIZE    (csr, word) entries kept per process (default 50000)
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._words = OrderedDict()  # (csr_id, word) -> bits known set
+        self.hits = self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SEEN_CACHE_SIZE', 50000)
+        self.size = max(1, int(app.config['SEEN_CACHE_SIZE']))
+        app.extensions['seen_requests'] = self
+
+    def first_view(self, csr_id, req_id):
+        """True the first time this CSR views this request (across sessions and processes).
+
+        A new bit is written through the current session; commit it with the
+        rest of the request's work.
+        """
+        word, mask = RequestSeen.locate(req_id)
+        key = (csr_id, word)
+        with self._lock:
+            bits = self._words.get(key)
+            if bits is not None and bits & mask:
+                self._words.move_to_end(key)
+                self.hits += 1
+                return False
+            self.misses += 1
+        first = RequestSeen.mark(csr_id, req_id)
+        with self._lock:
+            self._words[key] = self._words.get(key, 0) | mask
+            self._words.move_to_end(key)
+            while len(self._words) > self.size:
+                self._words.popitem(last=False)
+        return first
+
+    def clear(self):
+        with self._lock:
+            self._words.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'words': len(self._words)}
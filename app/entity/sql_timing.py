@@ -0,0 +1,112 @@
+# ENTITY: per-request SQL timing (Server-Timing header + slow-query log)
+import logging
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('app.sql.slow')
+
+
+def params_shape(parameters, executemany=False):
+    """Describe bound parameters without their values, e.g. "3 rows x (int, str)"."""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} rows x {params_shape(rows[0]) if rows else '()'}"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{k}: {type(v).__name__}' for k, v in parameters.items()) + '}'
+    return '(' + ', '.join(type(v).__name__ for v in (parameters or ())) + ')'
+
+
+class SQLTiming:
+    """
+    Measures every statement the engine runs while serving a request.
+
+    attach() hooks before/after_cursor_execute on the engine; per request the
+    query count, total DB time and the slowest statements are collected in
+    flask.g and reported in a Server-Timing response header
+    (`db;dur=12.3;desc="7 queries"` plus one `sql-N` entry per slow-ranked
+    statement), so browser dev tools show them next to the network timing.
+    Any statement at or above SQL_SLOW_QUERY_MS is logged on the
+    'app.sql.slow' logger with its SQL, parameter shape (types, not values)
+    and the request endpoint, also outside requests (startup, flush threads).
+
+    Disabled (the default), no listeners or request hooks are registered at
+    all, so the cost is nil.
+
+    Config:
+        SQL_TIMING            enable instrumentation (default False)
+        SQL_TIMING_HEADER     add the Server-Timing header (default True)
+        SQL_TIMING_TOP        slowest statements listed in the header (default 3)
+        SQL_SLOW_QUERY_MS     slow-query log threshold in ms, None = off (default 100)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_TIMING', False)
+        app.config.setdefault('SQL_TIMING_HEADER', True)
+        app.config.setdefault('SQL_TIMING_TOP', 3)
+        app.config.setdefault('SQL_SLOW_QUERY_MS', 100)
+        self.app = app
+        self.enabled = bool(app.config['SQL_TIMING'])
+        self.header = bool(app.config['SQL_TIMING_HEADER'])
+        self.top = max(0, int(app.config['SQL_TIMING_TOP']))
+        slow = app.config['SQL_SLOW_QUERY_MS']
+        self.slow_ms = None if slow is None else float(slow)
+        app.extensions['sql_timing'] = self
+        if self.enabled:
+            app.before_request(self._start_request)
+            app.after_request(self._finish_request)
+
+    def attach(self, engine):
+        """Install the cursor listeners on engine (no-op when disabled)."""
+        if not self.enabled or event.contains(engine, 'before_cursor_execute', self._before):
+            return
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    # ------- engine events -------
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('sql_timing_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        ms = (time.perf_counter() - conn.info['sql_timing_start'].pop()) * 1000
+        in_request = has_request_context()
+        stats = g.get('sql_timing') if in_request else None
+        if stats is not None:
+            stats['count'] += 1
+            stats['ms'] += ms
+            stats['statements'].append((ms, statement))
+        if self.slow_ms is not None and ms >= self.slow_ms:
+            slow_logger.warning(
+                'slow query %.1fms endpoint=%s params=%s sql=%s', ms,
+                request.endpoint if in_request else None,
+                params_shape(parameters, executemany), ' '.join(statement.split()),
+            )
+
+    # ------- request hooks -------
+    def _start_request(self):
+        g.sql_timing = {'count': 0, 'ms': 0.0, 'statements': []}
+
+    def _finish_request(self, response):
+        stats = g.pop('sql_timing', None)
+        if stats is None or not self.header:
+            return response
+        entries = [f'db;dur={stats["ms"]:.2f};desc="{stats["count"]} queries"']
+        slowest = sorted(stats['statements'], key=lambda s: s[0], reverse=True)[:self.top]
+        for i, (ms, statement) in enumerate(slowest, 1):
+            summary = ' '.join(statement.split())[:60].replace('"', "'")
+            entries.append(f'sql-{i};dur={ms:.2f};desc="{summary}"')
+        response.headers.add('Server-Timing', ', '.join(entries))
+        return response
+
+    def summary(self):
+        """The current request's {'count', 'ms'} so far, or None outside an instrumented request."""
+        stats = g.get('sql_timing') if has_request_context() else None
+        return None if stats is None else {'count': stats['count'], 'ms': stats['ms']}
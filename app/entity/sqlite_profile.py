@@ -0,0 +1,116 @@
+# ENTITY: SQLite engine profile (connection PRAGMAs + pool options)
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+# PRAGMAs applied to every new DB-API connection, in this order
+_PRAGMA_KEYS = (
+    ('busy_timeout', 'SQLITE_BUSY_TIMEOUT_MS'),
+    ('journal_mode', 'SQLITE_JOURNAL_MODE'),
+    ('synchronous', 'SQLITE_SYNCHRONOUS'),
+    ('cache_size', 'SQLITE_CACHE_SIZE'),
+    ('mmap_size', 'SQLITE_MMAP_SIZE'),
+    ('temp_store', 'SQLITE_TEMP_STORE'),
+    ('foreign_keys', 'SQLITE_FOREIGN_KEYS'),
+)
+
+
+def is_file_database(uri):
+    """True for a SQLite URI that points at a file (not :memory: or a shared-cache memory DB)."""
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite':
+        return False
+    database = url.database or ''
+    return bool(database) and database != ':memory:' and not database.startswith('file::memory:') \
+        and url.query.get('mode') != 'memory'
+
+
+class SQLiteProfile:
+    """
+    Tunes the app's SQLite engine for concurrent readers and writers.
+
+    Call init_app() before db.init_app(app): pool options are folded into
+    SQLALCHEMY_ENGINE_OPTIONS (file databases only; in-memory databases keep
+    Flask-SQLAlchemy's single StaticPool connection). attach() then installs
+    a `connect` listener that sets the PRAGMAs on every new connection.
+    WAL lets dashboard readers keep reading while a writer commits, and
+    busy_timeout makes a second writer wait instead of failing with
+    "database is locked".
+
+    Config (None skips a PRAGMA):
+        SQLITE_PROFILE            enable the profile (default True)
+        SQLITE_JOURNAL_MODE       default 'WAL'
+        SQLITE_SYNCHRONOUS        default 'NORMAL' (durable with WAL up to the last checkpoint)
+        SQLITE_BUSY_TIMEOUT_MS    default 5000
+        SQLITE_CACHE_SIZE         page cache, negative = KiB (default -64000, ~64 MB)
+        SQLITE_MMAP_SIZE          bytes of memory-mapped I/O (default 256 MB)
+        SQLITE_TEMP_STORE         default 'MEMORY'
+        SQLITE_FOREIGN_KEYS       default True
+        SQLITE_POOL_SIZE          pooled connections per process (default 8)
+        SQLITE_MAX_OVERFLOW       extra connections under burst (default 8)
+        SQLITE_POOL_TIMEOUT       seconds to wait for a pooled connection (default 30)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.pragmas = ()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_PROFILE', True)
+        app.config.setdefault('SQLITE_JOURNAL_MODE', 'WAL')
+        app.config.setdefault('SQLITE_SYNCHRONOUS', 'NORMAL')
+        app.config.setdefault('SQLITE_BUSY_TIMEOUT_MS', 5000)
+        app.config.setdefault('SQLITE_CACHE_SIZE', -64000)
+        app.config.setdefault('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+        app.config.setdefault('SQLITE_TEMP_STORE', 'MEMORY')
+        app.config.setdefault('SQLITE_FOREIGN_KEYS', True)
+        app.config.setdefault('SQLITE_POOL_SIZE', 8)
+        app.config.setdefault('SQLITE_MAX_OVERFLOW', 8)
+        app.config.setdefault('SQLITE_POOL_TIMEOUT', 30)
+        self.app = app
+        app.extensions['sqlite_profile'] = self
+
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        self.enabled = bool(app.config['SQLITE_PROFILE']) and uri.startswith('sqlite')
+        if not self.enabled:
+            return
+        self.pragmas = tuple(
+            (name, _pragma_value(app.config[key]))
+            for name, key in _PRAGMA_KEYS if app.config.get(key) is not None
+        )
+        if is_file_database(uri):
+            options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+            options.setdefault('pool_size', int(app.config['SQLITE_POOL_SIZE']))
+            options.setdefault('max_overflow', int(app.config['SQLITE_MAX_OVERFLOW']))
+            options.setdefault('pool_timeout', float(app.config['SQLITE_POOL_TIMEOUT']))
+            connect_args = options.setdefault('connect_args', {})
+            # pooled connections move between request threads
+            connect_args.setdefault('check_same_thread', False)
+            connect_args.setdefault('timeout', int(app.config['SQLITE_BUSY_TIMEOUT_MS'] or 0) / 1000)
+
+    def attach(self, engine):
+        """Install the PRAGMA listener on engine (call inside an app context after db.init_app)."""
+        if not self.enabled or event.contains(engine, 'connect', self._on_connect):
+            return
+        event.listen(engine, 'connect', self._on_connect)
+
+    def _on_connect(self, dbapi_conn, connection_record):
+        cur = dbapi_conn.cursor()
+        try:
+            for name, value in self.pragmas:
+                cur.execute(f'PRAGMA {name}={value}')
+        except Exception:
+            logger.exception('could not apply SQLite PRAGMA %s', name)
+        finally:
+            cur.close()
+
+
+def _pragma_value(value):
+    if isinstance(value, bool):
+        return 'ON' if value else 'OFF'
+    return value
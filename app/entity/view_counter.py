@@ -0,0 +1,182 @@
+# ENTITY: write-behind buffer for request view counters
+import atexit
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    """
+    Collects request view increments in memory and writes them in batches.
+
+    Views are coalesced per request id and flushed as one transaction of
+    `views_count = views_count + :n` updates, either every
+    VIEW_COUNTER_FLUSH_INTERVAL seconds (background thread), as soon as
+    VIEW_COUNTER_FLUSH_THRESHOLD views are pending, or at interpreter exit.
+    The addition happens in SQL, so several workers buffering the same request
+    never overwrite each other; a failed flush puts its batch back.
+
+    One flush thread and one exit hook serve every buffer in the process,
+    however many apps are created (tools, tests); a buffer joins them with
+    its first view and is held only weakly.
+
+    Config:
+        VIEW_COUNTER_BUFFER            enable buffering (default True)
+        VIEW_COUNTER_FLUSH_INTERVAL    seconds between timed flushes, 0 = no timer (default 2.0;
+                                       0 for in-memory databases)
+        VIEW_COUNTER_FLUSH_THRESHOLD   pending views that trigger a flush (default 500)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()        # guards _pending/_queued
+        self._flush_lock = threading.Lock()  # one flush at a time
+        self._pending = {}
+        self._queued = 0
+        self._stop = threading.Event()
+        self._registered = False
+        self._due = 0.0
+        self._stats = {'flushes': 0, 'views_flushed': 0, 'rows_written': 0,
+                       'failed_flushes': 0, 'last_flush_ms': 0.0, 'max_flush_ms': 0.0,
+                       'total_flush_ms': 0.0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('VIEW_COUNTER_BUFFER', True)
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        in_memory = ':memory:' in uri or uri.rstrip('/') in ('sqlite:', 'sqlite://')
+        # an in-memory database is one connection shared by every thread (StaticPool):
+        # a timer flush would commit in the middle of whatever the request thread has open
+        app.config.setdefault('VIEW_COUNTER_FLUSH_INTERVAL', 0 if in_memory else 2.0)
+        app.config.setdefault('VIEW_COUNTER_FLUSH_THRESHOLD', 500)
+        self.app = app
+        self.enabled = bool(app.config['VIEW_COUNTER_BUFFER'])
+        self.interval = float(app.config['VIEW_COUNTER_FLUSH_INTERVAL'] or 0)
+        self.threshold = max(1, int(app.config['VIEW_COUNTER_FLUSH_THRESHOLD']))
+        app.extensions['view_counter'] = self
+
+    def add(self, req_id, n=1):
+        """Record n views of req_id; flushes inline once the threshold is reached."""
+        with self._lock:
+            self._pending[req_id] = self._pending.get(req_id, 0) + n
+            self._queued += n
+            full = self._queued >= self.threshold
+        self._ensure_started()
+        if full:
+            self.flush()
+
+    def pending(self, req_id=None):
+        with self._lock:
+            if req_id is None:
+                return self._queued
+            return self._pending.get(req_id, 0)
+
+    def flush(self):
+        """Write all pending increments in one transaction. Returns the number of views written."""
+        from .models import Request
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                views, self._queued = self._queued, 0
+            if not batch:
+                return 0
+            t0 = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    Request.add_views(batch)
+            except Exception:
+                # keep the increments; the next flush retries them
+                with self._lock:
+                    for req_id, n in batch.items():
+                        self._pending[req_id] = self._pending.get(req_id, 0) + n
+                    self._queued += views
+                self._stats['failed_flushes'] += 1
+                logger.exception('view counter flush failed; %d views re-queued', views)
+                return 0
+            elapsed = (time.perf_counter() - t0) * 1000
+            st = self._stats
+            st['flushes'] += 1
+            st['views_flushed'] += views
+            st['rows_written'] += len(batch)
+            st['last_flush_ms'] = elapsed
+            st['max_flush_ms'] = max(st['max_flush_ms'], elapsed)
+            st['total_flush_ms'] += elapsed
+            logger.debug('flushed %d views into %d rows in %.1fms', views, len(batch), elapsed)
+            return views
+
+    def metrics(self):
+        """Flush latency and coalescing figures since start-up."""
+        st = dict(self._stats)
+        st['pending'] = self.pending()
+        st['avg_flush_ms'] = st['total_flush_ms'] / st['flushes'] if st['flushes'] else 0.0
+        # views per row written: 1.0 means no coalescing, higher is better
+        st['coalescing_ratio'] = st['views_flushed'] / st['rows_written'] if st['rows_written'] else 0.0
+        return st
+
+    def shutdown(self):
+        """Stop timed flushes of this buffer and write whatever is still pending."""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('view counter flush at shutdown failed')
+
+    def _ensure_started(self):
+        if self._registered:
+            return
+        with self._lock:
+            if self._registered:
+                return
+            self._registered = True
+            self._due = time.monotonic() + self.interval
+        _register(self)
+
+
+# process-wide: one timer thread and one exit hook, whatever the number of buffers
+_buffers = weakref.WeakSet()
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _register(buf):
+    global _flusher
+    with _flusher_lock:
+        _buffers.add(buf)
+        if _flusher is None:
+            atexit.register(_shutdown_all)
+            _flusher = threading.Thread(target=_flush_loop, name='view-counter-flush', daemon=True)
+            _flusher.start()
+
+
+def _flush_due():
+    """Flush the buffers whose interval has passed; returns seconds until the next one is due."""
+    now = time.monotonic()
+    wait = 1.0
+    for buf in list(_buffers):
+        if buf.interval <= 0 or buf._stop.is_set():
+            continue
+        if now >= buf._due:
+            buf._due = now + buf.interval
+            buf.flush()
+        wait = min(wait, buf._due - now)
+    return max(0.01, wait)
+
+
+def _flush_loop():
+    while True:
+        try:
+            wait = _flush_due()
+        except Exception:
+            logger.exception('view counter timer pass failed')
+            wait = 1.0
+        time.sleep(wait)
+
+
+def _shutdown_all():
+    for buf in list(_buffers):
+        buf.shutdown()
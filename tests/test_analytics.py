@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import text
+
+from app.control.pm_controller import PMController
+from app.entity import models
+
+np = pytest.importorskip('numpy')
+
+
+def login_as(client, username):
+    u = models.UserAccount.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = u.id
+        sess['role'] = u.profile.name
+        sess['username'] = u.username
+
+
+def all_rows(scope, **kw):
+    data = PMController.generate_report(scope, page=1, per_page=10 ** 6, **kw)
+    return data, data['rows']
+
+
+def test_sub_daily_buckets_match_sql(app_instance):
+    """Hourly and 15-minute buckets equal a GROUP BY over the raw rows, zero-filled in between"""
+    with app_instance.app_context():
+        for scope, width in [('hourly', 3600), ('15min', 900)]:
+            raw = dict(models.db.session.execute(text(
+                f"SELECT CAST(strftime('%s', created_at) AS INTEGER) / {width} b, COUNT(*) FROM request GROUP BY b")).all())
+            data, rows = all_rows(scope)
+            assert data['total_requests'] == sum(raw.values())
+            assert data['bucket_count_requests'] == len(raw)
+            assert sorted(c for _, c, _ in rows if c) == sorted(raw.values())
+            assert len({b for b, _, _ in rows}) == len(rows) == data['total']
+
+
+def test_incremental_refresh_and_rolling_average(app_instance):
+    with app_instance.app_context():
+        engine = app_instance.extensions['analytics']
+        before, _ = all_rows('rolling7')
+        loaded = len(engine.requests)
+        pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+        cat = models.Category.query.first()
+        models.Request.create_for_pin(pin.id, 'Analytics check', 'desc', cat.id)
+        after, rows = all_rows('rolling7')
+        assert len(engine.requests) == loaded + 1
+        assert after['total_requests'] == before['total_requests'] + 1
+
+        daily = [c for _, c in models.ServiceHistory.generate_report('daily', per_page=10 ** 6)['requests']]
+        expected = [round(sum(daily[max(0, i - 6):i + 1]) / min(i + 1, 7), 2) for i in range(len(daily))]
+        assert [c for _, c, _ in rows][:len(daily)] == expected
+
+
+def test_latency_per_category(app_instance):
+    with app_instance.app_context():
+        pairs = models.db.session.execute(text(
+            "SELECT sh.category_id, (julianday(sh.date_completed) - julianday(r.created_at)) * 24 "
+            "FROM service_history sh JOIN request r ON r.id = sh.request_id")).all()
+        cat_id = pairs[0][0]
+        hours = [h for c, h in pairs if c == cat_id]
+        data = PMController.generate_report('latency', category_id=cat_id)
+        (name, n, mean, median, p90), = data['latency']
+        assert name == models.db.session.get(models.Category, cat_id).name and n == len(hours)
+        assert mean == pytest.approx(np.mean(hours), abs=0.01)
+        assert median == pytest.approx(np.median(hours), abs=0.01)
+
+
+def test_reports_page_offers_analytics_scopes(app_instance):
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        for scope in ('hourly', 'rolling28', 'latency'):
+            resp = client.get(f'/pm/reports?scope={scope}')
+            assert resp.status_code == 200 and f'value="{scope}" selected'.encode() in resp.data
+        assert b'value="daily" selected' in client.get('/pm/reports?scope=yearly').data
+
+
+def test_reused_rowid_and_edits_trigger_a_reload(app_instance):
+    """Deleting the newest request lets SQLite reuse its id; the stamps notice, the watermark alone would not"""
+    with app_instance.app_context():
+        engine = app_instance.extensions['analytics']
+        engine.refresh()
+        newest = models.Request.query.order_by(models.Request.id.desc()).first()
+        other = models.Category.query.filter(models.Category.id != newest.category_id).first()
+        newest_id, total = newest.id, len(engine.requests)
+        models.Request.delete_by_id(newest_id)
+        pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+        reused = models.Request.create_for_pin(pin.id, 'Reused id', 'desc', other.id)
+        assert reused.id == newest_id
+
+        req, _ = engine.refresh()
+        assert len(req['created']) == total
+        assert int(req['category'][-1]) == other.id
+
+        # nothing changed since: the stamps match and nothing is reloaded
+        loaded_at = engine.loaded_at
+        engine.refresh()
+        assert engine.loaded_at == loaded_at
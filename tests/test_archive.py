@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, text
+
+from app.entity import models
+
+
+def count(table):
+    return models.db.session.execute(text(f'SELECT COUNT(*) FROM {table}')).scalar()
+
+
+def capture(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = models.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return result, statements
+
+
+def history_view(csr_id):
+    page = models.ServiceHistory.paginate_for_csr(csr_id, per_page=1000)
+    return [(h.id, h.request.title if h.request else None, h.category.name) for h in page['items']]
+
+
+def archive_all_but_newest(n=3):
+    sh = models.ServiceHistory
+    newest = sh.query.order_by(sh.date_completed.desc()).offset(n).first().date_completed
+    models.db.session.commit()
+    return models.archive_before(models.db.engine, newest, batch_size=7)
+
+
+def test_archived_rows_still_listed_reported_and_searchable(app_instance):
+    """Moving rows to the archive changes no history page, report total or search hit"""
+    with app_instance.app_context():
+        csr_id = models.db.session.execute(text('SELECT csr_id FROM service_history LIMIT 1')).scalar()
+        pin_id = models.db.session.execute(text('SELECT pin_id FROM service_history LIMIT 1')).scalar()
+        history_before = count('service_history')
+        before = history_view(csr_id)
+        pin_before = [h.id for h in models.ServiceHistory.filter_for_pin(pin_id)]
+        report_before = models.ServiceHistory.generate_report('monthly', per_page=100)
+        title = models.db.session.execute(text(
+            'SELECT r.title FROM service_history sh JOIN request r ON r.id = sh.request_id ORDER BY sh.id LIMIT 1'
+        )).scalar()
+        hits_before = models.ServiceHistory.paginate_for_pin(pin_id, q=title)['total']
+
+        moved_history, moved_requests = archive_all_but_newest()
+        models.db.session.expire_all()
+        assert moved_history == count('service_history_archive') == history_before - count('service_history') > 0
+        assert moved_requests == count('request_archive') > 0
+
+        assert history_view(csr_id) == before
+        assert [h.id for h in models.ServiceHistory.filter_for_pin(pin_id)] == pin_before
+        assert models.ServiceHistory.generate_report('monthly', per_page=100) == report_before
+        assert models.ServiceHistory.paginate_for_pin(pin_id, q=title)['total'] == hits_before
+        exported = list(models.ServiceHistory.iter_export())
+        assert len(exported) == history_before and all(row[5] for row in exported if row[4])
+
+
+def test_recent_ranges_skip_the_archive(app_instance):
+    with app_instance.app_context():
+        archive_all_but_newest()
+        csr_id = models.db.session.execute(text('SELECT csr_id FROM service_history LIMIT 1')).scalar()
+        start = models.ServiceHistory.query.order_by(models.ServiceHistory.date_completed).first().date_completed
+        assert start > models.db.session.execute(
+            models.db.select(func.max(models.service_history_archive.c.date_completed))).scalar()
+
+        _, recent = capture(lambda: models.ServiceHistory.paginate_for_csr(csr_id, start=start))
+        _, everything = capture(lambda: models.ServiceHistory.paginate_for_csr(csr_id))
+        assert not any('UNION ALL' in s for s in recent)
+        assert any('UNION ALL' in s for s in everything)
+
+
+def test_rebuilds_include_the_archive(app_instance):
+    with app_instance.app_context():
+        archive_all_but_newest()
+        rollup = sorted(tuple(r) for r in models.db.session.execute(text(
+            'SELECT * FROM report_daily_rollup WHERE requests_created <> 0 OR services_completed <> 0')))
+        search = sorted(tuple(r) for r in models.db.session.execute(text('SELECT rowid, * FROM service_history_fts')))
+        with models.db.engine.begin() as conn:
+            models.rebuild_report_rollups(conn)
+            models.ensure_history_fts(conn, rebuild=True)
+        assert rollup == sorted(tuple(r) for r in models.db.session.execute(text(
+            'SELECT * FROM report_daily_rollup WHERE requests_created <> 0 OR services_completed <> 0')))
+        assert search == sorted(tuple(r) for r in models.db.session.execute(text(
+            'SELECT rowid, * FROM service_history_fts')))
+
+
+def test_offset_aware_start_reads_the_archive(app_instance):
+    """A ?start= with a UTC offset is compared as naive UTC against the archive horizon"""
+    with app_instance.app_context():
+        archive_all_but_newest()
+        csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+        client = app_instance.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'], sess['role'], sess['username'] = csr.id, csr.profile.name, csr.username
+        assert client.get('/csr/history?start=2000-01-01T00:00:00%2B00:00').status_code == 200
+
+        aware = datetime(2000, 1, 1, 2, tzinfo=timezone(timedelta(hours=2)))
+        naive = models.ServiceHistory.paginate_for_csr(csr.id, start=datetime(2000, 1, 1))
+        assert models.ServiceHistory.paginate_for_csr(csr.id, start=aware)['total'] == naive['total']
+
+
+def test_archived_requests_keep_their_shortlist_entries(app_instance):
+    with app_instance.app_context():
+        oldest = models.ServiceHistory.query.order_by(models.ServiceHistory.date_completed).first()
+        csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+        models.Shortlist.add_if_not_exists(csr.id, oldest.request_id)
+        shortlisted = count('shortlist')
+        archive_all_but_newest()
+        moved = count('shortlist_archive')
+        assert moved > 0 and count('shortlist') + moved == shortlisted
+        assert models.db.session.execute(text(
+            'SELECT COUNT(*) FROM shortlist_archive s JOIN request_archive r ON r.id = s.request_id'
+        )).scalar() == moved
+
+
+def test_archive_job(app_instance):
+    """The PM maintenance job archives rows past ARCHIVE_AFTER_DAYS"""
+    with app_instance.app_context():
+        oldest = models.ServiceHistory.query.order_by(models.ServiceHistory.date_completed).first()
+        oldest.date_completed -= timedelta(days=4000)
+        models.db.session.commit()
+        job_id = app_instance.extensions['jobs'].submit('archive')
+        job = models.db.session.get(models.Job, job_id)
+        assert job.status == 'succeeded' and job.result_value()['history_rows'] == 1
+        assert count('service_history_archive') == 1
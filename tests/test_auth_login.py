@@ -172,3 +172,27 @@ def test_login_suspended_profile_or_account(app_instance):
         models.db.session.commit()
 
         assert AuthController.login('Person in Need', 'suspended_account_user', 'pw2') is None
+
+
+def test_login_is_a_single_query(app_instance):
+    """Login (and reading the role off the user) issues exactly one SELECT"""
+    from sqlalchemy import event
+
+    with app_instance.app_context():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = models.db.engine
+        models.db.session.remove()
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            u = AuthController.login('CSR Representative', 'csr_user1', 'csr_user1!')
+            role = u.profile.name
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        assert role == 'CSR Representative'
+        assert len(statements) == 1
+        # wrong role for the account: no match, still one lookup
+        assert AuthController.login('Person in Need', 'csr_user1', 'csr_user1!') is None
@@ -0,0 +1,89 @@
+from sqlalchemy import event
+
+from app.entity import models
+
+
+def login_as(client, username):
+    u = models.UserAccount.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = u.id
+        sess['role'] = u.profile.name
+        sess['username'] = u.username
+    return u
+
+
+def get_counting(client, url, **headers):
+    """GET url; returns (response, statements issued)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = models.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        resp = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    models.db.session.remove()
+    return resp, statements
+
+
+def test_unchanged_page_is_304_without_entity_queries(app_instance):
+    """A matching If-None-Match is answered from the version counters alone"""
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'csr_user1')
+        first = client.get('/csr')
+        etag = first.headers['ETag']
+        assert first.status_code == 200 and first.headers['Cache-Control'] == 'private, no-cache'
+
+        resp, statements = get_counting(client, '/csr', **{'If-None-Match': etag})
+        assert resp.status_code == 304 and resp.headers['ETag'] == etag
+        assert resp.get_data() == b''
+        assert len(statements) == 1 and 'table_version' in statements[0]
+
+
+def test_writes_change_the_etag(app_instance):
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        reports = client.get('/pm/reports').headers['ETag']
+        categories = client.get('/pm').headers['ETag']
+
+        models.Category.create('Fresh category')
+        assert client.get('/pm', headers={'If-None-Match': categories}).status_code == 200
+
+        pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+        models.Request.create_for_pin(pin.id, 'New', 'x', None)
+        resp = client.get('/pm/reports', headers={'If-None-Match': reports})
+        assert resp.status_code == 200 and resp.headers['ETag'] != reports
+
+
+def test_session_fragments_are_part_of_the_validator(app_instance):
+    """Another user, or a page with a pending flash, never gets a 304 for someone else's copy"""
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'csr_user1')
+        etag = client.get('/csr').headers['ETag']
+
+        with client.session_transaction() as sess:
+            sess['username'] = 'someone_else'
+            sess['user_id'] = sess['user_id'] + 1000
+        assert client.get('/csr', headers={'If-None-Match': etag}).status_code == 200
+
+        login_as(client, 'pm_user1')
+        etag = client.get('/pm').headers['ETag']
+        with client.session_transaction() as sess:
+            sess['_flashes'] = [('message', 'Category created.')]
+        resp = client.get('/pm', headers={'If-None-Match': etag})
+        assert resp.status_code == 200 and b'Category created.' in resp.data
+
+
+def test_role_is_checked_before_the_304(app_instance):
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        etag = client.get('/pm').headers['ETag']
+        login_as(client, 'csr_user1')
+        assert client.get('/pm', headers={'If-None-Match': etag}).status_code == 403
@@ -0,0 +1,103 @@
+from sqlalchemy import event, update
+
+from app.entity import models
+
+
+def count_statements(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = models.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return result, sum('count(' in s.lower() for s in statements)
+
+
+def login_as(client, username):
+    u = models.UserAccount.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = u.id
+        sess['role'] = u.profile.name
+        sess['username'] = u.username
+
+
+def test_cached_total_reused_until_a_write(app_instance):
+    """'cached' counts once, reuses the total while nothing changed and recounts after a write"""
+    with app_instance.app_context():
+        exact = models.Category.query.count()
+        assert exact > 1
+        first, counted = count_statements(lambda: models.Category.paginate(page=1, per_page=1))
+        assert first['total'] == exact and counted == 1
+        again, counted = count_statements(lambda: models.Category.paginate(page=2, per_page=1))
+        assert again['total'] == exact and counted == 0
+
+        models.db.session.add(models.Category(name='Count strategy test'))
+        models.db.session.commit()
+        after, counted = count_statements(lambda: models.Category.paginate(page=1, per_page=1))
+        assert after['total'] == exact + 1 and counted == 1
+        assert app_instance.extensions['count_cache'].metrics()['hits'] >= 1
+
+
+def test_none_mode_skips_the_total(app_instance):
+    with app_instance.app_context():
+        total = models.Category.query.count()
+        page, counted = count_statements(
+            lambda: models.paginate_query(models.Category.query.order_by(models.Category.id), 1, 1, count='none'))
+        assert counted == 0
+        assert page['total'] is None and page['pages'] is None
+        assert len(page['items']) == 1 and page['has_next'] and not page['has_prev']
+        last = models.paginate_query(models.Category.query.order_by(models.Category.id), total, 1, count='none')
+        assert not last['has_next'] and last['has_prev']
+
+
+def test_none_mode_renders_prev_next_pager(app_instance):
+    """Listing pages still render (with a Previous/Next pager) when totals are skipped"""
+    with app_instance.app_context():
+        app_instance.config['CONDITIONAL_GET'] = False
+        app_instance.extensions['count_cache'].mode = 'none'
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        resp = client.get('/pm?per_page=1&page=2')
+        assert resp.status_code == 200 and b'Previous' in resp.data
+        login_as(client, 'user_admin1')
+        assert client.get('/admin/users').status_code == 200
+        login_as(client, 'csr_user1')
+        assert client.get('/csr').status_code == 200
+        login_as(client, 'pin_user1')
+        assert client.get('/pin').status_code == 200
+
+
+def test_exact_mode_counts_every_view(app_instance):
+    with app_instance.app_context():
+        query = models.Category.query.order_by(models.Category.id)
+        for _ in range(2):
+            page, counted = count_statements(lambda: models.paginate_query(query, 1, 1, count='exact'))
+            assert counted == 1 and page['total'] == models.Category.query.count()
+
+
+def test_counter_updates_keep_cached_listing_totals(app_instance):
+    """View and shortlist counter bumps keep the open-request total cached; a status change recounts"""
+    with app_instance.app_context():
+        browse = lambda: models.Request.paginate_open_no_increment(page=1, per_page=5)
+        first, counted = count_statements(browse)
+        assert counted == 1
+        before = models.TableVersion.current(('request',))['request'][0]
+
+        r = first['items'][0]
+        models.Request.add_views({r.id: 1})
+        models.db.session.execute(update(models.Request).where(models.Request.id == r.id)
+                                  .values(shortlist_count=models.Request.shortlist_count + 1))
+        models.db.session.commit()
+        # the ETag version still moves, the cached total does not
+        assert models.TableVersion.current(('request',))['request'][0] > before
+        again, counted = count_statements(browse)
+        assert counted == 0 and again['total'] == first['total']
+
+        models.Request.update_by_id(r.id, r.title, r.description, r.category_id, 'completed')
+        after, counted = count_statements(browse)
+        assert counted == 1 and after['total'] == first['total'] - 1
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+from sqlalchemy import event
+
+from app.entity import models
+
+
+def login_as(client, username):
+    u = models.UserAccount.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = u.id
+        sess['role'] = u.profile.name
+        sess['username'] = u.username
+
+
+def test_history_csv_export_streams_all_rows(app_instance):
+    """CSV export streams a header plus one line per service history row"""
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        resp = client.get('/pm/export/history')
+        assert resp.status_code == 200 and resp.is_streamed
+        assert resp.mimetype == 'text/csv'
+        assert 'service_history.csv' in resp.headers['Content-Disposition']
+        rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+        assert tuple(rows[0]) == models.ServiceHistory.EXPORT_COLUMNS
+        assert len(rows) - 1 == models.ServiceHistory.query.count()
+        assert {r[-1] for r in rows[1:]} == {'pin_user1'}
+
+
+def test_request_jsonl_export_applies_filters(app_instance):
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        cat = models.Request.query.filter(models.Request.category_id.isnot(None)).first().category
+        resp = client.get(f'/pm/export/requests?format=jsonl&category_id={cat.id}&status=open&start=2000-01-01')
+        records = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        expected = models.Request.query.filter_by(category_id=cat.id, status='open').count()
+        assert len(records) == expected > 0
+        assert all(r['category'] == cat.name and r['status'] == 'open' for r in records)
+        assert records == sorted(records, key=lambda r: (r['created_at'], r['id']))
+
+        future = client.get('/pm/export/requests?format=jsonl&start=2999-01-01')
+        assert future.get_data(as_text=True) == ''
+
+
+def test_export_is_one_query(app_instance):
+    """The export reads everything through a single joined SELECT (after the archive horizon lookup)"""
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = models.db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            client.get('/pm/export/history').get_data()
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        assert len(statements) == 2 and 'max(service_history_archive.date_completed)' in statements[0]
+
+
+def test_export_requires_pm_and_valid_args(app_instance):
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'csr_user1')
+        assert client.get('/pm/export/history').status_code == 403
+        login_as(client, 'pm_user1')
+        assert client.get('/pm/export/history?format=xml').status_code == 400
+        assert client.get('/pm/export/users').status_code == 404
+        assert client.get('/pm/export/history?start=yesterday').status_code == 302
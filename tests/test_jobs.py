@@ -0,0 +1,184 @@
+import csv
+import io
+import os
+import threading
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.entity import models
+from app.entity.jobs import task
+
+release = threading.Event()
+
+
+@task('test_wait')
+def wait_for_release(ctx, steps=200):
+    for i in range(steps):
+        if release.wait(0.01):
+            break
+        ctx.checkpoint(progress=i)
+    return {'steps': i}
+
+
+def login_as(client, username):
+    u = models.UserAccount.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = u.id
+        sess['role'] = u.profile.name
+        sess['username'] = u.username
+
+
+def file_app(path, **config):
+    return create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'JOBS_WORKERS': 1,
+                       'JOBS_POLL_INTERVAL': 0.02, 'JOBS_AUTOSTART': True, **config})
+
+
+def test_report_job_inline_and_polled(app_instance):
+    """With an in-memory DB jobs run inline; status is pollable as JSON and the report renders"""
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        resp = client.post('/pm/jobs/submit', data={'kind': 'report', 'scope': 'monthly'})
+        assert resp.status_code == 302
+        job = models.Job.query.order_by(models.Job.id.desc()).first()
+        status = client.get(f'/pm/jobs/{job.id}').get_json()
+        assert status['status'] == 'succeeded' and status['result_url']
+        page = client.get(status['result_url'])
+        assert page.status_code == 200 and f'Background job #{job.id}'.encode() in page.data
+        assert job.result_value()['total_requests'] == models.Request.query.count()
+        assert b'report' in client.get('/pm/jobs').data
+
+
+def test_export_job_writes_downloadable_file(app_instance, tmp_path):
+    with app_instance.app_context():
+        app_instance.config['JOBS_EXPORT_DIR'] = str(tmp_path)
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        client.post('/pm/jobs/submit', data={'kind': 'export', 'dataset': 'history', 'format': 'csv'})
+        job = models.Job.query.order_by(models.Job.id.desc()).first()
+        assert job.status == 'succeeded'
+        resp = client.get(f'/pm/jobs/{job.id}/result')
+        rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+        resp.close()
+        assert len(rows) - 1 == models.ServiceHistory.query.count() == job.result_value()['rows']
+
+        bad = client.post('/pm/jobs/submit', data={'kind': 'export', 'start': 'not-a-date'})
+        assert bad.status_code == 302
+        assert models.Job.query.count() == 1
+
+
+def test_bounded_concurrency_and_cancel(tmp_path):
+    release.clear()
+    app = file_app(tmp_path / 'jobs.db')
+    runner = app.extensions['jobs']
+    with app.app_context():
+        first = runner.submit('test_wait')
+        second = runner.submit('test_wait')
+        deadline = datetime.now() + timedelta(seconds=5)
+        while runner.status(first).status != 'running' and datetime.now() < deadline:
+            models.db.session.remove()
+        assert runner.status(second).status == 'queued'  # one worker slot
+
+        assert runner.cancel(first) == 'running'  # flagged, stops at its next checkpoint
+        assert runner.wait(first).status == 'cancelled'
+        release.set()
+        done = runner.wait(second)
+        assert done.status == 'succeeded' and done.attempts == 1
+        assert runner.cancel(second) == 'succeeded'
+    runner.shutdown()
+
+
+def test_jobs_survive_a_restart(tmp_path):
+    """Queued jobs and jobs whose worker died are picked up by the next process"""
+    release.set()
+    path = tmp_path / 'restart.db'
+    old = file_app(path, JOBS_AUTOSTART=False)
+    with old.app_context():
+        queued = old.extensions['jobs'].submit('test_wait')
+        crashed = old.extensions['jobs'].submit('test_wait')
+        stale = datetime.now() - timedelta(minutes=10)
+        models.Job.query.filter_by(id=crashed).update({'status': 'running', 'attempts': 1, 'heartbeat_at': stale})
+        models.db.session.commit()
+        models.db.engine.dispose()
+
+    new = file_app(path, JOBS_LEASE_SECONDS=1)
+    runner = new.extensions['jobs']
+    assert runner.wait(queued).status == 'succeeded'
+    job = runner.wait(crashed)
+    assert job.status == 'succeeded' and job.attempts == 2
+    runner.shutdown()
+
+
+def test_export_files_expire(app_instance, tmp_path):
+    """Export files past JOBS_EXPORT_RETENTION_DAYS are removed and their result link answers 404"""
+    with app_instance.app_context():
+        app_instance.config['JOBS_EXPORT_DIR'] = str(tmp_path)
+        runner = app_instance.extensions['jobs']
+        old = runner.submit('export', {'dataset': 'history', 'fmt': 'csv'})
+        old_path = models.db.session.get(models.Job, old).result_value()['path']
+        week_ago = datetime.now().timestamp() - 8 * 86400
+        os.utime(old_path, (week_ago, week_ago))
+
+        new = runner.submit('export', {'dataset': 'requests', 'fmt': 'csv'})
+        assert not os.path.exists(old_path)
+        assert os.path.exists(models.db.session.get(models.Job, new).result_value()['path'])
+
+        client = app_instance.test_client()
+        login_as(client, 'pm_user1')
+        assert client.get(f'/pm/jobs/{old}/result').status_code == 404
+        resp = client.get(f'/pm/jobs/{new}/result')
+        assert resp.status_code == 200
+        resp.close()
+
+
+def test_dispatcher_is_off_unless_asked_for(tmp_path):
+    """Only an app created with JOBS_AUTOSTART (the web entry point) starts the dispatcher thread"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'tool.db'}", 'SEED_DEMO_DATA': False})
+    assert app.extensions['jobs']._thread is None
+
+
+def test_failed_export_reports_its_own_error(app_instance, tmp_path, monkeypatch):
+    """A failing export leaves no file behind and records the real error, even if the file was never created"""
+    from app.control import pm_jobs
+
+    with app_instance.app_context():
+        app_instance.config['JOBS_EXPORT_DIR'] = str(tmp_path)
+        runner = app_instance.extensions['jobs']
+
+        def broken_chunks(*args):
+            raise ValueError('bad row')
+            yield
+
+        monkeypatch.setattr(pm_jobs, 'export_chunks', broken_chunks)
+        job = models.db.session.get(models.Job, runner.submit('export', {'dataset': 'history'}))
+        assert job.status == 'failed' and job.error == 'ValueError: bad row'
+
+        def no_open(*args, **kwargs):
+            raise PermissionError('read-only export dir')
+
+        monkeypatch.setattr(pm_jobs, 'open', no_open, raising=False)
+        job = models.db.session.get(models.Job, runner.submit('export', {'dataset': 'history'}))
+        assert job.status == 'failed' and job.error == 'PermissionError: read-only export dir'
+        assert list(tmp_path.iterdir()) == []
+
+
+@task('test_session')
+def session_in_task(ctx):
+    return {'session': id(models.db.session())}
+
+
+def test_inline_job_leaves_the_callers_session_alone(app_instance):
+    """Inline jobs run in their own session, so their cleanup cannot roll back what the caller has pending"""
+    with app_instance.app_context():
+        runner = app_instance.extensions['jobs']
+        assert runner.inline
+        caller = models.db.session()
+        category = models.Category.query.first()
+        category_id = category.id
+        category.name = 'Renamed before a job ran'
+        job_id = runner.submit('test_session')
+        assert models.db.session() is caller
+        assert models.db.session.get(models.Job, job_id).result_value()['session'] != id(caller)
+        # the job's rollback did not touch the caller's change
+        models.db.session.remove()
+        assert models.db.session.get(models.Category, category_id).name == 'Renamed before a job ran'
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from app.control.csr_controller import CSRController
+from app.entity import models
+
+
+def add_tied_requests(n, category, created_at):
+    pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+    rows = [models.Request(pin_id=pin.id, title=f'Zephyrtide errand {i}', description='Shopping run',
+                           category_id=category.id, status='open', created_at=created_at)
+            for i in range(n)]
+    models.db.session.add_all(rows)
+    models.db.session.commit()
+    return rows
+
+
+def test_cursor_pages_walk_ties_both_ways(app_instance):
+    """next/prev cursors cross page boundaries inside a run of equal created_at values without gaps or repeats"""
+    with app_instance.app_context():
+        category = models.Category.query.first()
+        stamp = datetime(2031, 1, 1, 12)
+        tied = add_tied_requests(5, category, stamp)
+        newer = add_tied_requests(1, category, datetime(2031, 1, 2))
+        # a matching request in another category stays out
+        other = models.Category.query.filter(models.Category.id != category.id).first()
+        add_tied_requests(1, other, stamp)
+        expected = [r.id for r in newer] + [r.id for r in sorted(tied, key=lambda r: r.id, reverse=True)]
+
+        search = lambda cursor: CSRController.search_requests(category_id=category.id, q='zephyrtide',
+                                                              cursor=cursor, per_page=2)
+        pages, page = [], search('')
+        assert page['prev_cursor'] is None and page['total'] is None
+        while True:
+            pages.append([r.id for r in page['items']])
+            if not page['next_cursor']:
+                break
+            page = search(page['next_cursor'])
+        assert pages == [expected[0:2], expected[2:4], expected[4:6]]
+
+        back = []
+        while page['prev_cursor']:
+            page = search(page['prev_cursor'])
+            back.append([r.id for r in page['items']])
+        assert back == [expected[2:4], expected[0:2]]
+        assert page['next_cursor'] is not None
+
+
+def test_malformed_cursor_starts_at_the_first_page(app_instance):
+    with app_instance.app_context():
+        first = CSRController.search_requests(cursor='', per_page=3)
+        for cursor in ('not-a-cursor', 'eyJ4Ijog', models.encode_cursor('next', 'yesterday', 'x')):
+            page = CSRController.search_requests(cursor=cursor, per_page=3)
+            assert [r.id for r in page['items']] == [r.id for r in first['items']]
+            assert page['prev_cursor'] is None
+
+
+def test_prev_page_knows_when_nothing_follows_it(app_instance):
+    """Paging back from a cursor whose row has since closed offers no next page when none remains"""
+    with app_instance.app_context():
+        category = models.Category.query.first()
+        tied = add_tied_requests(3, category, datetime(2031, 1, 1, 12))
+        newer = add_tied_requests(2, category, datetime(2031, 1, 2))
+        search = lambda cursor: CSRController.search_requests(category_id=category.id, q='zephyrtide',
+                                                              cursor=cursor, per_page=2)
+        last = search(search(search('')['next_cursor'])['next_cursor'])
+        assert [r.id for r in last['items']] == [min(r.id for r in tied)] and last['next_cursor'] is None
+
+        # the only row after the middle page closes before the user pages back
+        models.Request.update_by_id(tied[0].id, tied[0].title, tied[0].description, category.id, 'completed')
+        middle = search(last['prev_cursor'])
+        assert [r.id for r in middle['items']] == [tied[2].id, tied[1].id]
+        assert middle['next_cursor'] is None and middle['prev_cursor'] is not None
+
+        first = search(middle['prev_cursor'])
+        assert [r.id for r in first['items']] == [r.id for r in reversed(newer)]
+        assert first['next_cursor'] is not None
@@ -0,0 +1,79 @@
+import sqlite3
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from app.entity import models
+from app.entity.migrations import SCHEMA_VERSION
+
+
+def make_app(path, **config):
+    return create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', **config})
+
+
+def test_current_schema_starts_with_one_ledger_read(tmp_path):
+    """A migrated database costs a single statement at startup when seeding is off"""
+    db_path = tmp_path / 'ledger.db'
+    app = make_app(db_path)
+    with app.app_context():
+        versions = [r[0] for r in models.db.session.execute(text('SELECT version FROM schema_version ORDER BY version'))]
+        assert versions == list(range(1, SCHEMA_VERSION + 1))
+        models.db.engine.dispose()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        app2 = make_app(db_path, SEED_DEMO_DATA=False)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+    assert len(statements) == 1 and 'schema_version' in statements[0]
+    with app2.app_context():
+        assert models.UserAccount.query.filter_by(username='csr_user1').first() is not None
+        models.db.engine.dispose()
+
+
+def test_seeding_can_be_disabled(tmp_path):
+    app = make_app(tmp_path / 'empty.db', SEED_DEMO_DATA=False)
+    with app.app_context():
+        assert models.UserAccount.query.count() == 0
+        assert models.Category.query.count() == 0
+        models.db.engine.dispose()
+
+
+def test_legacy_database_is_upgraded(tmp_path):
+    """An old schema (role text column, missing columns, no ledger) is migrated in place"""
+    db_path = tmp_path / 'legacy.db'
+    raw = sqlite3.connect(db_path)
+    raw.executescript("""
+        CREATE TABLE user_profiles (id INTEGER PRIMARY KEY, full_name VARCHAR(80), is_active BOOLEAN);
+        CREATE TABLE user_accounts (id INTEGER PRIMARY KEY, username VARCHAR(80) UNIQUE NOT NULL,
+                                    password_hash VARCHAR(128) NOT NULL, is_active BOOLEAN, role VARCHAR(40));
+        CREATE TABLE category (id INTEGER PRIMARY KEY, name VARCHAR(80));
+        CREATE TABLE request (id INTEGER PRIMARY KEY, pin_id INTEGER, title VARCHAR(120), description TEXT,
+                              category_id INTEGER, created_at DATETIME, updated_at DATETIME, status VARCHAR(20),
+                              views_count INTEGER, shortlist_count INTEGER);
+        INSERT INTO category (name) VALUES ('Tutoring');
+        INSERT INTO user_accounts (username, password_hash, is_active, role)
+            VALUES ('old_csr', '""" + __import__('hashlib').sha256(b'pw').hexdigest() + """', 1, 'CSR Representative');
+        INSERT INTO request (pin_id, title, description, category_id, created_at, updated_at, status, views_count, shortlist_count)
+            VALUES (1, 'Old maths tutoring', 'legacy row', 1, '2024-01-02 10:00:00', '2024-01-02 10:00:00', 'open', 0, 0);
+    """)
+    raw.commit()
+    raw.close()
+
+    app = make_app(db_path, SEED_DEMO_DATA=False)
+    with app.app_context():
+        cols = {r[1] for r in models.db.session.execute(text("PRAGMA table_info('user_accounts')"))}
+        assert 'role' not in cols and {'profile_id', 'first_name', 'email'} <= cols
+        u = models.UserAccount.login('CSR Representative', 'old_csr', 'pw')
+        assert u is not None
+        # indexes and derived tables were built for the pre-existing rows
+        assert [r.title for r in models.Request.paginate_open_no_increment(q='maths')['items']] == ['Old maths tutoring']
+        assert models.ServiceHistory.generate_report('daily')['total_requests'] == 1
+        assert models.db.session.execute(text('SELECT MAX(version) FROM schema_version')).scalar() == SCHEMA_VERSION
+        models.db.engine.dispose()
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone, timedelta
+
+from app.entity import models
+
+
+def add_history(pin, n):
+    now = datetime.now(timezone.utc)
+    csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+    # pairs share a timestamp so the id tie-breaker is exercised
+    for i in range(n):
+        models.db.session.add(models.ServiceHistory(
+            pin_id=pin.id, csr_id=csr.id, date_completed=now - timedelta(days=i // 2)))
+    models.db.session.commit()
+
+
+def test_keyset_walk_matches_full_history(app_instance):
+    """Following cursor_after() page by page yields the full history once, in order"""
+    with app_instance.app_context():
+        pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+        add_history(pin, 25)
+        full = [h.id for h in models.ServiceHistory.filter_for_pin(pin.id)]
+
+        walked, cursor = [], None
+        while True:
+            rows = models.ServiceHistory.filter_for_pin(pin.id, cursor=cursor, limit=7)
+            assert len(rows) <= 7
+            if not rows:
+                break
+            walked.extend(h.id for h in rows)
+            cursor = models.ServiceHistory.cursor_after(rows[-1])
+        assert walked == full
+
+
+def test_paginate_for_pin_pages(app_instance):
+    with app_instance.app_context():
+        pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+        add_history(pin, 25)
+        full = [h.id for h in models.ServiceHistory.filter_for_pin(pin.id)]
+        first = models.ServiceHistory.paginate_for_pin(pin.id, per_page=10)
+        last = models.ServiceHistory.paginate_for_pin(pin.id, page=first['pages'], per_page=10)
+        assert first['total'] == len(full)
+        assert [h.id for h in first['items']] == full[:10]
+        assert [h.id for h in last['items']] == full[(first['pages'] - 1) * 10:]
+
+
+def search_ids(pin, q):
+    return sorted(h.id for h in models.ServiceHistory.filter_for_pin(pin.id, q=q))
+
+
+def test_history_search_by_csr_category_and_title(app_instance):
+    """Search matches CSR name, category name and request title, and follows renames"""
+    with app_instance.app_context():
+        pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+        csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+        cat = models.Category.query.first()
+        req = models.Request.query.filter_by(pin_id=pin.id).first()
+        sh = models.ServiceHistory(pin_id=pin.id, csr_id=csr.id, request_id=req.id, category_id=cat.id)
+        models.db.session.add(sh)
+        models.db.session.commit()
+
+        assert sh.id in search_ids(pin, 'csr_user1')
+        assert sh.id in search_ids(pin, cat.name.split()[0])
+
+        req.title = 'Zebra crossing escort'
+        csr.first_name = 'Quentin'
+        models.db.session.commit()
+        assert sh.id in search_ids(pin, 'zebra')
+        assert sh.id in search_ids(pin, 'quent')
+
+
+def test_history_search_rows_do_not_multiply_with_accounts(app_instance):
+    """Each matching history row comes back once however many accounts exist"""
+    with app_instance.app_context():
+        pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+        before = search_ids(pin, 'csr_user1')
+        fallback_before = search_ids(pin, ' ')
+        for i in range(30):
+            models.db.session.add(models.UserAccount(username=f'extra{i}', password_hash='x'))
+        models.db.session.commit()
+        assert search_ids(pin, 'csr_user1') == before
+        assert len(set(before)) == len(before)
+        # punctuation-only input takes the LIKE path, which must not cross join either
+        assert fallback_before and search_ids(pin, ' ') == fallback_before
+        total = models.ServiceHistory.paginate_for_pin(pin.id, q=' ')['total']
+        assert total == len(fallback_before)
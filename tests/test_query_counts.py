@@ -0,0 +1,106 @@
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import event
+
+from app.entity import models
+import pytest
+
+
+def login_as(client, username):
+    u = models.UserAccount.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = u.id
+        sess['role'] = u.profile.name
+        sess['username'] = u.username
+    return u
+
+
+def count_selects(client, url):
+    """GET url and return how many SELECT statements it issued (reference cache warmed first)."""
+    client.get(url)
+    models.db.session.remove()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    engine = models.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        resp = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert resp.status_code == 200
+    models.db.session.remove()
+    return len(statements)
+
+
+def add_shortlist_and_history(csr, n):
+    """Give the CSR n shortlisted requests and n completed services with distinct requests/categories."""
+    now = datetime.now(timezone.utc)
+    cats = models.Category.query.all()
+    reqs = models.Request.query.filter_by(status='open').limit(n).all()
+    for i, r in enumerate(reqs):
+        models.db.session.add(models.Shortlist(csr_id=csr.id, request_id=r.id, created_at=now - timedelta(minutes=i)))
+        models.db.session.add(models.ServiceHistory(
+            csr_id=csr.id, pin_id=r.pin_id, request_id=r.id,
+            category_id=cats[i % len(cats)].id, date_completed=now - timedelta(hours=i),
+        ))
+    models.db.session.commit()
+
+
+@pytest.mark.parametrize("url", [
+    '/csr?per_page={n}',
+    '/csr?cursor=&per_page={n}',
+    '/csr/history?per_page={n}',
+    '/pin?per_page={n}',
+    '/pin/history?per_page={n}',
+])
+def test_paginated_pages_fixed_query_count(app_instance, url):
+    """List pages issue the same number of SELECTs whatever the page size"""
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+        add_shortlist_and_history(csr, 20)
+        login_as(client, 'pin_user1' if url.startswith('/pin') else 'csr_user1')
+        small = count_selects(client, url.format(n=2))
+        large = count_selects(client, url.format(n=30))
+        assert small == large
+
+
+@pytest.mark.parametrize("url", ['/csr/shortlist', '/pin/history'])
+def test_unpaginated_lists_fixed_query_count(app_instance, url):
+    """Shortlist and PIN history issue the same number of SELECTs whatever the list length"""
+    with app_instance.app_context():
+        client = app_instance.test_client()
+        csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+        add_shortlist_and_history(csr, 2)
+        login_as(client, 'pin_user1' if url.startswith('/pin') else 'csr_user1')
+        small = count_selects(client, url)
+        # grow the list with rows that point at different requests/categories
+        models.Shortlist.query.delete()
+        models.db.session.commit()
+        add_shortlist_and_history(csr, 25)
+        login_as(client, 'pin_user1' if url.startswith('/pin') else 'csr_user1')
+        large = count_selects(client, url)
+        assert small == large
+
+
+def test_dashboard_summary_reads_only_page_flags_and_previews(app_instance):
+    """Saved flags cover only the ids asked for; previews are capped whatever the shortlist size"""
+    with app_instance.app_context():
+        csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+        add_shortlist_and_history(csr, 30)
+        saved = {s.request_id for s in models.Shortlist.query.filter_by(csr_id=csr.id)}
+        page_ids = [r.id for r in models.Request.query.filter_by(status='open').order_by(models.Request.id.desc()).limit(12)]
+
+        from app.control.csr_controller import CSRController
+        with app_instance.test_request_context():
+            from flask import session
+            session['user_id'] = csr.id
+            summary = CSRController.dashboard_summary(page_ids)
+        assert summary['saved_ids'] == saved & set(page_ids)
+        assert len(summary['shortlist']) == 5 and len(summary['history']) == 5
+        newest = models.Shortlist.query.filter_by(csr_id=csr.id).order_by(models.Shortlist.created_at.desc()).first()
+        assert summary['shortlist'][0].id == newest.id
@@ -0,0 +1,75 @@
+import dataclasses
+
+import pytest
+from sqlalchemy import event
+
+from app.entity import models
+
+
+def selects_during(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    engine = models.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return result, len(statements)
+
+
+def test_categories_served_from_cache_until_commit(app_instance):
+    """Repeat lookups hit the cache; a committed category write invalidates it"""
+    with app_instance.app_context():
+        cache = app_instance.extensions['ref_cache']
+        first, n1 = selects_during(models.Category.get_all)
+        second, n2 = selects_during(models.Category.get_all)
+        assert n1 == 1 and n2 == 0 and second is first
+        assert cache.metrics()['hits'] >= 1
+
+        models.Category.create('Dog Walking')
+        third, n3 = selects_during(models.Category.get_all)
+        assert n3 == 1
+        assert 'Dog Walking' in [c.name for c in third]
+
+        c = models.Category.query.filter_by(name='Dog Walking').first()
+        models.Category.update(c.id, 'Dog Sitting')
+        assert 'Dog Sitting' in [c.name for c in models.Category.get_all()]
+        models.Category.delete(c.id)
+        assert 'Dog Sitting' not in [c.name for c in models.Category.get_all()]
+
+
+def test_rolled_back_write_keeps_cache(app_instance):
+    with app_instance.app_context():
+        models.Category.get_all()
+        models.db.session.add(models.Category(name='Never Saved'))
+        models.db.session.flush()
+        models.db.session.rollback()
+        _, n = selects_during(models.Category.get_all)
+        assert n == 0
+
+
+def test_profile_suspend_and_bulk_update_invalidate(app_instance):
+    with app_instance.app_context():
+        names = [p.name for p in models.UserProfile.get_active_profiles()]
+        p = models.UserProfile.query.filter_by(name='Platform Manager').first()
+        models.UserProfile.suspend_profile(p.id)
+        assert 'Platform Manager' not in [x.name for x in models.UserProfile.get_active_profiles()]
+        models.UserProfile.activate_profile(p.id)
+        assert [x.name for x in models.UserProfile.get_active_profiles()] == names
+
+        models.UserProfile.query.update({models.UserProfile.is_active: False})
+        models.db.session.commit()
+        assert models.UserProfile.get_active_profiles() == ()
+
+
+def test_snapshots_are_immutable(app_instance):
+    with app_instance.app_context():
+        cats = models.Category.get_all()
+        assert isinstance(cats, tuple)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            cats[0].name = 'changed'
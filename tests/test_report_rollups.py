@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.entity import models
+
+
+def rollup_rows():
+    return sorted(tuple(r) for r in models.db.session.execute(text(
+        "SELECT category_id, day, requests_created, services_completed FROM report_daily_rollup "
+        "WHERE requests_created <> 0 OR services_completed <> 0"
+    )))
+
+
+def rebuilt_rows():
+    with models.db.engine.begin() as conn:
+        models.rebuild_report_rollups(conn)
+    return rollup_rows()
+
+
+def test_rollup_tracks_create_complete_recategorise_delete(app_instance):
+    """Trigger-maintained rollup matches a full rebuild after every kind of write"""
+    with app_instance.app_context():
+        pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+        cats = models.Category.query.order_by(models.Category.id).all()
+
+        r = models.Request.create_for_pin(pin.id, 'Rollup check', 'desc', cats[0].id)
+        models.Request.update_by_id(r.id, r.title, r.description, cats[0].id, 'completed')
+        models.Request.update_by_id(r.id, r.title, r.description, cats[1].id, 'completed')
+        doomed = models.Request.create_for_pin(pin.id, 'Short lived', 'desc', cats[2].id)
+        models.Request.delete_by_id(doomed.id)
+        models.ServiceHistory.query.filter_by(request_id=r.id).delete()
+        models.db.session.commit()
+
+        incremental = rollup_rows()
+        assert incremental == rebuilt_rows()
+
+
+def test_report_matches_raw_aggregation(app_instance):
+    """Daily/weekly/monthly buckets from the rollup equal GROUP BY over the raw tables"""
+    with app_instance.app_context():
+        for scope, fmt in [('daily', '%Y-%m-%d'), ('weekly', '%Y-W%W'), ('monthly', '%Y-%m')]:
+            raw = [tuple(r) for r in models.db.session.execute(text(
+                f"SELECT strftime('{fmt}', created_at) b, COUNT(*) FROM request GROUP BY b ORDER BY b"))]
+            pages = []
+            page, data = 1, None
+            while data is None or page <= data['pages']:
+                data = models.ServiceHistory.generate_report(scope, page=page, per_page=7)
+                pages.extend(data['requests'])
+                page += 1
+            assert [b for b in pages if b[1]] == raw
+            assert len(pages) == data['total']
+            assert data['total_requests'] == sum(c for _, c in raw)
+            assert data['bucket_count_requests'] == len(raw)
+
+
+def test_report_axis_is_aligned_and_zero_filled(app_instance):
+    """Both series share one contiguous calendar axis; empty days are 0 rather than missing"""
+    with app_instance.app_context():
+        days = [r[0] for r in models.db.session.execute(text(
+            "SELECT day FROM report_daily_rollup WHERE category_id = 0 "
+            "AND (requests_created <> 0 OR services_completed <> 0) ORDER BY day"))]
+        first, last = date.fromisoformat(days[0]), date.fromisoformat(days[-1])
+        expected = [(first + timedelta(n)).isoformat() for n in range((last - first).days + 1)]
+
+        data = models.ServiceHistory.generate_report('daily', page=2, per_page=10)
+        assert data['total'] == len(expected)
+        assert [b for b, _ in data['requests']] == [b for b, _ in data['completed']] == expected[10:20]
+
+        newest = models.ServiceHistory.generate_report('daily', page=1, per_page=3, order='desc')
+        assert [b for b, _, _ in newest['rows']] == expected[::-1][:3]
+
+        empty = models.ServiceHistory.generate_report('monthly', category_id=10 ** 6)
+        assert empty['rows'] == [] and empty['total'] == 0 and empty['pages'] == 1
+
+
+def test_report_pages_slice_the_full_axis(app_instance):
+    """Each page, in either order, is its slice of the whole axis, including the short last page"""
+    with app_instance.app_context():
+        for scope in ('daily', 'weekly', 'monthly'):
+            for order in ('asc', 'desc'):
+                full = models.ServiceHistory.generate_report(scope, per_page=10 ** 6, order=order)['rows']
+                paged = []
+                for page in range(1, (len(full) + 6) // 7 + 1):
+                    paged.extend(models.ServiceHistory.generate_report(scope, page=page, per_page=7, order=order)['rows'])
+                assert paged == full, (scope, order)
@@ -0,0 +1,60 @@
+from app.entity import models
+
+
+def add_request(title, description, status='open'):
+    pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+    cat = models.Category.query.first()
+    r = models.Request(pin_id=pin.id, title=title, description=description, category_id=cat.id, status=status)
+    models.db.session.add(r)
+    models.db.session.commit()
+    return r
+
+
+def search(q):
+    return [r.id for r in models.Request.paginate_open_no_increment(q=q, per_page=50)['items']]
+
+
+def test_matches_are_ranked_by_bm25(app_instance):
+    """Requests that mention the term more densely rank first, whatever their age"""
+    with app_instance.app_context():
+        strong = add_request('Zephyrquill zephyrquill repair', 'zephyrquill')
+        weak = add_request('Garden help', 'Weeding, hedges and one zephyrquill in the shed out back')
+        assert weak.created_at >= strong.created_at
+        assert search('zephyrquill') == [strong.id, weak.id]
+
+
+def test_words_match_as_prefixes_and_all_must_match(app_instance):
+    """q matches word prefixes (not substrings) and every word has to appear"""
+    with app_instance.app_context():
+        chair = add_request('Zephyrwheelchair ramp', 'Need a ramp fitted')
+        lift = add_request('Zephyrwheelchair lift', 'Stair lift service')
+        assert set(search('zephyrwheel')) == {chair.id, lift.id}
+        assert search('zephyrwheel ramp') == [chair.id]
+        # substring of a word is no longer a hit (the old LIKE '%q%' matched it)
+        assert chair.id not in search('wheelchair')
+
+
+def test_input_without_words_falls_back_to_like(app_instance):
+    """Punctuation-only queries have no FTS tokens and use a substring scan instead"""
+    with app_instance.app_context():
+        assert models.fts_match_expr('++') is None
+        r = add_request('Tutoring in C++', 'Evening lessons')
+        assert r.id in search('++')
+
+
+def test_triggers_keep_the_index_in_sync(app_instance):
+    """Inserts, title/description edits and deletes are reflected in search without a rebuild"""
+    with app_instance.app_context():
+        r = add_request('Zephyrmop cleaning', 'Kitchen floor')
+        assert search('zephyrmop') == [r.id]
+
+        models.Request.update_by_id(r.id, 'Zephyrbroom cleaning', 'Kitchen floor', r.category_id, 'open')
+        assert search('zephyrmop') == []
+        assert search('zephyrbroom') == [r.id]
+
+        # counter bumps leave the index alone
+        models.Request.add_views({r.id: 3})
+        assert search('zephyrbroom') == [r.id]
+
+        models.Request.delete_by_id(r.id)
+        assert search('zephyrbroom') == []
@@ -0,0 +1,79 @@
+from flask import current_app
+from sqlalchemy import event
+
+from app.entity import models
+
+
+def login_as(client, username):
+    u = models.UserAccount.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = u.id
+        sess['role'] = u.profile.name
+        sess['username'] = u.username
+    return u
+
+
+def views(req_id):
+    current_app.extensions['view_counter'].flush()
+    models.db.session.expire_all()
+    return models.db.session.get(models.Request, req_id).views_count or 0
+
+
+def test_first_view_per_csr_counts_once_across_sessions(app_instance):
+    """A CSR's repeat views never count, even from a new session; the cookie carries no view list"""
+    with app_instance.app_context():
+        r = models.Request.query.filter_by(status='open').first()
+        before = views(r.id)
+        client = app_instance.test_client()
+        login_as(client, 'csr_user1')
+        for _ in range(3):
+            assert client.get(f'/csr/request/{r.id}').status_code == 200
+        with client.session_transaction() as sess:
+            assert 'viewed_requests' not in sess
+        fresh = app_instance.test_client()
+        login_as(fresh, 'csr_user1')
+        fresh.get(f'/csr/request/{r.id}')
+        assert views(r.id) == before + 1
+
+
+def test_repeat_views_skip_the_database(app_instance):
+    with app_instance.app_context():
+        seen = app_instance.extensions['seen_requests']
+        csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+        ids = [r.id for r in models.Request.query.limit(5)]
+        assert all(seen.first_view(csr.id, i) for i in ids)
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(models.db.engine, 'before_cursor_execute', listener)
+        try:
+            assert not any(seen.first_view(csr.id, i) for i in ids)
+        finally:
+            event.remove(models.db.engine, 'before_cursor_execute', listener)
+        assert statements == []
+
+        # the bitmap, not the cache, is the record: a cold cache still knows
+        seen.clear()
+        assert not seen.first_view(csr.id, ids[0])
+
+
+def test_bitmap_packs_64_ids_per_row(app_instance):
+    with app_instance.app_context():
+        for req_id in (0, 1, 62, 63, 64, 200):
+            assert models.RequestSeen.mark(7, req_id)
+            assert not models.RequestSeen.mark(7, req_id)
+        words = models.RequestSeen.words(7)
+        assert sorted(words) == [0, 1, 3]
+        assert words[0] & models.RequestSeen.locate(63)[1] and words[0] & 0b11
+        assert models.RequestSeen.mark(8, 63)  # per CSR
+
+
+def test_mark_joins_the_callers_transaction(app_instance):
+    """A rollback discards the mark along with the caller's other pending work"""
+    with app_instance.app_context():
+        assert models.RequestSeen.mark(9, 5)
+        models.db.session.rollback()
+        assert models.RequestSeen.words(9) == {}
+        assert models.RequestSeen.mark(9, 5)
+        models.db.session.commit()
+        assert not models.RequestSeen.mark(9, 5)
@@ -0,0 +1,53 @@
+import random
+import threading
+
+from app import create_app
+from app.entity import models
+
+
+def test_concurrent_save_unsave_keeps_counters_exact(tmp_path):
+    """Many threads saving/unsaving the same requests leave no duplicates and exact shortlist counts"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'shortlist.db'}",
+    })
+    with app.app_context():
+        csr_ids = [u.id for u in models.UserAccount.query.limit(4).all()]
+        req_ids = [r.id for r in models.Request.query.filter_by(status='open').limit(3).all()]
+        models.Shortlist.query.delete()
+        models.Request.query.filter(models.Request.id.in_(req_ids)).update(
+            {models.Request.shortlist_count: 0}, synchronize_session=False)
+        models.db.session.commit()
+
+    errors = []
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        with app.app_context():
+            try:
+                for _ in range(60):
+                    csr_id, req_id = rnd.choice(csr_ids), rnd.choice(req_ids)
+                    if rnd.random() < 0.6:
+                        models.Shortlist.add_if_not_exists(csr_id, req_id)
+                    else:
+                        models.Shortlist.remove_if_exists(csr_id, req_id)
+            except Exception as exc:  # surfaced below; threads cannot fail the test directly
+                errors.append(exc)
+            finally:
+                models.db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    with app.app_context():
+        pairs = [(s.csr_id, s.request_id) for s in models.Shortlist.query.all()]
+        assert len(pairs) == len(set(pairs))
+        for req_id in req_ids:
+            r = models.db.session.get(models.Request, req_id)
+            assert r.shortlist_count == models.Shortlist.query.filter_by(request_id=req_id).count()
+        models.db.session.remove()
+        models.db.engine.dispose()
@@ -0,0 +1,69 @@
+import logging
+import re
+
+from sqlalchemy import event
+
+from app import create_app
+from app.entity import models
+from app.entity.sql_timing import params_shape
+
+
+def make_app(**config):
+    return create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', **config})
+
+
+def login(client):
+    client.post('/login', data={'role': 'CSR Representative', 'username': 'csr_user1', 'password': 'csr_user1!'})
+
+
+def test_disabled_registers_nothing():
+    """With SQL_TIMING off there are no cursor listeners and no Server-Timing header"""
+    app = make_app()
+    timing = app.extensions['sql_timing']
+    with app.app_context():
+        assert not event.contains(models.db.engine, 'before_cursor_execute', timing._before)
+        assert not event.contains(models.db.engine, 'after_cursor_execute', timing._after)
+    client = app.test_client()
+    login(client)
+    assert 'Server-Timing' not in client.get('/csr').headers
+
+
+def test_server_timing_header_counts_queries():
+    app = make_app(SQL_TIMING=True, SQL_SLOW_QUERY_MS=None)
+    client = app.test_client()
+    login(client)
+    client.get('/csr')  # warm the reference cache
+
+    statements = []
+    with app.app_context():
+        engine = models.db.engine
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        header = client.get('/csr').headers['Server-Timing']
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    db_entry = re.match(r'db;dur=([\d.]+);desc="(\d+) queries"', header)
+    assert db_entry and int(db_entry.group(2)) == len(statements)
+    assert len(re.findall(r'sql-\d;dur=', header)) == min(3, len(statements))
+
+
+def test_slow_query_log_has_endpoint_and_param_shape(caplog):
+    app = make_app(SQL_TIMING=True, SQL_SLOW_QUERY_MS=0)
+    client = app.test_client()
+    login(client)
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger='app.sql.slow'):
+        client.get('/csr')
+    messages = [r.getMessage() for r in caplog.records if r.name == 'app.sql.slow']
+    assert messages and all('endpoint=boundary.csr_dashboard' in m for m in messages)
+    assert any("params=(str, int, int)" in m for m in messages)  # types, not values
+
+
+def test_params_shape():
+    assert params_shape((1, 'a')) == '(int, str)'
+    assert params_shape({'id': 3}) == '{id: int}'
+    assert params_shape([(1,), (2,)], executemany=True) == '2 rows x (int)'
@@ -0,0 +1,58 @@
+from sqlalchemy import text
+
+from app import create_app
+from app.entity import models
+
+
+def test_file_database_gets_wal_profile_and_pool(tmp_path):
+    """File databases run in WAL with the configured PRAGMAs on every pooled connection"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'profile.db'}",
+        'SQLITE_BUSY_TIMEOUT_MS': 1234,
+    })
+    with app.app_context():
+        engine = models.db.engine
+        assert engine.pool.size() == app.config['SQLITE_POOL_SIZE']
+        with engine.connect() as a, engine.connect() as b:
+            for conn in (a, b):
+                assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+                assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+                assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 1234
+                assert conn.execute(text('PRAGMA foreign_keys')).scalar() == 1
+                assert conn.execute(text('PRAGMA temp_store')).scalar() == 2  # MEMORY
+
+
+def test_profile_can_be_disabled(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'plain.db'}",
+        'SQLITE_PROFILE': False,
+    })
+    with app.app_context():
+        with models.db.engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'delete'
+            assert conn.execute(text('PRAGMA foreign_keys')).scalar() == 0
+
+
+def test_category_in_use_is_not_deleted(app_instance):
+    """With foreign keys enforced, deleting a referenced category fails cleanly"""
+    with app_instance.app_context():
+        cat = models.Request.query.filter(models.Request.category_id.isnot(None)).first().category
+        ok, msg = models.Category.delete(cat.id)
+        assert not ok and 'in use' in msg
+        assert models.Category.get_by_id(cat.id) is not None
+
+        assert models.Category.create('Unused')[0]
+        unused = models.Category.query.filter_by(name='Unused').first()
+        assert models.Category.delete(unused.id) == (True, "Category deleted.")
+
+
+def test_deleting_completed_request_keeps_history(app_instance):
+    with app_instance.app_context():
+        sh = models.ServiceHistory.query.filter(models.ServiceHistory.request_id.isnot(None)).first()
+        history_id, req_id = sh.id, sh.request_id
+        models.Request.delete_by_id(req_id)
+        models.db.session.expire_all()
+        assert models.db.session.get(models.Request, req_id) is None
+        assert models.db.session.get(models.ServiceHistory, history_id).request_id is None
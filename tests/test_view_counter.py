@@ -0,0 +1,108 @@
+import threading
+import time
+
+from app import create_app
+from app.entity import models, view_counter
+
+
+def test_views_are_buffered_then_flushed_in_one_batch(app_instance):
+    """View increments stay in memory until a flush writes them with SQL-side addition"""
+    with app_instance.app_context():
+        buf = app_instance.extensions['view_counter']
+        buf.interval = 0  # no timer thread; flush explicitly
+        buf.threshold = 10_000
+        r1, r2 = models.Request.query.filter_by(status='open').limit(2).all()
+        before1, before2 = r1.views_count or 0, r2.views_count or 0
+
+        def hammer():
+            with app_instance.app_context():
+                for _ in range(50):
+                    models.Request.increment_views(r1.id)
+                models.Request.increment_views(r2.id)
+
+        threads = [threading.Thread(target=hammer) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert buf.pending(r1.id) == 400
+        # nothing written yet
+        models.db.session.expire_all()
+        assert models.db.session.get(models.Request, r1.id).views_count == before1
+
+        assert buf.flush() == 408
+        models.db.session.expire_all()
+        assert models.db.session.get(models.Request, r1.id).views_count == before1 + 400
+        assert models.db.session.get(models.Request, r2.id).views_count == before2 + 8
+
+        m = buf.metrics()
+        assert m['pending'] == 0
+        assert m['rows_written'] == 2
+        assert m['coalescing_ratio'] == 204
+
+
+def test_threshold_triggers_flush(app_instance):
+    """Reaching the pending threshold flushes inline"""
+    with app_instance.app_context():
+        buf = app_instance.extensions['view_counter']
+        buf.interval = 0
+        buf.threshold = 5
+        r = models.Request.query.filter_by(status='open').first()
+        before = r.views_count or 0
+        for _ in range(5):
+            models.Request.increment_views(r.id)
+        assert buf.pending() == 0
+        models.db.session.expire_all()
+        assert models.db.session.get(models.Request, r.id).views_count == before + 5
+
+
+def test_flush_metrics_exposed_to_platform_managers(app_instance):
+    """/pm/diagnostics reports flush latency and the coalescing ratio of this process's buffer"""
+    with app_instance.app_context():
+        buf = app_instance.extensions['view_counter']
+        buf.interval = 0
+        rid = models.Request.query.first().id
+        for _ in range(6):
+            buf.add(rid)
+        buf.flush()
+        client = app_instance.test_client()
+        pm = models.UserAccount.query.filter_by(username='pm_user1').first()
+        with client.session_transaction() as sess:
+            sess['user_id'], sess['role'], sess['username'] = pm.id, pm.profile.name, pm.username
+        data = client.get('/pm/diagnostics').get_json()['view_counter']
+        assert data['flushes'] == 1 and data['coalescing_ratio'] == 6
+        assert data['avg_flush_ms'] > 0 and data['pending'] == 0
+
+
+def test_in_memory_databases_flush_on_demand_only(app_instance):
+    """The conftest :memory: app has no timer, so no thread commits on the shared test connection"""
+    buf = app_instance.extensions['view_counter']
+    assert app_instance.config['VIEW_COUNTER_FLUSH_INTERVAL'] == 0 and buf.interval == 0
+    with app_instance.app_context():
+        buf.add(models.Request.query.first().id)
+        time.sleep(0.1)
+        assert buf.pending() == 1 and buf.metrics()['flushes'] == 0
+        buf.flush()
+
+
+def test_one_flush_thread_for_every_app():
+    """Buffers of separate apps share one timer thread and exit hook, and still flush on their own interval"""
+    apps = [create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                        'VIEW_COUNTER_FLUSH_INTERVAL': 0.02}) for _ in range(3)]
+    for app in apps:
+        buf = app.extensions['view_counter']
+        with app.app_context():
+            rid = models.Request.query.first().id
+            buf.add(rid)
+            buf.add(rid)
+    assert sum(t.name == 'view-counter-flush' for t in threading.enumerate()) == 1
+    assert all(app.extensions['view_counter'] in view_counter._buffers for app in apps)
+
+    flushed = lambda: [app.extensions['view_counter'].metrics()['views_flushed'] for app in apps]
+    deadline = time.monotonic() + 2
+    while flushed() != [2, 2, 2] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert flushed() == [2, 2, 2]
+    for app in apps:
+        app.extensions['view_counter'].shutdown()
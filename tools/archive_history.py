@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Move old service history and completed requests into the archive tables.
+
+Rows whose completion (history) or creation (requests) is older than the
+horizon move in batches to service_history_archive / request_archive,
+keeping their ids; shortlist entries of moved requests go to
+shortlist_archive. History pages, exports and reports still include them
+whenever the requested date range reaches that far back; everything else
+reads only the smaller hot tables. The PM Jobs page can run the same work
+in the background ("Archive old history").
+
+Usage:
+    python tools/archive_history.py [--db PATH] [--days N] [--batch N]
+
+By default this uses the app's configured database (instance csr_vms.db)
+and the app's ARCHIVE_AFTER_DAYS / ARCHIVE_BATCH_SIZE settings.
+"""
+import sys
+import os
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app import create_app
+from app.entity import models
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', help='Path to a SQLite database file (defaults to the app instance DB)')
+    parser.add_argument('--days', type=int, help='Archive rows older than this many days (default ARCHIVE_AFTER_DAYS)')
+    parser.add_argument('--batch', type=int, help='Rows moved per transaction (default ARCHIVE_BATCH_SIZE)')
+    args = parser.parse_args()
+
+    config = {}
+    if args.db:
+        config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.abspath(args.db)}"
+    app = create_app(config)
+
+    with app.app_context():
+        days = args.days or app.config['ARCHIVE_AFTER_DAYS']
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+        t0 = time.perf_counter()
+
+        def progress(history, requests):
+            print(f'\r  moved {history} history rows, {requests} requests', end='', flush=True)
+
+        history, requests = models.archive_before(models.db.engine, cutoff,
+                                                  batch_size=args.batch or app.config['ARCHIVE_BATCH_SIZE'],
+                                                  progress=progress)
+        elapsed = time.perf_counter() - t0
+        print(f'\narchived {history} history rows and {requests} completed requests '
+              f'older than {cutoff:%Y-%m-%d} in {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
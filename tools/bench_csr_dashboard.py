@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CSR dashboard's shortlist/history work for CSRs with large shortlists.
+
+For each shortlist size a fresh SQLite file gets that many open requests, all
+shortlisted by one CSR, plus the same number of completed services. The
+previous dashboard work (load the whole shortlist as ORM rows, page the
+history, slice five of each) is timed against the dashboard read model
+(saved flags for one page of ids + two LIMIT 5 previews). The full /csr page
+is timed as well.
+
+Usage:
+    python tools/bench_csr_dashboard.py [--sizes 100,1000,10000] [--repeat 20]
+
+Databases are created in a temporary directory and removed afterwards.
+"""
+import sys
+import os
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app import create_app
+from app.entity import models
+
+
+def fill(csr_id, pin_id, n):
+    now = datetime.now(timezone.utc)
+    cats = [c.id for c in models.Category.query.all()]
+    req_rows = [{'pin_id': pin_id, 'title': f'Bench request {i}', 'description': 'help', 'status': 'open',
+                 'category_id': cats[i % len(cats)], 'created_at': now - timedelta(minutes=i),
+                 'updated_at': now, 'views_count': 0, 'shortlist_count': 1} for i in range(n)]
+    with models.db.engine.begin() as conn:
+        first = conn.execute(models.db.text('SELECT COALESCE(MAX(id), 0) FROM request')).scalar() + 1
+        conn.execute(models.Request.__table__.insert(), req_rows)
+        ids = range(first, first + n)
+        conn.execute(models.Shortlist.__table__.insert(), [
+            {'csr_id': csr_id, 'request_id': rid, 'created_at': now - timedelta(seconds=k)}
+            for k, rid in enumerate(ids)])
+        conn.execute(models.ServiceHistory.__table__.insert(), [
+            {'csr_id': csr_id, 'pin_id': pin_id, 'request_id': rid, 'category_id': cats[k % len(cats)],
+             'date_completed': now - timedelta(hours=k)} for k, rid in enumerate(ids)])
+
+
+def legacy(csr_id, page_ids):
+    full = models.Shortlist.for_csr(csr_id)
+    history = models.ServiceHistory.paginate_for_csr(csr_id=csr_id)
+    saved = {s.request_id for s in full}
+    return saved, full[:5], history['items'][:5]
+
+
+def read_model(csr_id, page_ids):
+    return (models.Shortlist.saved_request_ids(csr_id, page_ids),
+            models.Shortlist.recent_for_csr(csr_id, limit=5),
+            models.ServiceHistory.recent_for_csr(csr_id, limit=5))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+        models.db.session.remove()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100,1000,10000', help='Comma-separated shortlist sizes')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    print(f"{'shortlist':>10} {'legacy':>10} {'read model':>11} {'speed-up':>9} {'/csr page':>10}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in sizes:
+            app = create_app({'TESTING': True, 'VIEW_COUNTER_BUFFER': False,
+                              'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, f'dash{n}.db')}"})
+            with app.app_context():
+                csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+                pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+                csr_id = csr.id
+                fill(csr_id, pin.id, n)
+                page_ids = [r.id for r in models.Request.query.filter_by(status='open')
+                            .order_by(models.Request.created_at.desc()).limit(12)]
+                old = timed(lambda: legacy(csr_id, page_ids), args.repeat)
+                new = timed(lambda: read_model(csr_id, page_ids), args.repeat)
+
+                client = app.test_client()
+                with client.session_transaction() as sess:
+                    sess['user_id'] = csr_id
+                    sess['role'] = 'CSR Representative'
+                    sess['username'] = 'csr_user1'
+                page = timed(lambda: client.get('/csr'), args.repeat)
+                models.db.engine.dispose()
+            print(f'{n:>10} {old:>8.2f}ms {new:>9.2f}ms {old / new if new else 0:>8.1f}x {page:>8.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
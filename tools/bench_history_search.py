@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Regression benchmark: PIN history search latency vs the number of user accounts.
+
+For each account count a fresh SQLite file gets that many extra accounts plus
+a PIN with a fixed history. The PIN history search (first page + total, like
+/pin/history?q=...) is timed through the current path and through the old
+query, which filtered on user_accounts.username without joining it and so
+cross-joined the whole account table. The current timings should stay flat as
+the account count grows.
+
+Usage:
+    python tools/bench_history_search.py [--accounts 100,1000,10000] [--history 500] [--repeat 10]
+
+Databases are created in a temporary directory and removed afterwards.
+"""
+import sys
+import os
+import argparse
+import statistics
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone, timedelta
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import or_
+from sqlalchemy.exc import SAWarning
+from sqlalchemy.orm import joinedload, contains_eager
+
+from app import create_app
+from app.entity import models
+
+QUERIES = ['escort', 'csr_user1', 'grocery run']
+
+
+def fill(accounts, history):
+    now = datetime.now(timezone.utc)
+    pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+    csr = models.UserAccount.query.filter_by(username='csr_user1').first()
+    cats = [c.id for c in models.Category.query.all()]
+    reqs = [r.id for r in models.Request.query.filter_by(pin_id=pin.id)]
+    with models.db.engine.begin() as conn:
+        conn.execute(models.UserAccount.__table__.insert(), [
+            {'username': f'bench_account{i}', 'password_hash': 'x', 'is_active': True} for i in range(accounts)])
+        conn.execute(models.ServiceHistory.__table__.insert(), [
+            {'pin_id': pin.id, 'csr_id': csr.id, 'request_id': reqs[i % len(reqs)],
+             'category_id': cats[i % len(cats)], 'date_completed': now - timedelta(hours=i)}
+            for i in range(history)])
+    return pin.id
+
+
+def legacy_search(pin_id, q, per_page=12):
+    """The pre-fix query: username filter with no join on user_accounts."""
+    SH = models.ServiceHistory
+    like = f'%{q}%'
+    qry = (SH.query.options(joinedload(SH.csr)).filter_by(pin_id=pin_id)
+           .join(SH.request, isouter=True).join(SH.category, isouter=True)
+           .options(contains_eager(SH.request), contains_eager(SH.category))
+           .filter(or_(models.UserAccount.username.like(like), models.Request.title.like(like),
+                       models.Category.name.like(like))))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', SAWarning)  # the cartesian product this benchmark measures
+        return qry.order_by(SH.date_completed.desc()).paginate(page=1, per_page=per_page, error_out=False)
+
+
+def current_search(pin_id, q, per_page=12):
+    return models.ServiceHistory.paginate_for_pin(pin_id, q=q, page=1, per_page=per_page)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+        models.db.session.remove()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accounts', default='100,1000,10000', help='Comma-separated extra account counts')
+    parser.add_argument('--history', type=int, default=500, help='History rows for the PIN')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the current path')
+    args = parser.parse_args()
+    counts = [int(s) for s in args.accounts.split(',') if s.strip()]
+
+    print(f"{'accounts':>9} {'query':<12} {'legacy':>10} {'current':>10}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in counts:
+            app = create_app({'TESTING': True,
+                              'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, f'hist{n}.db')}"})
+            with app.app_context():
+                pin_id = fill(n, args.history)
+                for q in QUERIES:
+                    old = None if args.skip_legacy else timed(lambda: legacy_search(pin_id, q), args.repeat)
+                    new = timed(lambda: current_search(pin_id, q), args.repeat)
+                    old_txt = '-' if old is None else f'{old:.2f}ms'
+                    print(f'{n:>9} {q:<12} {old_txt:>10} {new:>8.2f}ms')
+                models.db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
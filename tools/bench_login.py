@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput under concurrent attempts (a shift-change login storm).
+
+A fresh SQLite file is seeded with extra accounts spread over the four roles,
+then worker threads log in as random users (mostly valid, some wrong
+passwords or wrong roles) for a fixed time. The current single-query
+UserAccount.login is compared with the previous two-step lookup (profile by
+name, then account by username + profile_id).
+
+Usage:
+    python tools/bench_login.py [--users 5000] [--threads 8] [--seconds 5]
+
+Databases are created in a temporary directory and removed afterwards.
+"""
+import sys
+import os
+import argparse
+import random
+import tempfile
+import threading
+import time
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import event
+
+from app import create_app
+from app.entity import models
+
+ROLES = ['User Admin', 'CSR Representative', 'Person in Need', 'Platform Manager']
+
+
+def legacy_login(role, username, password):
+    """The pre-change login: profile lookup, then account lookup."""
+    prof = models.UserProfile.query.filter_by(name=role).first()
+    if not prof or not prof.is_active:
+        return None
+    u = models.UserAccount.query.filter_by(username=username, profile_id=prof.id).first()
+    if u and u.is_active and u.check_password(password):
+        _ = u.profile.name  # the login route reads the role off the user
+        return u
+    return None
+
+
+def current_login(role, username, password):
+    u = models.UserAccount.login(role, username, password)
+    if u:
+        _ = u.profile.name
+    return u
+
+
+def fill(n):
+    profiles = {p.name: p.id for p in models.UserProfile.query.all()}
+    hashed = models.UserAccount(username='x', password_hash='')
+    hashed.set_password('bench-pass')
+    rows = [{'username': f'bench_user{i}', 'password_hash': hashed.password_hash, 'is_active': True,
+             'profile_id': profiles[ROLES[i % len(ROLES)]]} for i in range(n)]
+    with models.db.engine.begin() as conn:
+        conn.execute(models.UserAccount.__table__.insert(), rows)
+
+
+def attempts(n, seed):
+    """Yield (role, username, password) mixing valid logins with bad password / wrong role."""
+    rnd = random.Random(seed)
+    while True:
+        i = rnd.randrange(n)
+        role, pwd = ROLES[i % len(ROLES)], 'bench-pass'
+        roll = rnd.random()
+        if roll < 0.1:
+            pwd = 'wrong'
+        elif roll < 0.15:
+            role = ROLES[(i + 1) % len(ROLES)]
+        yield role, f'bench_user{i}', pwd
+
+
+def run(app, fn, args):
+    stop = threading.Event()
+    counts = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        done = 0
+        with app.app_context():
+            for role, username, pwd in attempts(args.users, seed):
+                if stop.is_set():
+                    break
+                fn(role, username, pwd)
+                models.db.session.remove()
+                done += 1
+        with lock:
+            counts.append(done)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(counts) / args.seconds
+
+
+def queries_per_login(app, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = models.db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            fn('CSR Representative', 'bench_user1', 'bench-pass')
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+            models.db.session.remove()
+    return len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=5000, help='Extra accounts to seed')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = create_app({'TESTING': True,
+                          'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, 'login.db')}"})
+        with app.app_context():
+            fill(args.users)
+
+        print(f'{args.threads} threads, {args.seconds:g}s per variant, {args.users} accounts')
+        print(f"{'variant':<10} {'logins/s':>10} {'queries/login':>14}")
+        for name, fn in (('legacy', legacy_login), ('current', current_login)):
+            rate = run(app, fn, args)
+            print(f'{name:<10} {rate:>10.1f} {queries_per_login(app, fn):>14}')
+        with app.app_context():
+            models.db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Route-level latency benchmark: p50/p95/p99 and queries per request for the
+main pages, over generated datasets of several sizes.
+
+`run` builds one SQLite file per scale with tools/bulk_generate.py (scale =
+number of requests; accounts and shortlists grow with it), logs in as the
+busiest generated CSR and PIN plus the demo PM and admin, and drives each
+route through the Flask test client. Results are written as JSON.
+
+`compare` diffs two result files route by route and flags p50/p95 changes
+beyond a threshold; with --fail it exits non-zero on a regression, so it can
+gate CI or a before/after check of entity-layer work.
+
+Usage:
+    python tools/bench_routes.py run [--scales 1000,10000,100000] [--repeat 30] [--warmup 3]
+        [--seed 42] [--out bench-routes.json] [--keep DIR]
+    python tools/bench_routes.py compare BASE.json NEW.json [--threshold 10] [--fail]
+
+Databases are created in a temporary directory and removed afterwards unless
+--keep names a directory to build (and reuse) them in.
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from app.entity import models
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTES = {
+    'CSR Representative': ['/csr', '/csr/shortlist', '/csr/history'],
+    'Person in Need': ['/pin', '/pin/history'],
+    'Platform Manager': ['/pm', '/pm/reports?scope=daily'],
+    'User Admin': ['/admin/users'],
+}
+DEMO_LOGINS = {
+    'CSR Representative': ('csr_user1', 'csr_user1!'),
+    'Person in Need': ('pin_user1', 'pin_user1!'),
+    'Platform Manager': ('pm_user1', 'pm_user1!'),
+    'User Admin': ('user_admin1', 'user_admin1!'),
+}
+# generated accounts all share this password (see bulk_generate.py)
+BULK_PASSWORD = 'password'
+BUSIEST = {
+    'CSR Representative': """SELECT u.username FROM shortlist s JOIN user_accounts u ON u.id = s.csr_id
+                             GROUP BY s.csr_id ORDER BY COUNT(*) DESC LIMIT 1""",
+    'Person in Need': """SELECT u.username FROM request r JOIN user_accounts u ON u.id = r.pin_id
+                         GROUP BY r.pin_id ORDER BY COUNT(*) DESC LIMIT 1""",
+}
+
+
+def build(path, scale, seed):
+    """Generate a dataset with `scale` requests unless the file already exists."""
+    if os.path.exists(path):
+        return
+    cmd = [sys.executable, os.path.join(ROOT, 'tools', 'bulk_generate.py'), '--db', path,
+           '--requests', str(scale), '--pins', str(max(50, scale // 50)), '--csrs', str(max(10, scale // 500)),
+           '--categories', '20', '--shortlists', str(scale // 2), '--seed', str(seed)]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+
+
+def credentials(role):
+    """The busiest generated account for the role, else the demo account."""
+    sql = BUSIEST.get(role)
+    username = models.db.session.execute(text(sql)).scalar() if sql else None
+    return (username, BULK_PASSWORD) if username else DEMO_LOGINS[role]
+
+
+def percentile(sorted_samples, p):
+    """Nearest-rank percentile of an already sorted list."""
+    k = max(0, min(len(sorted_samples) - 1, round(p / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[k]
+
+
+def measure(client, url, repeat, warmup):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for _ in range(warmup):
+        client.get(url)
+    samples, queries, status = [], [], None
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for _ in range(repeat):
+            statements.clear()
+            t0 = time.perf_counter()
+            resp = client.get(url)
+            samples.append((time.perf_counter() - t0) * 1000)
+            queries.append(len(statements))
+            status = resp.status_code
+    finally:
+        event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+    samples.sort()
+    return {
+        'status': status,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'queries': max(queries),
+    }
+
+
+def bench_scale(path, scale, args):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'SEED_DEMO_DATA': False})
+    results = []
+    with app.app_context():
+        for role, urls in ROUTES.items():
+            username, password = credentials(role)
+            client = app.test_client()
+            client.post('/login', data={'role': role, 'username': username, 'password': password})
+            for url in urls:
+                row = {'scale': scale, 'route': url, 'user': username, **measure(client, url, args.repeat, args.warmup)}
+                results.append(row)
+                print(f"{scale:>8} {url:<26} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+                      f"{row['queries']:>5}" + ('' if row['status'] == 200 else f"  (HTTP {row['status']})"))
+        models.db.engine.dispose()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cmd_run(args):
+    scales = [int(s) for s in args.scales.split(',') if s.strip()]
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'seed': args.seed,
+        },
+        'results': [],
+    }
+    print(f"{'scale':>8} {'route':<26} {'p50':>8} {'p95':>8} {'p99':>8} {'qry':>5}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.keep or tmpdir
+        os.makedirs(workdir, exist_ok=True)
+        for scale in scales:
+            path = os.path.abspath(os.path.join(workdir, f'routes-{scale}-s{args.seed}.db'))
+            build(path, scale, args.seed)
+            report['results'].extend(bench_scale(path, scale, args))
+    with open(args.out, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(f'written to {args.out}')
+
+
+def cmd_compare(args):
+    with open(args.base) as fh:
+        base = json.load(fh)
+    with open(args.new) as fh:
+        new = json.load(fh)
+    before = {(r['scale'], r['route']): r for r in base['results']}
+    regressions = 0
+    print(f"base {base['meta'].get('git') or '?'}  vs  new {new['meta'].get('git') or '?'}")
+    print(f"{'scale':>8} {'route':<26} {'p50 base':>9} {'p50 new':>9} {'Δ%':>7} {'p95 Δ%':>7} {'queries':>9}")
+    for row in new['results']:
+        old = before.get((row['scale'], row['route']))
+        if not old:
+            print(f"{row['scale']:>8} {row['route']:<26} {'-':>9} {row['p50_ms']:>9.2f}   (new)")
+            continue
+        d50 = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+        d95 = (row['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+        flag = ''
+        if d50 > args.threshold or d95 > args.threshold or row['queries'] > old['queries']:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif d50 < -args.threshold:
+            flag = '  faster'
+        print(f"{row['scale']:>8} {row['route']:<26} {old['p50_ms']:>9.2f} {row['p50_ms']:>9.2f} {d50:>+7.1f} "
+              f"{d95:>+7.1f} {old['queries']:>4}->{row['queries']:<4}{flag}")
+    print(f'{regressions} regression(s) beyond {args.threshold:g}%')
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help='Build datasets and benchmark the routes')
+    run.add_argument('--scales', default='1000,10000,100000', help='Comma-separated request counts')
+    run.add_argument('--repeat', type=int, default=30, help='Timed requests per route')
+    run.add_argument('--warmup', type=int, default=3, help='Untimed requests per route first')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--out', default='bench-routes.json')
+    run.add_argument('--keep', help='Directory to build and reuse the datasets in')
+    run.set_defaults(func=cmd_run)
+    compare = sub.add_parser('compare', help='Diff two result files')
+    compare.add_argument('base')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=10.0, help='Percent change treated as significant')
+    compare.add_argument('--fail', action='store_true', help='Exit 1 if any route regressed')
+    compare.set_defaults(func=cmd_compare)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
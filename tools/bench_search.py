@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark request text search: legacy LIKE scan vs the request_fts index.
+
+For each scale a fresh SQLite file is filled with synthetic open requests and
+the CSR dashboard search (first page + total count, like
+Request.paginate_open_no_increment) is timed through both paths.
+
+Usage:
+    python tools/bench_search.py [--scales 10000,100000,1000000] [--repeat 5]
+
+Databases are created in a temporary directory and removed afterwards.
+"""
+import sys
+import os
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from itertools import accumulate
+from datetime import datetime, timezone, timedelta
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app import create_app
+from app.entity import models
+
+WORDS = (
+    'grocery medical escort wheelchair repair tutoring maths english garden '
+    'plumbing roof painting transport pharmacy shopping laundry cooking meals '
+    'visit companion reading letters computer phone setup moving boxes pets '
+    'walking dog cleaning windows fence lawn mowing groceries appointment'
+).split()
+# long tail of rarer tokens so term frequencies look like real text (Zipf-ish)
+VOCAB = WORDS + [f'item{k}' for k in range(5000)]
+CUM_WEIGHTS = list(accumulate(1.0 / (rank + 1) for rank in range(len(VOCAB))))
+# a mix of frequent words, rare words and a prefix as typed on a keystroke
+QUERIES = ['grocery', 'wheelchair repair', 'compu', 'item1234', 'zzz-missing']
+BATCH = 20000
+
+
+def fill(n, seed=42):
+    rnd = random.Random(seed)
+    cats = [c.id for c in models.Category.query.all()]
+    now = datetime.now(timezone.utc)
+    table = models.Request.__table__
+    with models.db.engine.begin() as conn:
+        for start in range(0, n, BATCH):
+            rows = []
+            for i in range(start, min(n, start + BATCH)):
+                ts = now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365))
+                rows.append({
+                    'title': ' '.join(rnd.choices(VOCAB, cum_weights=CUM_WEIGHTS, k=3)) + f' #{i}',
+                    'description': ' '.join(rnd.choices(VOCAB, cum_weights=CUM_WEIGHTS, k=12)),
+                    'category_id': rnd.choice(cats),
+                    'status': 'open',
+                    'created_at': ts,
+                    'updated_at': ts,
+                    'views_count': 0,
+                    'shortlist_count': 0,
+                })
+            conn.execute(table.insert(), rows)
+
+
+def like_page(q, per_page=12):
+    # the pre-FTS implementation of paginate_open_no_increment
+    R = models.Request
+    like = f"%{q}%"
+    query = R.query.filter_by(status='open').filter((R.title.like(like)) | (R.description.like(like)))
+    pag = query.order_by(R.created_at.desc()).paginate(page=1, per_page=per_page, error_out=False)
+    return pag.total
+
+
+def fts_page(q, per_page=12):
+    return models.Request.paginate_open_no_increment(q=q, page=1, per_page=per_page)['total']
+
+
+def timed(fn, q, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def run_scale(n, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+        with app.app_context():
+            t0 = time.perf_counter()
+            fill(n)
+            print(f'\n== {n:,} requests (loaded in {time.perf_counter() - t0:.1f}s)')
+            print(f'{"query":<26}{"LIKE ms":>10}{"FTS ms":>10}{"speedup":>10}{"hits":>10}')
+            for q in QUERIES:
+                like_ms = timed(like_page, q, repeat)
+                fts_ms = timed(fts_page, q, repeat)
+                hits = fts_page(q)
+                print(f'{q:<26}{like_ms:>10.1f}{fts_ms:>10.1f}{like_ms / max(fts_ms, 1e-6):>9.1f}x{hits:>10}')
+            models.db.session.remove()
+            models.db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', default='10000,100000,1000000', help='Comma separated row counts')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median reported)')
+    args = parser.parse_args()
+    for n in (int(x) for x in args.scales.split(',') if x.strip()):
+        run_scale(n, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
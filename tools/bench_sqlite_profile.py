@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent readers and writers with and without the SQLite profile.
+
+For each mode a fresh SQLite file is seeded with extra open requests, then
+reader threads page through the CSR dashboard (Request.paginate_open_no_increment)
+while writer threads save/unsave shortlist entries and bump view counters, the
+writes behind "database is locked" in the default rollback journal. Reads/s,
+writes/s, p95 latencies and lock errors are reported per mode.
+
+Usage:
+    python tools/bench_sqlite_profile.py [--rows 20000] [--readers 8] [--writers 2] [--seconds 5]
+
+Databases are created in a temporary directory and removed afterwards.
+"""
+import sys
+import os
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.entity import models
+
+MODES = {
+    # rollback journal, one connection per thread, 5s driver timeout: the old setup
+    'baseline': {'SQLITE_PROFILE': False},
+    'profile': {'SQLITE_PROFILE': True},
+}
+
+
+def fill(n, seed=7):
+    rnd = random.Random(seed)
+    cats = [c.id for c in models.Category.query.all()]
+    pin = models.UserAccount.query.filter_by(username='pin_user1').first()
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(n):
+        ts = now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365))
+        rows.append({'pin_id': pin.id, 'title': f'Bench request {i}', 'description': 'help needed',
+                     'category_id': rnd.choice(cats), 'status': 'open', 'created_at': ts, 'updated_at': ts,
+                     'views_count': 0, 'shortlist_count': 0})
+    with models.db.engine.begin() as conn:
+        conn.execute(models.Request.__table__.insert(), rows)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_mode(name, overrides, args, tmpdir):
+    config = {'TESTING': True, 'VIEW_COUNTER_BUFFER': False,
+              'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, name + '.db')}"}
+    config.update(overrides)
+    app = create_app(config)
+    with app.app_context():
+        fill(args.rows)
+        csr_ids = [u.id for u in models.UserAccount.query.join(models.UserProfile)
+                   .filter(models.UserProfile.name == 'CSR Representative').all()]
+        req_ids = [r.id for r in models.Request.query.filter_by(status='open').limit(500).all()]
+        models.db.session.remove()
+
+    stop = threading.Event()
+    results = {'read': [], 'write': [], 'errors': 0}
+    lock = threading.Lock()
+
+    def reader(seed):
+        rnd = random.Random(seed)
+        lat = []
+        with app.app_context():
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    models.Request.paginate_open_no_increment(page=rnd.randint(1, 20), per_page=10)
+                    lat.append(time.perf_counter() - t0)
+                except OperationalError:
+                    with lock:
+                        results['errors'] += 1
+                finally:
+                    models.db.session.remove()
+        with lock:
+            results['read'].extend(lat)
+
+    def writer(seed):
+        rnd = random.Random(seed)
+        lat = []
+        with app.app_context():
+            while not stop.is_set():
+                csr_id, req_id = rnd.choice(csr_ids), rnd.choice(req_ids)
+                t0 = time.perf_counter()
+                try:
+                    if not models.Shortlist.add_if_not_exists(csr_id, req_id):
+                        models.Shortlist.remove_if_exists(csr_id, req_id)
+                    models.Request.add_views({req_id: 1})
+                    lat.append(time.perf_counter() - t0)
+                except OperationalError:
+                    with lock:
+                        results['errors'] += 1
+                finally:
+                    models.db.session.remove()
+        with lock:
+            results['write'].extend(lat)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(100 + i,)) for i in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    with app.app_context():
+        models.db.engine.dispose()
+
+    return {
+        'reads_s': len(results['read']) / args.seconds,
+        'writes_s': len(results['write']) / args.seconds,
+        'read_p95_ms': percentile(results['read'], 95) * 1000,
+        'write_p95_ms': percentile(results['write'], 95) * 1000,
+        'read_mean_ms': statistics.fmean(results['read']) * 1000 if results['read'] else 0.0,
+        'errors': results['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000, help='Extra open requests to seed')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f'{args.readers} readers, {args.writers} writers, {args.seconds:g}s per mode, '
+          f'{args.rows} extra requests')
+    print(f"{'mode':<10} {'reads/s':>9} {'writes/s':>9} {'read p95':>10} {'write p95':>10} {'read mean':>10} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, overrides in MODES.items():
+            r = run_mode(name, overrides, args, tmpdir)
+            print(f"{name:<10} {r['reads_s']:>9.1f} {r['writes_s']:>9.1f} {r['read_p95_ms']:>8.1f}ms "
+                  f"{r['write_p95_ms']:>8.1f}ms {r['read_mean_ms']:>8.1f}ms {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
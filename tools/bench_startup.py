@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark app start-up: time and SQL statements spent in create_app().
+
+Scenarios:
+    fresh file      new database file: every migration runs, demo data is seeded
+    warm + seed     migrated database, SEED_DEMO_DATA on (ledger read + seed probe)
+    warm, no seed   migrated database, SEED_DEMO_DATA off (ledger read only)
+    memory          in-memory database, as the test suite starts every test
+
+Usage:
+    python tools/bench_startup.py [--repeat 10]
+
+Databases are created in a temporary directory and removed afterwards.
+"""
+import sys
+import os
+import argparse
+import statistics
+import tempfile
+import time
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from app.entity import models
+
+
+def start(uri, **config):
+    """create_app once; returns (elapsed ms, statements issued)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    t0 = time.perf_counter()
+    try:
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': uri, **config})
+    finally:
+        elapsed = (time.perf_counter() - t0) * 1000
+        event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+    with app.app_context():
+        models.db.engine.dispose()
+    return elapsed, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fresh = [start(f"sqlite:///{os.path.join(tmpdir, f'fresh{i}.db')}") for i in range(args.repeat)]
+        results.append(('fresh file', fresh))
+        warm_uri = f"sqlite:///{os.path.join(tmpdir, 'fresh0.db')}"
+        results.append(('warm + seed', [start(warm_uri) for _ in range(args.repeat)]))
+        results.append(('warm, no seed', [start(warm_uri, SEED_DEMO_DATA=False) for _ in range(args.repeat)]))
+        results.append(('memory', [start('sqlite:///:memory:') for _ in range(args.repeat)]))
+
+    print(f"{'scenario':<14} {'median':>9} {'min':>9} {'statements':>11}")
+    for name, runs in results:
+        times = [t for t, _ in runs]
+        print(f'{name:<14} {statistics.median(times):>7.1f}ms {min(times):>7.1f}ms {runs[-1][1]:>11}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Generate a large, realistically skewed dataset for load and capacity testing.
+
+Unlike tools/seed_test_data.py (a few hundred rows through the ORM, one query
+per row) this writes with batched Core executemany inserts and explicit id
+ranges, so no row is ever read back. Popularity follows a Zipf-like curve:
+a few categories, PINs and CSRs account for most requests, shortlists and
+completed services, and request dates lean towards the recent past. The same
+--seed always produces the same rows (dates are relative to the time of the run).
+
+Secondary indexes and the FTS/rollup/table_version triggers are dropped while
+loading and rebuilt in one pass at the end (request_fts, service_history_fts,
+report_daily_rollup, declared indexes, version bumps), followed by ANALYZE.
+
+Usage:
+    python tools/bulk_generate.py --db PATH [--requests 1000000] [--pins 20000] [--csrs 2000]
+        [--categories 40] [--shortlists 500000] [--completed 0.35] [--days 730]
+        [--skew 1.1] [--seed 42] [--batch 50000] [--force]
+
+The target database is created (with the demo accounts) if it does not
+exist; generated rows are added to whatever is already there. --force
+deletes an existing file first.
+"""
+import sys
+import os
+import argparse
+import random
+import time
+from array import array
+from itertools import accumulate
+from datetime import datetime, timezone, timedelta
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+
+from app import create_app
+from app.entity import models
+
+WORDS = (
+    'help needed with weekly grocery shopping pharmacy pickup medical appointment escort '
+    'wheelchair repair ramp tutoring maths english reading homework garden lawn mowing '
+    'plumbing leak roof gutter painting fence moving boxes furniture transport hospital '
+    'visit companion letters computer phone setup internet laundry cooking meals pets '
+    'dog walking cleaning windows heating repair shopping delivery form filling'
+).split()
+TABLES_WITH_LOAD_INDEXES = ('request', 'shortlist', 'service_history')
+LOAD_TRIGGER_PREFIXES = ('request_fts_', 'service_history_fts_', 'report_rollup_', 'table_version_')
+
+
+def zipf_cum_weights(n, s):
+    """Cumulative weights for picking rank k (0-based) with probability ~ 1 / (k + 1)^s."""
+    return list(accumulate(1.0 / (k + 1) ** s for k in range(n)))
+
+
+class Generator:
+    def __init__(self, conn, args):
+        self.conn = conn
+        self.args = args
+        self.rnd = random.Random(args.seed)
+        self.now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+    # ------- helpers -------
+    def next_id(self, table):
+        return self.conn.execute(text(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}')).scalar()
+
+    def insert(self, table, rows):
+        if rows:
+            self.conn.execute(table.insert(), rows)
+
+    def batches(self, total):
+        for start in range(0, total, self.args.batch):
+            yield start, min(total, start + self.args.batch)
+
+    def skewed(self, population, cum_weights, k):
+        return self.rnd.choices(population, cum_weights=cum_weights, k=k)
+
+    def created_at(self):
+        # triangular with mode "now": recent days are busiest
+        age = self.rnd.triangular(0, self.args.days, 0)
+        return self.now - timedelta(days=age, seconds=self.rnd.randint(0, 86399))
+
+    # ------- entities -------
+    def profiles(self):
+        have = {name: pid for pid, name in self.conn.execute(text('SELECT id, name FROM user_profiles'))}
+        for name in ('User Admin', 'CSR Representative', 'Person in Need', 'Platform Manager'):
+            if name not in have:
+                self.conn.execute(text('INSERT INTO user_profiles (name, is_active) VALUES (:n, 1)'), {'n': name})
+        return {name: pid for pid, name in self.conn.execute(text('SELECT id, name FROM user_profiles'))}
+
+    def categories(self):
+        have = {name for (name,) in self.conn.execute(text('SELECT name FROM category'))}
+        new = [{'name': f'Category {k}'} for k in range(1, self.args.categories + 1)
+               if f'Category {k}' not in have]
+        self.insert(models.Category.__table__, new)
+        ids = [cid for (cid,) in self.conn.execute(text('SELECT id FROM category ORDER BY id'))]
+        self.rnd.shuffle(ids)  # popularity rank is independent of id
+        return ids, {cid: name for cid, name in self.conn.execute(text('SELECT id, name FROM category'))}
+
+    def accounts(self, prefix, count, profile_id):
+        """Insert count accounts with explicit ids; returns the id list (popularity order)."""
+        first = self.next_id('user_accounts')
+        pw = models.UserAccount(username='', password_hash='')
+        pw.set_password('password')
+        tag = f'{prefix}_s{self.args.seed}_{first}'
+        for lo, hi in self.batches(count):
+            self.insert(models.UserAccount.__table__, [
+                {'id': first + i, 'profile_id': profile_id, 'username': f'{tag}_{i}',
+                 'first_name': prefix.capitalize(), 'last_name': f'User{i}', 'email': f'{tag}_{i}@example.org',
+                 'password_hash': pw.password_hash, 'is_active': True}
+                for i in range(lo, hi)])
+        ids = list(range(first, first + count))
+        self.rnd.shuffle(ids)
+        return ids
+
+    def requests(self, cat_ids, cat_names, pin_ids, csr_ids):
+        """Insert requests (+ service history for completed ones); returns the open request ids."""
+        a = self.args
+        cat_w = zipf_cum_weights(len(cat_ids), a.skew)
+        pin_w = zipf_cum_weights(len(pin_ids), a.skew)
+        csr_w = zipf_cum_weights(len(csr_ids), a.skew)
+        first = self.next_id('request')
+        history_id = self.next_id('service_history')
+        open_ids = array('q')
+        req_table, sh_table = models.Request.__table__, models.ServiceHistory.__table__
+        for lo, hi in self.batches(a.requests):
+            n = hi - lo
+            cats = self.skewed(cat_ids, cat_w, n)
+            pins = self.skewed(pin_ids, pin_w, n)
+            csrs = self.skewed(csr_ids, csr_w, n)
+            reqs, history = [], []
+            for i in range(n):
+                rid = first + lo + i
+                created = self.created_at()
+                done = self.rnd.random() < a.completed
+                completed = min(self.now, created + timedelta(days=self.rnd.uniform(0.2, 15))) if done else None
+                words = ' '.join(self.rnd.choices(WORDS, k=3))
+                reqs.append({
+                    'id': rid, 'pin_id': pins[i], 'category_id': cats[i],
+                    'title': f'{cat_names[cats[i]]}: {words}',
+                    'description': ' '.join(self.rnd.choices(WORDS, k=14)),
+                    'status': 'completed' if done else 'open',
+                    'created_at': created, 'updated_at': completed or created,
+                    'accepted_csr_id': csrs[i] if done else None,
+                    'accepted_at': created + (completed - created) / 2 if done else None,
+                    'views_count': int(self.rnd.paretovariate(1.3) * 3) - 3,
+                    'shortlist_count': 0,
+                })
+                if done:
+                    history.append({'id': history_id, 'csr_id': csrs[i], 'pin_id': pins[i], 'request_id': rid,
+                                    'category_id': cats[i], 'date_completed': completed})
+                    history_id += 1
+                else:
+                    open_ids.append(rid)
+            self.insert(req_table, reqs)
+            self.insert(sh_table, history)
+            progress('requests', hi, a.requests)
+        return open_ids
+
+    def shortlists(self, csr_ids, open_ids):
+        a = self.args
+        target = min(a.shortlists, len(csr_ids) * len(open_ids))
+        if not target:
+            return 0
+        csr_w = zipf_cum_weights(len(csr_ids), a.skew)
+        seen = set()
+        table = models.Shortlist.__table__
+        written = 0
+        while written < target:
+            want = min(a.batch, target - written)
+            csrs = self.skewed(csr_ids, csr_w, want)
+            rows = []
+            for csr in csrs:
+                rid = open_ids[self.rnd.randrange(len(open_ids))]
+                if (csr, rid) in seen:
+                    continue
+                seen.add((csr, rid))
+                rows.append({'csr_id': csr, 'request_id': rid, 'created_at': self.created_at()})
+            # pairs may already exist from an earlier run into the same database
+            self.conn.execute(models.sqlite_insert(table).on_conflict_do_nothing(
+                index_elements=['csr_id', 'request_id']), rows)
+            written += len(rows)
+            progress('shortlists', written, target)
+        self.conn.execute(text("""
+            UPDATE request SET shortlist_count = s.n
+              FROM (SELECT request_id, COUNT(*) AS n FROM shortlist GROUP BY request_id) AS s
+             WHERE request.id = s.request_id
+        """))
+        return written
+
+
+def progress(label, done, total):
+    print(f'\r  {label}: {done}/{total}', end='\n' if done >= total else '', flush=True)
+
+
+def drop_load_overhead(conn):
+    """Drop secondary indexes and sync triggers on the bulk tables; they are rebuilt afterwards."""
+    for (name,) in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type='trigger'"
+    )).all():
+        if name.startswith(LOAD_TRIGGER_PREFIXES):
+            conn.execute(text(f'DROP TRIGGER {name}'))
+    for table in TABLES_WITH_LOAD_INDEXES:
+        for idx in models.db.metadata.tables[table].indexes:
+            if not idx.unique:
+                conn.execute(text(f'DROP INDEX IF EXISTS {idx.name}'))
+
+
+def rebuild_derived(conn):
+    models.ensure_request_fts(conn, rebuild=True)
+    models.ensure_history_fts(conn, rebuild=True)
+    models.ensure_report_rollups(conn, rebuild=True)
+    models.ensure_indexes(conn)
+    models.ensure_table_versions(conn)
+    models.bump_table_versions(conn)
+    conn.execute(text('ANALYZE'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', required=True, help='Path to the SQLite database file to fill')
+    parser.add_argument('--requests', type=int, default=1_000_000)
+    parser.add_argument('--pins', type=int, default=20_000)
+    parser.add_argument('--csrs', type=int, default=2_000)
+    parser.add_argument('--categories', type=int, default=40, help='Generated categories (added to existing ones)')
+    parser.add_argument('--shortlists', type=int, default=500_000)
+    parser.add_argument('--completed', type=float, default=0.35, help='Share of requests that are completed')
+    parser.add_argument('--days', type=int, default=730, help='Spread request dates over this many days')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for category/PIN/CSR popularity')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch', type=int, default=50_000)
+    parser.add_argument('--force', action='store_true', help='Delete an existing database file first')
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db)
+    if args.force and os.path.exists(path):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'VIEW_COUNTER_BUFFER': False})
+
+    t0 = time.perf_counter()
+    with app.app_context():
+        with models.db.engine.begin() as conn:
+            conn.execute(text('PRAGMA cache_size=-512000'))
+            drop_load_overhead(conn)
+            gen = Generator(conn, args)
+            profiles = gen.profiles()
+            cat_ids, cat_names = gen.categories()
+            pin_ids = gen.accounts('pin', args.pins, profiles['Person in Need'])
+            csr_ids = gen.accounts('csr', args.csrs, profiles['CSR Representative'])
+            print(f'accounts and categories: {time.perf_counter() - t0:.1f}s')
+            open_ids = gen.requests(cat_ids, cat_names, pin_ids, csr_ids)
+            print(f'requests + history: {time.perf_counter() - t0:.1f}s')
+            shortlisted = gen.shortlists(csr_ids, open_ids)
+            print(f'shortlists: {time.perf_counter() - t0:.1f}s')
+            rebuild_derived(conn)
+            print(f'indexes, FTS and rollups rebuilt: {time.perf_counter() - t0:.1f}s')
+            counts = {t: conn.execute(text(f'SELECT COUNT(*) FROM {t}')).scalar()
+                      for t in ('user_accounts', 'category', 'request', 'service_history', 'shortlist')}
+        models.db.engine.dispose()
+
+    print(f'done in {time.perf_counter() - t0:.1f}s ({shortlisted} shortlist rows added)')
+    for table, n in counts.items():
+        print(f'  {table}: {n}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Index advisor: run EXPLAIN QUERY PLAN over every query the controllers issue.
+
+Each controller use case is executed once (inside a request context with the
+matching role in the session) while the SQL it sends is captured. Every
+captured SELECT is then explained with its real parameters and any SCAN of a
+large table (whole table or whole index) is flagged, except an outer scan that
+already delivers rows in ORDER BY order and is cut short by LIMIT. The script
+exits non-zero when something is flagged, so it can run in CI as a standing
+check against plan regressions.
+
+Usage:
+    python tools/explain_queries.py [--db PATH] [--verbose]
+
+Without --db an in-memory database with the default seed data is used. With
+--db, note that the CSR "view request" scenario bumps one view counter.
+"""
+import sys
+import os
+import argparse
+import re
+from datetime import date, timedelta
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import session
+from sqlalchemy import event
+
+from app import create_app
+from app.entity import models
+from app.control.auth_controller import AuthController
+from app.control.csr_controller import CSRController
+from app.control.pin_controller import PINController
+from app.control.pm_controller import PMController
+from app.control.user_admin_controller import UserAdminController
+
+# tables that grow with usage; small reference tables may be scanned freely
+LARGE_TABLES = {'request', 'shortlist', 'service_history', 'user_accounts', 'job',
+                'request_archive', 'service_history_archive'}
+
+_COUNT = re.compile(r'^\s*SELECT count\(', re.IGNORECASE)
+
+# (scenario, table) -> statements of that scenario whose scan of table is expected,
+# with the reason; None accepts every statement, a pattern only the matching ones
+ACCEPTED_SCANS = {
+    # substring search over usernames/profile names has no index to use
+    ('admin: search accounts (q)', 'user_accounts'): None,
+    # the browse total is COUNT(*) over every open request, so it has to visit each one;
+    # SQLite picks the narrowest covering index for that. paginate_query() only runs it
+    # when the request table changed since the last count (PAGINATION_COUNT='cached')
+    # or the page is full, and PAGINATION_COUNT='none' drops it altogether
+    ('csr: browse open', 'request'): _COUNT,
+    # an unfiltered export reads every row by definition (in date order, streamed)
+    ('pm: export all history', 'service_history'): None,
+    ('pm: export all requests', 'request'): None,
+}
+
+_SCAN = re.compile(r'^SCAN (\w+)(.*)$')
+
+
+def scenarios(ids):
+    """Yield (name, role, callable) for every controller use case that reads data."""
+    today = date.today()
+    start = (today - timedelta(days=90)).isoformat()
+    end = today.isoformat()
+    csr, pin, pm = 'CSR Representative', 'Person in Need', 'Platform Manager'
+    return [
+        ('auth: login', None, lambda: AuthController.login(csr, 'csr_user1', 'csr_user1!')),
+        ('csr: categories', csr, CSRController.get_categories),
+        ('csr: browse open', csr, lambda: CSRController.get_open_requests(page=3)),
+        ('csr: browse open by category', csr, lambda: CSRController.get_open_requests(category_id=ids['cat'], page=2)),
+        ('csr: browse open (cursor)', csr, lambda: CSRController.get_open_requests(cursor='')),
+        ('csr: search open', csr, lambda: CSRController.search_requests(q='grocery', page=1)),
+        ('csr: search open by category (cursor)', csr, lambda: CSRController.search_requests(category_id=ids['cat'], q='help', cursor='')),
+        ('csr: shortlist', csr, CSRController.get_shortlist),
+        ('csr: dashboard summary', csr, lambda: CSRController.dashboard_summary(ids['open_page'])),
+        ('csr: search shortlist', csr, lambda: CSRController.search_shortlist(q='help', category_id=ids['cat'])),
+        ('csr: history', csr, lambda: CSRController.history(category_id=ids['cat'], start=start, end=end)),
+        ('csr: view request', csr, lambda: CSRController.get_request(ids['open_req'])),
+        ('csr: is saved', csr, lambda: CSRController.is_saved_by(ids['open_req'])),
+        ('pin: my requests', pin, lambda: PINController.list_my_requests('', page=2)),
+        ('pin: search my requests', pin, lambda: PINController.list_my_requests('help', page=1)),
+        ('pin: history', pin, lambda: PINController.history(category_id=ids['cat'], start=start, end=end)),
+        ('pin: search history', pin, lambda: PINController.history(q='help')),
+        ('pin: history preview', pin, PINController.history_preview),
+        ('pm: categories page', pm, lambda: PMController.get_categories_paginated(q='', page=1)),
+        ('pm: search categories', pm, lambda: PMController.search_categories('a')),
+        ('pm: daily report', pm, lambda: PMController.generate_report('daily')),
+        ('pm: weekly report', pm, lambda: PMController.generate_report('weekly')),
+        ('pm: monthly report', pm, lambda: PMController.generate_report('monthly')),
+        ('pm: hourly report (analytics)', pm, lambda: PMController.generate_report('hourly')),
+        ('pm: rolling report (analytics)', pm, lambda: PMController.generate_report('rolling7')),
+        ('pm: latency report (analytics)', pm, lambda: PMController.generate_report('latency', category_id=ids['cat'])),
+        ('pm: export all history', pm, lambda: list(PMController.export_history()[1])),
+        ('pm: export history by category', pm, lambda: list(PMController.export_history(category_id=ids['cat'], start=start, end=end)[1])),
+        ('pm: export all requests', pm, lambda: list(PMController.export_requests()[1])),
+        ('pm: export open requests by category', pm, lambda: list(PMController.export_requests(category_id=ids['cat'], start=start, end=end, status='open')[1])),
+        ('pm: recent jobs', pm, PMController.recent_jobs),
+        ('pm: job status', pm, lambda: PMController.job_status(ids['job'])),
+        ('pm: job result', pm, lambda: PMController.job_result(ids['job'])),
+        ('admin: accounts', 'User Admin', lambda: UserAdminController.search_users('', 'accounts')),
+        ('admin: search accounts (q)', 'User Admin', lambda: UserAdminController.search_users('csr', 'accounts')),
+        ('admin: profiles', 'User Admin', lambda: UserAdminController.search_users('', 'profiles')),
+        ('admin: active profiles', 'User Admin', UserAdminController.get_active_profiles),
+    ]
+
+
+def resolve_ids():
+    def first_user(role):
+        u = (models.UserAccount.query.join(models.UserProfile)
+             .filter(models.UserProfile.name == role).order_by(models.UserAccount.id).first())
+        return u.id if u else None
+
+    open_req = models.Request.query.filter_by(status='open').first()
+    open_page = [r.id for r in models.Request.query.filter_by(status='open').limit(12)]
+    cat = models.Category.query.first()
+    job = models.Job.query.order_by(models.Job.id.desc()).first()
+    return {
+        'CSR Representative': first_user('CSR Representative'),
+        'Person in Need': first_user('Person in Need'),
+        'Platform Manager': first_user('Platform Manager'),
+        'User Admin': first_user('User Admin'),
+        'open_req': open_req.id if open_req else 0,
+        'open_page': open_page,
+        'cat': cat.id if cat else None,
+        'job': job.id if job else 0,
+    }
+
+
+def capture(app, engine, ids):
+    """Run every scenario and return [(scenario, statement, parameters)] for SELECTs."""
+    captured = []
+    current = {'name': None}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')) and not executemany:
+            captured.append((current['name'], statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for name, role, fn in scenarios(ids):
+            current['name'] = name
+            with app.test_request_context():
+                if role:
+                    session['user_id'] = ids[role]
+                    session['role'] = role
+                fn()
+                models.db.session.remove()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return captured
+
+
+def accepted(name, table, statement):
+    key = (name, table)
+    return key in ACCEPTED_SCANS and (ACCEPTED_SCANS[key] is None or ACCEPTED_SCANS[key].search(statement))
+
+
+def early_exit(statement, plan):
+    """True when the outer scan already yields rows in ORDER BY order and LIMIT stops it early."""
+    return ' LIMIT ' in statement.upper() and not any('TEMP B-TREE FOR ORDER BY' in line for line in plan)
+
+
+def explain(engine, captured, verbose=False):
+    flagged = []
+    seen = set()
+    with engine.connect() as conn:
+        for name, statement, parameters in captured:
+            key = (name, statement)
+            if key in seen:
+                continue
+            seen.add(key)
+            plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+            problems = []
+            for pos, line in enumerate(plan):
+                m = _SCAN.match(line.strip())
+                if not m or m.group(1) not in LARGE_TABLES or accepted(name, m.group(1), statement):
+                    continue
+                if pos == 0 and early_exit(statement, plan):
+                    continue
+                problems.append(line.strip())
+            if problems:
+                flagged.append((name, statement, problems))
+            if verbose or problems:
+                print(f"\n[{'FLAG' if problems else 'ok'}] {name}")
+                print('  ' + ' '.join(statement.split())[:300])
+                for line in plan:
+                    print(f'    {line}')
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', help='Path to a SQLite database file (default: in-memory seeded DB)')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan, not only flagged ones')
+    args = parser.parse_args()
+
+    uri = f"sqlite:///{os.path.abspath(args.db)}" if args.db else 'sqlite:///:memory:'
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': uri})
+    with app.app_context():
+        engine = models.db.engine
+        ids = resolve_ids()
+        captured = capture(app, engine, ids)
+        flagged = explain(engine, captured, verbose=args.verbose)
+
+    statements = len({s for _, s, _ in captured})
+    print(f'\n{len(captured)} queries captured ({statements} distinct) across {len(scenarios(ids))} scenarios')
+    if flagged:
+        print(f'{len(flagged)} queries scan a large table:')
+        for name, _, problems in flagged:
+            print(f'  - {name}: {"; ".join(problems)}')
+        sys.exit(1)
+    print('No full scans of large tables.')
+
+
+if __name__ == '__main__':
+    main()
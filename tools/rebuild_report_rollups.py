@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Backfill / rebuild the report_daily_rollup table behind the PM reports.
+
+The rollup is kept current by triggers on `request` and `service_history`, and
+an empty rollup is backfilled on app start. Run this to recompute it
+explicitly, e.g. after restoring a backup, editing history by hand or bulk
+loading rows with the triggers dropped.
+
+Usage:
+    python tools/rebuild_report_rollups.py [--db PATH]
+
+By default this uses the app's configured database (instance csr_vms.db).
+"""
+import sys
+import os
+import argparse
+import time
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app import create_app
+from app.entity import models
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', help='Path to a SQLite database file (defaults to the app instance DB)')
+    args = parser.parse_args()
+
+    config = {}
+    if args.db:
+        config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.abspath(args.db)}"
+    app = create_app(config or None)
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        with models.db.engine.begin() as conn:
+            models.ensure_report_rollups(conn)
+            rows = models.rebuild_report_rollups(conn)
+        elapsed = time.perf_counter() - t0
+        print(f'report_daily_rollup rebuilt: {rows} (category, day) rows in {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
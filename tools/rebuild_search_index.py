@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Backfill / rebuild the full-text indexes: request_fts (CSR/PIN request search)
+and service_history_fts (PIN history search).
+
+Databases created before an FTS5 index existed get the virtual table and its
+sync triggers on app start, but a large table is only indexed once. Run this
+to (re)build the indexes explicitly, e.g. after restoring a backup or bulk
+loading rows with the triggers disabled.
+
+Usage:
+    python tools/rebuild_search_index.py [--db PATH] [--optimize]
+
+By default this uses the app's configured database (instance csr_vms.db).
+"""
+import sys
+import os
+import argparse
+import time
+
+# Ensure project root on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+
+from app import create_app
+from app.entity import models
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', help='Path to a SQLite database file (defaults to the app instance DB)')
+    parser.add_argument('--optimize', action='store_true', help='Merge FTS b-tree segments after rebuilding')
+    args = parser.parse_args()
+
+    config = {}
+    if args.db:
+        config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.abspath(args.db)}"
+    app = create_app(config or None)
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        with models.db.engine.begin() as conn:
+            models.ensure_request_fts(conn, rebuild=True)
+            models.ensure_history_fts(conn, rebuild=True)
+            if args.optimize:
+                conn.execute(text("INSERT INTO request_fts(request_fts) VALUES ('optimize')"))
+                conn.execute(text("INSERT INTO service_history_fts(service_history_fts) VALUES ('optimize')"))
+            rows = conn.execute(text("SELECT COUNT(*) FROM request")).scalar()
+            history_rows = conn.execute(text("SELECT COUNT(*) FROM service_history")).scalar()
+        elapsed = time.perf_counter() - t0
+        print(f'request_fts rebuilt: {rows} requests, service_history_fts: {history_rows} history rows '
+              f'indexed in {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()